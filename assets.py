@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only gzip variants are built
+    brotli = None
+
+# Content encodings of the precompressed variants, by preference.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        if brotli is None:
+            return None
+        return brotli.compress(data, quality=11)
+    # A fixed mtime keeps the variants identical from one build to another.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _write(path, data):
+    # Workers starting together may build the same file.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class AssetManifest:
+    """
+    Static files fingerprinted with the hash of their content.
+
+    Each file of the static folder is copied to the build folder under a
+    name holding its content hash (styles.css -> styles.3f2a9c81d0e4.css),
+    next to its brotli (.br) and gzip (.gz) variants, compressed once at
+    the highest level. A changed file gets a new name, so the files can be
+    cached forever. Files already built are kept, so restarts only hash
+    the static folder.
+    """
+
+    def __init__(self, static_dir, build_dir):
+        """
+        Builds the fingerprinted files and their variants.
+
+        Parameters:
+        static_dir (str): The folder of the static files.
+        build_dir (str): The folder of the built files.
+        """
+
+        self.build_dir = build_dir
+        self.names = {}
+        self._encodings = {}
+        for root, _, files in os.walk(static_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, static_dir)
+                self._build(filename.replace(os.sep, "/"), path)
+
+    def _build(self, filename, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(filename)
+        hashed = f"{stem}.{digest}{ext}"
+        target = os.path.join(self.build_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.exists(target):
+            _write(target, data)
+        encodings = []
+        for encoding, suffix in ENCODINGS:
+            if not os.path.exists(target + suffix):
+                compressed = _compress(data, encoding)
+                # Tiny files do not shrink: they are only served as is.
+                if compressed is None or len(compressed) >= len(data):
+                    continue
+                _write(target + suffix, compressed)
+            encodings.append(encoding)
+        self.names[filename] = hashed
+        self._encodings[hashed] = tuple(encodings)
+
+    def variant(self, hashed, accepted):
+        """
+        Returns the best variant of a fingerprinted file for a client.
+
+        Parameters:
+        hashed (str): The fingerprinted name of the file.
+        accepted (set): The content encodings accepted by the client.
+
+        Returns:
+        tuple: The path of the variant and its content encoding (None for
+        the file as is), or None if the file is unknown.
+        """
+
+        encodings = self._encodings.get(hashed)
+        if encodings is None:
+            return None
+        path = os.path.join(self.build_dir, hashed)
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings and encoding in accepted:
+                return path + suffix, encoding
+        return path, None
+
+    @staticmethod
+    def mimetype(hashed):
+        return mimetypes.guess_type(hashed)[0] or "application/octet-stream"
+
+
+def create_assets(config, static_dir):
+    """
+    Builds the fingerprinted static files if the configuration enables them.
+
+    Parameters:
+    config (dict): The application configuration.
+    static_dir (str): The folder of the static files.
+
+    Returns:
+    AssetManifest: The built files, or None when STATIC_BUILD_DIR is None.
+    """
+
+    if not config["STATIC_BUILD_DIR"]:
+        return None
+    # send_file resolves relative paths from the application folder.
+    build_dir = os.path.abspath(config["STATIC_BUILD_DIR"])
+    return AssetManifest(static_dir, build_dir)
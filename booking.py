@@ -0,0 +1,261 @@
+import threading
+import zlib
+
+from ledger import ReservationLedger
+from metrics import timed
+
+MAX_PLACES_PER_COMPETITION = 12
+
+# Rejection reason -> (flash message, HTTP status code)
+REJECTIONS = {
+    "cap_reached": (
+        "You have already booked 12 places for this competition.",
+        403,
+    ),
+    "points": ("You don't have enough points.", 403),
+    "sold_out": (
+        "Not enough places available, you are trying to book more than the remaining places.",
+        409,
+    ),
+    "negative": ("You can't book a negative number of places.", 400),
+    "over_cap": ("You can't book more than 12 places in a competition.", 403),
+    "cap_total": (
+        "You can't book more than 12 places for this competition.",
+        200,
+    ),
+    "past": ("Error: can not purchase a place for past competitions", 400),
+}
+
+
+class BookingError(Exception):
+    """
+    Raised when a booking breaks one of the booking rules.
+
+    Attributes:
+    reason (str): The rejection reason, a key of REJECTIONS.
+    message (str): The message shown to the user.
+    status_code (int): The HTTP status code of the response.
+    competition (str): The competition of the rejected booking, in a batch.
+    """
+
+    def __init__(self, reason, competition=None):
+        self.reason = reason
+        self.competition = competition
+        self.message, self.status_code = REJECTIONS[reason]
+        super().__init__(self.message)
+
+
+class StripedLock:
+    """
+    Fixed pool of locks shared by hashing keys onto them.
+
+    Bookings lock the stripes of their competition and of their club, so
+    bookings on independent competitions by different clubs run in
+    parallel while memory stays bounded whatever the number of keys.
+    """
+
+    def __init__(self, stripes=64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _index(self, key):
+        return zlib.crc32(key.encode("utf-8")) % len(self._locks)
+
+    def hold(self, *keys):
+        """
+        Returns a context manager holding the stripes of all the keys.
+
+        Stripes are always acquired in ascending order, which rules out
+        deadlocks between bookings locking overlapping stripes.
+
+        Parameters:
+        *keys (str): The keys to lock.
+
+        Returns:
+        _HeldStripes: The context manager.
+        """
+
+        indexes = sorted({self._index(key) for key in keys})
+        return _HeldStripes([self._locks[i] for i in indexes])
+
+    def hold_all(self):
+        """
+        Returns a context manager holding every stripe, which pauses all
+        bookings.
+
+        Returns:
+        _HeldStripes: The context manager.
+        """
+
+        return _HeldStripes(self._locks)
+
+
+class _HeldStripes:
+    def __init__(self, locks):
+        self._locks = locks
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+def check_booking(club, competition, places, ledger):
+    """
+    Checks a booking against the booking rules.
+
+    The 12 places cap applies to each club in each competition.
+
+    Parameters:
+    club (dict): The booking club.
+    competition (dict): The competition.
+    places (int): The number of places requested.
+    ledger (ReservationLedger): The places already reserved.
+
+    Raises:
+    BookingError: If the booking is not allowed.
+    """
+
+    already_reserved = ledger.held(club["name"], competition["name"])
+    if already_reserved == MAX_PLACES_PER_COMPETITION:
+        raise BookingError("cap_reached")
+    if places > club["points"]:
+        raise BookingError("points")
+    if places > competition["numberOfPlaces"]:
+        raise BookingError("sold_out")
+    if places < 0:
+        raise BookingError("negative")
+    if places > MAX_PLACES_PER_COMPETITION:
+        raise BookingError("over_cap")
+    if already_reserved + places > MAX_PLACES_PER_COMPETITION:
+        raise BookingError("cap_total")
+
+
+def check_upcoming(competition_date, now):
+    """
+    Checks that a competition has not started yet.
+
+    Parameters:
+    competition_date (datetime): The date of the competition.
+    now (datetime): The current date.
+
+    Raises:
+    BookingError: If the competition is in the past.
+    """
+
+    if competition_date < now:
+        raise BookingError("past")
+
+
+def apply_booking(club, competition, places, ledger):
+    ledger.add(club["name"], competition["name"], places)
+    competition["numberOfPlaces"] -= places
+    club["points"] -= places
+
+
+def book_places(club, competition, places, ledger, locks, journal=None):
+    """
+    Atomically checks and applies a booking.
+
+    The rules are checked and the booking applied while holding the
+    stripes of the competition and of the club, so concurrent bookings can
+    neither oversell a competition nor spend the same points twice.
+
+    Parameters:
+    club (dict): The booking club.
+    competition (dict): The competition.
+    places (int): The number of places requested.
+    ledger (ReservationLedger): The places already reserved.
+    locks (StripedLock): The booking locks.
+    journal (BookingJournal): The journal recording the booking, if any.
+
+    Raises:
+    BookingError: If the booking is not allowed.
+    """
+
+    with locks.hold(
+        f"competition:{competition['name']}", f"club:{club['name']}"
+    ):
+        with timed("validation"):
+            check_booking(club, competition, places, ledger)
+
+        def apply():
+            apply_booking(club, competition, places, ledger)
+
+        with timed("mutation"):
+            if journal is not None:
+                journal.record(
+                    club["name"], competition["name"], places, apply
+                )
+            else:
+                apply()
+
+
+def book_many(club, bookings, ledger, locks, journal=None):
+    """
+    Atomically checks and applies several bookings of a club.
+
+    Every booking is checked against the state left by the previous ones
+    of the batch, on copies of the records. Only if they all pass are
+    they applied, and journaled as a single event, so a batch is applied
+    entirely or not at all.
+
+    Parameters:
+    club (dict): The booking club.
+    bookings (list): The (competition, places) pairs to book.
+    ledger (ReservationLedger): The places already reserved.
+    locks (StripedLock): The booking locks.
+    journal (BookingJournal): The journal recording the bookings, if any.
+
+    Raises:
+    BookingError: If one of the bookings is not allowed. Its
+    `competition` attribute names the competition of that booking.
+    """
+
+    keys = [f"club:{club['name']}"]
+    keys += [f"competition:{c['name']}" for c, _ in bookings]
+    with locks.hold(*keys):
+        with timed("validation"):
+            trial_club = dict(club)
+            trial_competitions = {}
+            trial_ledger = ReservationLedger()
+            for competition, places in bookings:
+                name = competition["name"]
+                if name not in trial_competitions:
+                    trial_competitions[name] = dict(competition)
+                    trial_ledger.add(
+                        club["name"], name, ledger.held(club["name"], name)
+                    )
+                try:
+                    check_booking(
+                        trial_club,
+                        trial_competitions[name],
+                        places,
+                        trial_ledger,
+                    )
+                except BookingError as error:
+                    error.competition = name
+                    raise
+                apply_booking(
+                    trial_club,
+                    trial_competitions[name],
+                    places,
+                    trial_ledger,
+                )
+
+        def apply():
+            for competition, places in bookings:
+                apply_booking(club, competition, places, ledger)
+
+        with timed("mutation"):
+            if journal is not None:
+                journal.record_batch(
+                    club["name"],
+                    [(c["name"], places) for c, places in bookings],
+                    apply,
+                )
+            else:
+                apply()
@@ -1,10 +1,85 @@
+import os
+
+
 class Config:
     TESTING = False
     DEBUG = False
-    SECRET_KEY = "your_secret_key"
+    # Signe le cookie de session (club connecté) : obligatoire quand
+    # LOGIN_REQUIRED est actif, le serveur refuse sinon de démarrer
+    SECRET_KEY = os.environ.get("GUDLFT_SECRET_KEY")
+    SESSION_COOKIE_SAMESITE = "Lax"
+    # Les pages de réservation exigent une connexion ; le club de la
+    # session remplace celui de l'URL ou du champ caché du formulaire
+    LOGIN_REQUIRED = True
+    # Fichiers statiques empreintés (hash du contenu) et précompressés
+    # (.br, .gz) au démarrage dans STATIC_BUILD_DIR, servis sous /assets
+    # avec un cache immuable (None pour servir static/ directement)
+    STATIC_BUILD_DIR = "static_build"
+    ASSETS_MAX_AGE = 31536000
+    # "memory" (un seul processus) ou "sqlite" (plusieurs workers)
+    STORAGE_BACKEND = "memory"
+    SQLITE_PATH = "gudlft.sqlite3"
+    # Journal des réservations (None pour le désactiver)
+    JOURNAL_PATH = "bookings.journal"
+    JOURNAL_FSYNC_EVERY = 8
+    JOURNAL_COMPACT_EVERY = 1000
+    # Écriture différée, sans journal : l'état modifié est écrit sur disque
+    # (fichier temporaire puis renommage) au plus une fois par intervalle,
+    # en secondes (0 pour désactiver). Avec le journal, les fichiers sont
+    # écrits par sa compaction (JOURNAL_COMPACT_EVERY)
+    FLUSH_INTERVAL = 5
+    # Rechargement à chaud : clubs.json et competitions.json sont surveillés
+    # toutes les HOT_RELOAD_INTERVAL secondes et leurs modifications
+    # fusionnées sans redémarrage (backend mémoire, 0 pour désactiver)
+    HOT_RELOAD_INTERVAL = 2
+    # Snapshot binaire (msgpack) chargé en priorité au démarrage
+    # (None pour le désactiver)
+    SNAPSHOT_PATH = "state.msgpack"
+    BOOKING_LOCK_STRIPES = 64
+    POINTS_BOARD_PAGE_SIZE = 50
+    POINTS_BOARD_MAX_PAGE_SIZE = 500
+    FRAGMENT_CACHE_SIZE = 10000
+    BATCH_BOOKING_MAX_SIZE = 50
+    # Réponses des réservations gardées par clé d'idempotence : nombre
+    # maximal de clés et durée de conservation (secondes), et attente
+    # maximale d'une requête rejouée pendant que l'originale tourne
+    IDEMPOTENCY_CACHE_SIZE = 10000
+    IDEMPOTENCY_TTL = 86400
+    IDEMPOTENCY_WAIT_TIMEOUT = 10
+    # Limitation des réservations par club et par adresse IP (jetons par
+    # seconde, 0 pour désactiver, et rafale autorisée), nombre maximal de
+    # clés suivies
+    RATE_LIMIT_CLUB_RATE = 2
+    RATE_LIMIT_CLUB_BURST = 10
+    RATE_LIMIT_IP_RATE = 0
+    RATE_LIMIT_IP_BURST = 20
+    RATE_LIMIT_MAX_KEYS = 100000
+    # Compétitions dont les réservations passent par une file d'attente
+    # (appliquées dans l'ordre d'arrivée), taille maximale de chaque file
+    # et nombre de résultats gardés pour les clients qui interrogent
+    WAITING_ROOM_COMPETITIONS = []
+    WAITING_ROOM_SIZE = 1000
+    WAITING_ROOM_KEEP = 10000
+    # Délai (secondes) entre deux rafraîchissements de la page d'attente
+    WAITING_ROOM_REFRESH = 1
+    # Profilage cProfile d'une requête sur N (0 pour désactiver), et des
+    # requêtes portant l'en-tête PROFILE_HEADER (None pour désactiver)
+    PROFILE_SAMPLE_EVERY = 0
+    PROFILE_HEADER = None
+    PROFILE_DIR = "profiles"
+    PROFILE_DUMP_INTERVAL = 60
+    PROFILE_KEEP = 10
 
 
 class TestConfig(Config):
     TESTING = True
     DEBUG = True
     WTF_CSRF_ENABLED = False  # Désactive CSRF pour les tests, si nécessaire
+    JOURNAL_PATH = None
+    SNAPSHOT_PATH = None
+    RATE_LIMIT_CLUB_RATE = 0
+    FLUSH_INTERVAL = 0
+    HOT_RELOAD_INTERVAL = 0
+    LOGIN_REQUIRED = False
+    SECRET_KEY = "test-secret-key"
+    STATIC_BUILD_DIR = None
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from metrics import FLUSH_DURATION, FLUSH_FAILURES, FLUSH_LAG
+
+
+class WriteBehindFlusher:
+    """
+    Writes the changed state to disk in the background, once per interval.
+
+    Bookings only mark their club and competition dirty, which costs a
+    set insertion on the request thread. A worker thread wakes up every
+    `interval` seconds and, if anything is dirty, runs a single flush for
+    all the bookings made since the previous one. A failed flush leaves
+    the records dirty, so the next one retries them.
+    """
+
+    def __init__(self, flush, interval):
+        """
+        Starts the worker.
+
+        Parameters:
+        flush (callable): Writes the current state to disk.
+        interval (float): Seconds between two flushes.
+        """
+
+        self.flush = flush
+        self.interval = interval
+        self._clubs = set()
+        self._competitions = set()
+        # perf_counter() of the oldest change not on disk yet.
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(
+            target=self._run, name="write-behind-flusher", daemon=True
+        )
+        self._worker.start()
+
+    def mark_dirty(self, club_name, *competition_names):
+        """
+        Records that a club and competitions changed.
+
+        Parameters:
+        club_name (str): The name of the club.
+        *competition_names (str): The names of the competitions.
+        """
+
+        with self._lock:
+            self._clubs.add(club_name)
+            self._competitions.update(competition_names)
+            if self._oldest is None:
+                self._oldest = time.perf_counter()
+
+    def pending(self):
+        """
+        Returns:
+        tuple: The numbers of dirty clubs and competitions.
+        """
+
+        with self._lock:
+            return len(self._clubs), len(self._competitions)
+
+    def flush_now(self):
+        """
+        Flushes the state if anything is dirty.
+
+        Returns:
+        bool: True if a flush ran and succeeded.
+        """
+
+        with self._lock:
+            if self._oldest is None:
+                return False
+            clubs, self._clubs = self._clubs, set()
+            competitions, self._competitions = self._competitions, set()
+            oldest, self._oldest = self._oldest, None
+        start = time.perf_counter()
+        try:
+            self.flush()
+        except Exception:
+            FLUSH_FAILURES.inc()
+            with self._lock:
+                self._clubs |= clubs
+                self._competitions |= competitions
+                self._oldest = min(oldest, self._oldest or oldest)
+            return False
+        end = time.perf_counter()
+        FLUSH_DURATION.observe(end - start)
+        FLUSH_LAG.observe(end - oldest)
+        return True
+
+    def close(self):
+        """
+        Stops the worker and flushes what is still dirty.
+        """
+
+        self._stop.set()
+        self._worker.join()
+        self.flush_now()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush_now()
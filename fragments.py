@@ -0,0 +1,65 @@
+import threading
+
+from metrics import FRAGMENT_LOOKUPS
+
+
+class FragmentCache:
+    """
+    Cache of rendered HTML fragments, one per record.
+
+    Each entry remembers the version of the record it was rendered from.
+    A lookup whose version differs from the cached one is a miss and
+    re-renders the fragment, so entries are invalidated exactly when the
+    rendered fields of a record change and never otherwise. Hits and
+    misses are also counted in /metrics, labelled with the cache name.
+    """
+
+    def __init__(self, maxsize=10000, name="fragments"):
+        """
+        Creates an empty cache.
+
+        Parameters:
+        maxsize (int): Maximum number of fragments kept.
+        name (str): The name of the cache in the metrics.
+        """
+
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, version, render):
+        """
+        Returns the fragment of a record, rendering it on a miss.
+
+        Parameters:
+        key (str): The key of the record.
+        version (tuple): The rendered fields of the record.
+        render (callable): Renders the fragment.
+
+        Returns:
+        str: The fragment.
+        """
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            with self._lock:
+                self.hits += 1
+            FRAGMENT_LOOKUPS.inc(self.name, "hit")
+            return entry[1]
+
+        fragment = render()
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                # Drop the oldest fragment; dicts keep insertion order.
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (version, fragment)
+        FRAGMENT_LOOKUPS.inc(self.name, "miss")
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
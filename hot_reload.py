@@ -0,0 +1,212 @@
+import os
+import threading
+
+from json_stream import iter_snapshot
+from metrics import DATA_RELOADS
+from records import Club, Competition
+from utils import parse_date
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _competition_values(competition):
+    return competition["date"], int(competition["numberOfPlaces"])
+
+
+def _club_values(club):
+    return club["email"], int(club["points"])
+
+
+_VALUES = {"competitions": _competition_values, "clubs": _club_values}
+
+
+def snapshot_base(competitions, clubs):
+    """
+    Returns the values of the records, as stored in the snapshots.
+
+    Parameters:
+    competitions (list): List of competitions data.
+    clubs (list): List of clubs data.
+
+    Returns:
+    dict: Per kind of record, the values of each record by name.
+    """
+
+    return {
+        "competitions": {
+            c["name"]: _competition_values(c) for c in competitions
+        },
+        "clubs": {c["name"]: _club_values(c) for c in clubs},
+    }
+
+
+class DataWatcher:
+    """
+    Merges the edits of the JSON snapshots into the live memory state.
+
+    The files are polled every `interval` seconds by modification time
+    and size. An edited file is compared with the values it held when
+    this process last loaded or wrote it (the base), and only the records
+    whose values changed are merged, through the indexes, which are never
+    rebuilt. Counters are merged as differences: setting the places of a
+    competition from 20 to 30 in the file adds 10 places to the live
+    count, so the bookings made since the base are kept. Reservations are
+    never touched.
+
+    The snapshot writes of this process go through `own_write`, which
+    merges the pending edits first and takes the written values as the
+    new base, so they are not read back as edits.
+    """
+
+    def __init__(self, storage, competitions_file, clubs_file, interval, base):
+        """
+        Starts polling the files.
+
+        Parameters:
+        storage (MemoryStorage): The live state.
+        competitions_file (str): The competitions snapshot file.
+        clubs_file (str): The clubs snapshot file.
+        interval (float): Seconds between two polls.
+        base (dict): The values of the files, from `snapshot_base`.
+        """
+
+        self.storage = storage
+        self.files = {"competitions": competitions_file, "clubs": clubs_file}
+        self.interval = interval
+        self._base = base
+        self._stats = {kind: _stat(path) for kind, path in self.files.items()}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(
+            target=self._run, name="data-watcher", daemon=True
+        )
+        self._worker.start()
+
+    def check(self):
+        """
+        Merges the files edited since the previous check.
+
+        Returns:
+        int: The number of records added, removed or changed.
+        """
+
+        with self._lock:
+            return self._check()
+
+    def own_write(self, write):
+        """
+        Runs a write of the snapshots by this process.
+
+        Parameters:
+        write (callable): Writes the snapshots and returns the written
+        (competitions, clubs).
+
+        Returns:
+        tuple: The written competitions and clubs.
+        """
+
+        with self._lock:
+            self._check()
+            competitions, clubs = write()
+            self._base = snapshot_base(competitions, clubs)
+            self._stats = {
+                kind: _stat(path) for kind, path in self.files.items()
+            }
+            return competitions, clubs
+
+    def close(self):
+        self._stop.set()
+        self._worker.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def _check(self):
+        changed = 0
+        for kind, path in self.files.items():
+            stat = _stat(path)
+            if stat is None or stat == self._stats[kind]:
+                continue
+            # An invalid file (saved halfway through an edit, say) is
+            # skipped until it changes again.
+            self._stats[kind] = stat
+            try:
+                values, added = self._read(kind, path)
+            except (OSError, ValueError, KeyError, TypeError):
+                DATA_RELOADS.inc(kind, "invalid")
+                continue
+            changed += self._merge(kind, values, added)
+            DATA_RELOADS.inc(kind, "merged")
+        if changed:
+            self.storage.bump_version()
+        return changed
+
+    def _read(self, kind, path):
+        # Only the records missing from the base are kept whole, and the
+        # file is validated before anything is merged.
+        base = self._base[kind]
+        to_values = _VALUES[kind]
+        values = {}
+        added = {}
+        for record in iter_snapshot(path, kind):
+            name = record["name"]
+            new = values[name] = to_values(record)
+            old = base.get(name)
+            if old is None:
+                added[name] = record
+            if kind == "competitions" and (old is None or old[0] != new[0]):
+                parse_date(new[0])
+        return values, added
+
+    def _merge(self, kind, values, added):
+        base = self._base[kind]
+        removed = [name for name in base if name not in values]
+        updated = [
+            (name, base[name], new)
+            for name, new in values.items()
+            if name in base and base[name] != new
+        ]
+        storage = self.storage
+        registry = storage.registry
+        with storage.locks.hold_all():
+            if kind == "competitions":
+                for name in removed:
+                    registry.remove_competition(name)
+                    storage.schedule.remove(name)
+                for record in added.values():
+                    competition = Competition.from_dict(record)
+                    registry.add_competition(competition)
+                    storage.schedule.add(competition)
+                for name, (old_date, old_places), (date, places) in updated:
+                    competition = registry.competition_by_name(name)
+                    if competition is None:
+                        continue
+                    if date != old_date:
+                        competition["date"] = date
+                        storage.schedule.add(competition)
+                    competition["numberOfPlaces"] += places - old_places
+            else:
+                for name in removed:
+                    registry.remove_club(name)
+                    storage.leaderboard.remove(name)
+                for record in added.values():
+                    club = Club.from_dict(record)
+                    registry.add_club(club)
+                    storage.leaderboard.update(club)
+                for name, (old_email, old_points), (email, points) in updated:
+                    club = registry.club_by_name(name)
+                    if club is None:
+                        continue
+                    if email != old_email:
+                        registry.update_club(name, email=email)
+                    club["points"] += points - old_points
+                    storage.leaderboard.update(club)
+        self._base[kind] = values
+        return len(removed) + len(added) + len(updated)
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class IdempotencyMismatch(Exception):
+    """
+    Raised when an idempotency key is reused for a different request.
+    """
+
+
+class IdempotencyInProgress(Exception):
+    """
+    Raised when the request holding an idempotency key is still running
+    after the wait for its outcome.
+    """
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "outcome", "expires", "done")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.outcome = None
+        # Requests in flight never expire.
+        self.expires = float("inf")
+        self.done = threading.Event()
+
+
+class IdempotencyCache:
+    """
+    Outcomes of requests, by idempotency key, for a limited time.
+
+    The first request with a key runs; the requests arriving with the same
+    key while it runs wait for its outcome, at most `wait_timeout`
+    seconds, and the later ones get it straight from the cache, so a
+    retried booking is applied only once. Entries expire `ttl` seconds
+    after their request completed, and the least recently used completed
+    ones are dropped beyond `maxsize` entries: a key in flight is kept, or
+    its retries would run again.
+    """
+
+    def __init__(
+        self,
+        maxsize=10000,
+        ttl=86400.0,
+        wait_timeout=10.0,
+        clock=time.monotonic,
+    ):
+        """
+        Creates an empty cache.
+
+        Parameters:
+        maxsize (int): Maximum number of keys kept.
+        ttl (float): Seconds an outcome is kept once known.
+        wait_timeout (float): Seconds a request waits for the outcome of
+        the request running with its key.
+        clock (callable): Returns the current time, in seconds.
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _claim(self, key, fingerprint):
+        # Returns the entry of the key, and whether the caller must run it.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, False
+            entry = self._entries[key] = _Entry(fingerprint)
+            if len(self._entries) > self.maxsize:
+                self._evict()
+            return entry, True
+
+    def _evict(self):
+        # Drops the least recently used completed entry. Only requests in
+        # flight are skipped, so the cache outgrows `maxsize` by at most
+        # the number of concurrent requests.
+        for key, entry in self._entries.items():
+            if entry.done.is_set():
+                del self._entries[key]
+                return
+
+    def run(self, key, fingerprint, func):
+        """
+        Runs `func` once per key and returns its outcome.
+
+        A call raising an exception records nothing: the requests waiting
+        for it run again, one of them in its place.
+
+        Parameters:
+        key (str): The idempotency key.
+        fingerprint (tuple): Identifies the request made with the key.
+        func (callable): Computes the outcome.
+
+        Returns:
+        tuple: The outcome, and True if it is replayed from the cache.
+
+        Raises:
+        IdempotencyMismatch: If the key was used for another request.
+        IdempotencyInProgress: If the request running with the key did
+        not complete within `wait_timeout` seconds.
+        """
+
+        while True:
+            entry, owner = self._claim(key, fingerprint)
+            if not owner:
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyMismatch(key)
+                if not entry.done.wait(self.wait_timeout):
+                    raise IdempotencyInProgress(key)
+                if entry.outcome is not None:
+                    return entry.outcome, True
+                continue
+            try:
+                outcome = func()
+            except BaseException:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                entry.done.set()
+                raise
+            entry.outcome = outcome
+            entry.expires = self._clock() + self.ttl
+            entry.done.set()
+            return outcome, False
@@ -0,0 +1,385 @@
+import json
+import os
+import threading
+
+from booking import StripedLock
+from snapshot import write_binary_snapshot
+from utils import CLUBS_FILE, COMPETITIONS_FILE, write_snapshot
+
+
+class BookingJournal:
+    """
+    Append-only, line-delimited JSON log of booking events.
+
+    Each booking costs one small append instead of a full rewrite of
+    clubs.json and competitions.json. Appends are flushed to the OS right
+    away and fsync'd every `fsync_every` events (group commit). Every
+    `compact_every` events, a background thread folds the current state
+    into the JSON snapshots and drops the events they now contain; the
+    events left are folded when the journal is closed. A compaction with
+    no new event since the previous one writes nothing.
+
+    Events carry a sequence number and each snapshot records the last
+    sequence number it includes, so a crash at any point of a compaction
+    never applies an event twice on replay.
+
+    The journal lock is only held to number and write an event: the
+    fsync runs outside of it, one thread syncing for all the events
+    written meanwhile, and the event is applied under the booking stripes
+    held by the caller. Compactions hold every stripe to copy the state,
+    so the copy holds exactly the events up to its sequence number.
+    """
+
+    def __init__(
+        self,
+        path,
+        state,
+        fsync_every=1,
+        compact_every=0,
+        clubs_file=CLUBS_FILE,
+        competitions_file=COMPETITIONS_FILE,
+        start_seq=0,
+        binary_file=None,
+        snapshot_writer=None,
+        locks=None,
+    ):
+        """
+        Opens the journal for appending.
+
+        Parameters:
+        path (str): The path of the journal file.
+        state (callable): Returns the live (competitions, clubs, ledger) state.
+        fsync_every (int): Number of events per fsync group.
+        compact_every (int): Number of events between compactions, 0 to
+        disable.
+        clubs_file (str): The clubs snapshot file.
+        competitions_file (str): The competitions snapshot file.
+        start_seq (int): Last sequence number recorded in the snapshots.
+        binary_file (str): The binary snapshot written after the JSON ones.
+        snapshot_writer (callable): Runs the writes of the snapshots, given
+        a function writing them; they run directly when None.
+        locks (StripedLock): The booking locks, held by the callers while
+        they record an event.
+        """
+
+        self.path = path
+        self.state = state
+        self.fsync_every = max(1, fsync_every)
+        self.compact_every = compact_every
+        self.clubs_file = clubs_file
+        self.competitions_file = competitions_file
+        self.binary_file = binary_file
+        self.snapshot_writer = snapshot_writer or _write_now
+        self.locks = locks or StripedLock(1)
+        self.lock = threading.RLock()
+        # Held by the thread running an fsync, and while the file changes.
+        self._sync_lock = threading.RLock()
+        truncate_torn_tail(path)
+        self.seq = max(start_seq, last_seq(path))
+        self._synced_seq = self.seq
+        self._compacted_seq = start_seq
+        self._file = open(path, "a", encoding="utf-8")
+        self._since_compaction = 0
+        self._compaction = None
+
+    def record(self, club_name, competition_name, places, apply):
+        """
+        Logs a booking event and applies it atomically.
+
+        The event is appended before `apply` runs. The caller holds the
+        stripes of the club and of the competition, so a compaction can
+        not take its snapshot in between.
+
+        Parameters:
+        club_name (str): The name of the booking club.
+        competition_name (str): The name of the competition.
+        places (int): The number of places booked.
+        apply (callable): Applies the booking to the in-memory state.
+        """
+
+        self._append(
+            {
+                "club": club_name,
+                "competition": competition_name,
+                "places": places,
+            },
+            apply,
+        )
+
+    def record_batch(self, club_name, bookings, apply):
+        """
+        Logs several bookings of a club as one event and applies them.
+
+        A batch is replayed entirely or not at all.
+
+        Parameters:
+        club_name (str): The name of the booking club.
+        bookings (list): The (competition name, places) pairs.
+        apply (callable): Applies the bookings to the in-memory state.
+        """
+
+        self._append(
+            {"club": club_name, "bookings": [list(b) for b in bookings]},
+            apply,
+        )
+
+    def _append(self, event, apply):
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+            event = {"seq": seq, **event}
+            self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._file.flush()
+            due = seq - self._synced_seq >= self.fsync_every
+        if due:
+            self._sync_to(seq)
+        apply()
+        with self.lock:
+            self._since_compaction += 1
+            due = (
+                self.compact_every
+                and self._since_compaction >= self.compact_every
+            )
+        if due:
+            self.compact_in_background()
+
+    def _sync_to(self, seq):
+        # Group commit: the first thread in syncs every event written so
+        # far; the threads waiting behind it find their event synced.
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self.lock:
+                target = self.seq
+            os.fsync(self._file.fileno())
+            self._synced_seq = max(self._synced_seq, target)
+
+    def sync(self):
+        """
+        Forces the pending events to stable storage.
+        """
+
+        with self.lock:
+            seq = self.seq
+        self._sync_to(seq)
+
+    def compact_in_background(self):
+        """
+        Starts a compaction thread unless one is already running.
+
+        Returns:
+        threading.Thread: The running compaction thread.
+        """
+
+        with self.lock:
+            if self._compaction is None or not self._compaction.is_alive():
+                self._since_compaction = 0
+                self._compaction = threading.Thread(
+                    target=self.compact, name="journal-compaction", daemon=True
+                )
+                self._compaction.start()
+            return self._compaction
+
+    def compact(self):
+        """
+        Folds the journal into the JSON snapshots.
+
+        The state is copied while bookings are paused, written to the
+        snapshots once they resume, then the events covered by the
+        snapshots are dropped from the journal.
+
+        Returns:
+        bool: False if the snapshots already held every event.
+        """
+
+        with self.lock:
+            if self.seq == self._compacted_seq:
+                return False
+        seq = None
+
+        def write():
+            nonlocal seq
+            with self.locks.hold_all(), self.lock:
+                competitions, clubs, ledger = self.state()
+                seq = self.seq
+                competitions = [dict(c) for c in competitions]
+                clubs = [dict(c) for c in clubs]
+                reservations = ledger.entries()
+            save_state(
+                self.competitions_file,
+                self.clubs_file,
+                self.binary_file,
+                competitions,
+                clubs,
+                reservations,
+                seq,
+            )
+            return competitions, clubs
+
+        self.snapshot_writer(write)
+
+        with self._sync_lock, self.lock:
+            self.sync()
+            self._file.close()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                for event in read_events(self.path):
+                    if event["seq"] > seq:
+                        out.write(
+                            json.dumps(event, separators=(",", ":")) + "\n"
+                        )
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._compacted_seq = seq
+        return True
+
+    def close(self):
+        """
+        Waits for a running compaction, folds the events left if the
+        journal is compacted, syncs and closes the journal.
+        """
+
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+        if self.compact_every:
+            self.compact()
+        with self._sync_lock, self.lock:
+            self.sync()
+            self._file.close()
+
+
+def _write_now(write):
+    return write()
+
+
+def save_state(
+    competitions_file,
+    clubs_file,
+    binary_file,
+    competitions,
+    clubs,
+    reservations,
+    seq=0,
+):
+    """
+    Atomically writes the state to the JSON snapshots, then to the binary
+    snapshot if any.
+
+    Parameters:
+    competitions_file (str): The competitions snapshot file.
+    clubs_file (str): The clubs snapshot file.
+    binary_file (str): The binary snapshot file, or None.
+    competitions (list): List of competitions data.
+    clubs (list): List of clubs data.
+    reservations (list): [club, competition, places] reserved places.
+    seq (int): Last journal event included in the state.
+    """
+
+    write_snapshot(
+        competitions_file,
+        "competitions",
+        competitions,
+        journalSeq=seq,
+        reservations=reservations,
+    )
+    write_snapshot(clubs_file, "clubs", clubs, journalSeq=seq)
+    if binary_file:
+        write_binary_snapshot(
+            binary_file,
+            competitions,
+            clubs,
+            reservations,
+            competitions_seq=seq,
+            clubs_seq=seq,
+            sources=(competitions_file, clubs_file),
+        )
+
+
+def read_events(path):
+    """
+    Yields the events stored in a journal file.
+
+    A torn last line, left by a crash in the middle of an append, is
+    ignored.
+
+    Parameters:
+    path (str): The path of the journal file.
+
+    Returns:
+    generator: The events, in append order.
+    """
+
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+def truncate_torn_tail(path):
+    """
+    Drops a partially written last line so new events start on a fresh line.
+
+    Parameters:
+    path (str): The path of the journal file.
+    """
+
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def last_seq(path):
+    seq = 0
+    for event in read_events(path):
+        seq = event["seq"]
+    return seq
+
+
+def replay(
+    path,
+    registry,
+    ledger,
+    competitions_seq=0,
+    clubs_seq=0,
+):
+    """
+    Applies the journal events missing from the snapshots.
+
+    Parameters:
+    path (str): The path of the journal file.
+    registry (Registry): The registry loaded from the snapshots.
+    ledger (ReservationLedger): The reserved places, updated in place.
+    competitions_seq (int): Last event included in the competitions snapshot.
+    clubs_seq (int): Last event included in the clubs snapshot.
+
+    Returns:
+    int: The number of events replayed.
+    """
+
+    count = 0
+    for event in read_events(path):
+        club = registry.club_by_name(event["club"])
+        bookings = event.get("bookings") or [
+            (event["competition"], event["places"])
+        ]
+        for competition_name, places in bookings:
+            competition = registry.competition_by_name(competition_name)
+            if event["seq"] > competitions_seq and competition is not None:
+                competition["numberOfPlaces"] = (
+                    int(competition["numberOfPlaces"]) - places
+                )
+                ledger.add(event["club"], competition_name, places)
+            if event["seq"] > clubs_seq and club is not None:
+                club["points"] = int(club["points"]) - places
+        count += 1
+    return count
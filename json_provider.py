@@ -0,0 +1,43 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library
+    orjson = None
+
+if orjson is not None:
+    # Dates are left to Flask's default (HTTP dates), as with the standard
+    # library, and non string keys are converted instead of refused.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider producing compact responses.
+
+    Uses orjson when it is installed, and the standard library with
+    compact separators otherwise. Both serialize the objects they do not
+    know (dates, decimals, dataclasses...) with Flask's default.
+    """
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(
+                obj, default=self.default, option=ORJSON_OPTIONS
+            ).decode("utf-8")
+        kwargs.setdefault("separators", (",", ":"))
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self.dumps(obj), mimetype="application/json"
+        )
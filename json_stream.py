@@ -0,0 +1,129 @@
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _StreamReader:
+    """
+    Reads JSON values one at a time from a file, through a small buffer.
+
+    Only the unread part of the current chunk and the value being decoded
+    are held in memory, never the whole document.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self._file = f
+        self._chunk_size = chunk_size
+        # json.load shares the key strings of all the objects of a
+        # document; decoding records one by one would allocate them again
+        # for every record, so keys are shared through this memo instead.
+        keys = {}
+        self._decoder = json.JSONDecoder(
+            object_pairs_hook=lambda pairs: {
+                keys.setdefault(k, k): v for k, v in pairs
+            }
+        )
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, "" at the end.
+        """
+
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}")
+        self._pos += 1
+
+    def value(self):
+        """
+        Decodes the next JSON value.
+
+        A value ending exactly at the end of the buffer may be cut (a
+        number, for instance), so it is decoded again with more data.
+        """
+
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_snapshot(path, key, meta=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the records stored under `key` in a JSON snapshot, one by one.
+
+    The other top-level entries are decoded into `meta`; they are read
+    once the generator is exhausted if they come after the records.
+
+    Parameters:
+    path (str): The path of the snapshot file.
+    key (str): The top-level key holding the list of records.
+    meta (dict): Receives the other top-level entries, if given.
+    chunk_size (int): Number of characters read at a time.
+
+    Returns:
+    generator: The records, in file order.
+    """
+
+    if meta is None:
+        meta = {}
+    with open(path) as f:
+        reader = _StreamReader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            raise KeyError(key)
+        found = False
+        while True:
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                found = True
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.peek() == "]":
+                            reader.expect("]")
+                            break
+                        reader.expect(",")
+            else:
+                meta[name] = reader.value()
+            if reader.peek() == "}":
+                break
+            reader.expect(",")
+    if not found:
+        raise KeyError(key)
@@ -0,0 +1,256 @@
+import random
+import threading
+from operator import itemgetter
+
+MAX_LEVELS = 32
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key, value, levels):
+        self.key = key
+        self.value = value
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class RankedSkipList:
+    """
+    Sorted collection with O(log N) insertion, removal and access by rank.
+
+    Each link stores how many entries it skips over, so the entry at any
+    rank is found by walking down the levels like a search by key.
+    """
+
+    def __init__(self):
+        self._head = _Node(None, None, MAX_LEVELS)
+        self._random = random.Random(0)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def from_sorted(cls, items):
+        """
+        Builds a list from (key, value) pairs already sorted by key.
+
+        Nodes are linked in a single pass instead of being searched for
+        one by one, which makes (re)building large lists O(N).
+
+        Parameters:
+        items (iterable): The (key, value) pairs, in key order.
+
+        Returns:
+        RankedSkipList: The list.
+        """
+
+        skip_list = cls()
+        last = [skip_list._head] * MAX_LEVELS
+        last_position = [0] * MAX_LEVELS
+        random_levels = skip_list._random_levels
+        position = 0
+        for key, value in items:
+            position += 1
+            node = _Node(key, value, random_levels())
+            for level in range(len(node.next)):
+                previous = last[level]
+                previous.next[level] = node
+                previous.width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(MAX_LEVELS):
+            last[level].width[level] = position + 1 - last_position[level]
+        skip_list.size = position
+        return skip_list
+
+    def _random_levels(self):
+        # One level more for each trailing 1 bit: P(levels > n) = 2 ** -n.
+        bits = self._random.getrandbits(MAX_LEVELS - 1)
+        return (~bits & (bits + 1)).bit_length()
+
+    def _node_at(self, rank):
+        node = self._head
+        remaining = rank + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and (
+                node.width[level] <= remaining
+            ):
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def insert(self, key, value):
+        """
+        Inserts a value under a key. Keys must be unique.
+
+        Parameters:
+        key (tuple): The sort key.
+        value (object): The stored value.
+        """
+
+        chain = [None] * MAX_LEVELS
+        steps_at_level = [0] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new_node = _Node(key, value, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        """
+        Removes the value stored under a key.
+
+        Parameters:
+        key (tuple): The sort key.
+
+        Raises:
+        KeyError: If the key is not stored.
+        """
+
+        chain = [None] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def slice(self, offset, limit):
+        """
+        Returns the values ranked from `offset` to `offset + limit`.
+
+        Parameters:
+        offset (int): The rank of the first value, from 0.
+        limit (int): The maximum number of values.
+
+        Returns:
+        list: The values, in rank order.
+        """
+
+        if offset >= self.size or limit <= 0:
+            return []
+        node = self._node_at(offset)
+        values = []
+        while node is not None and len(values) < limit:
+            values.append(node.value)
+            node = node.next[0]
+        return values
+
+
+class Leaderboard:
+    """
+    Clubs ranked by points, updated incrementally when points change.
+
+    Ties keep the order in which the clubs were first ranked, like a
+    stable sort of the clubs list. All methods are thread-safe.
+    """
+
+    def __init__(self, clubs=()):
+        self._lock = threading.Lock()
+        self.rebuild(clubs)
+
+    def __len__(self):
+        return len(self._ranking)
+
+    def rebuild(self, clubs):
+        """
+        Ranks the clubs from scratch.
+
+        Parameters:
+        clubs (list): List of clubs data.
+        """
+
+        with self._lock:
+            self._keys = keys = {}
+            self._order = order = {}
+            entries = []
+            for club in clubs:
+                name = club["name"]
+                key = (-club["points"], order.setdefault(name, len(order)))
+                keys[name] = key
+                entries.append((key, club))
+            # Sorted once, then linked in a single pass.
+            entries.sort(key=itemgetter(0))
+            self._ranking = RankedSkipList.from_sorted(entries)
+
+    def _key(self, club):
+        order = self._order.setdefault(club["name"], len(self._order))
+        key = (-club["points"], order)
+        self._keys[club["name"]] = key
+        return key
+
+    def _insert(self, club):
+        self._ranking.insert(self._key(club), club)
+
+    def update(self, club):
+        """
+        Moves a club to the rank matching its current points.
+
+        Unknown clubs are added.
+
+        Parameters:
+        club (dict): The club data.
+        """
+
+        with self._lock:
+            key = self._keys.get(club["name"])
+            if key is not None:
+                if key[0] == -club["points"]:
+                    return
+                self._ranking.remove(key)
+            self._insert(club)
+
+    def remove(self, club_name):
+        """
+        Removes a club from the ranking.
+
+        Parameters:
+        club_name (str): The name of the club.
+        """
+
+        with self._lock:
+            key = self._keys.pop(club_name, None)
+            if key is not None:
+                self._ranking.remove(key)
+
+    def page(self, offset, limit):
+        """
+        Returns the clubs ranked from `offset` to `offset + limit`.
+
+        Parameters:
+        offset (int): The rank of the first club, from 0.
+        limit (int): The maximum number of clubs.
+
+        Returns:
+        list: The clubs, best first.
+        """
+
+        with self._lock:
+            return self._ranking.slice(offset, limit)
@@ -0,0 +1,90 @@
+class ReservationLedger:
+    """
+    Places reserved by each club in each competition.
+
+    Only the (club, competition) pairs holding places are stored, in a
+    single dict keyed by the pair of names, so memory grows with the
+    bookings made and not with clubs x competitions. Totals per club and
+    per competition are kept up to date on every booking, so no question
+    asked to the ledger ever scans it.
+
+    Bookings update the ledger while holding the booking locks of their
+    club and of their competition, which serializes the updates of every
+    key of the three dicts.
+    """
+
+    __slots__ = ("_places", "_club_totals", "_competition_totals")
+
+    def __init__(self, entries=()):
+        """
+        Parameters:
+        entries (iterable): (club name, competition name, places) triples.
+        """
+
+        self._places = {}
+        self._club_totals = {}
+        self._competition_totals = {}
+        for club_name, competition_name, places in entries:
+            self.add(club_name, competition_name, places)
+
+    def __len__(self):
+        return len(self._places)
+
+    def __eq__(self, other):
+        if not isinstance(other, ReservationLedger):
+            return NotImplemented
+        return self._places == other._places
+
+    def held(self, club_name, competition_name):
+        """
+        Returns the places a club holds in a competition.
+
+        Parameters:
+        club_name (str): The name of the club.
+        competition_name (str): The name of the competition.
+
+        Returns:
+        int: The number of places.
+        """
+
+        return self._places.get((club_name, competition_name), 0)
+
+    def club_total(self, club_name):
+        return self._club_totals.get(club_name, 0)
+
+    def competition_total(self, competition_name):
+        return self._competition_totals.get(competition_name, 0)
+
+    def add(self, club_name, competition_name, places):
+        """
+        Records places booked by a club in a competition.
+
+        Parameters:
+        club_name (str): The name of the club.
+        competition_name (str): The name of the competition.
+        places (int): The number of places booked.
+        """
+
+        if not places:
+            return
+        key = (club_name, competition_name)
+        self._places[key] = self._places.get(key, 0) + places
+        self._club_totals[club_name] = (
+            self._club_totals.get(club_name, 0) + places
+        )
+        self._competition_totals[competition_name] = (
+            self._competition_totals.get(competition_name, 0) + places
+        )
+
+    def entries(self):
+        """
+        Returns the reservations, to be stored in a snapshot.
+
+        Returns:
+        list: [club name, competition name, places] lists.
+        """
+
+        return [
+            [club, competition, places]
+            for (club, competition), places in self._places.items()
+        ]
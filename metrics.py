@@ -0,0 +1,312 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+# Upper bounds of the latency buckets, in seconds.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# Endpoint of the request being served, set by the application.
+current_endpoint = ContextVar("current_endpoint", default="none")
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """
+    Monotonic counter, one value per combination of label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        """
+        Increments the counter of the given label values.
+
+        Parameters:
+        *labelvalues (str): One value per label name, in order.
+        amount (int): The increment.
+        """
+
+        with self._lock:
+            self._values[labelvalues] = (
+                self._values.get(labelvalues, 0) + amount
+            )
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield self.name + _labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, one per
+    combination of label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        """
+        Records an observed value.
+
+        Parameters:
+        value (float): The observed value.
+        *labelvalues (str): One value per label name, in order.
+        """
+
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                # Per bucket counts (the last one is +Inf), sum, count.
+                state = self._values[labelvalues] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                    0,
+                ]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *labelvalues):
+        """
+        Observes the duration of a `with` block, in seconds.
+
+        Parameters:
+        *labelvalues (str): One value per label name, in order.
+
+        Returns:
+        _Timer: The context manager timing the block.
+        """
+
+        return _Timer(self, labelvalues)
+
+    def count(self, *labelvalues):
+        state = self._values.get(labelvalues)
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted(
+                (k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()
+            )
+        for labelvalues, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets + (float("inf"),), counts
+            ):
+                cumulative += bucket_count
+                labels = _labels(
+                    self.labelnames, labelvalues, [("le", _number(bound))]
+                )
+                yield f"{self.name}_bucket{labels}", cumulative
+            labels = _labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels}", total
+            yield f"{self.name}_count{labels}", count
+
+
+class _Timer:
+    # A plain class: timers wrap every lookup, and a generator based
+    # context manager costs several times more.
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.start, *self.labelvalues)
+
+
+class MetricsRegistry:
+    """
+    The metrics of the process, exposed in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def expose(self):
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+        str: The exposition text.
+        """
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.register(
+    Counter(
+        "gudlft_requests_total",
+        "Requests served, per endpoint, method and status code.",
+        ("endpoint", "method", "status"),
+    )
+)
+REQUEST_LATENCY = REGISTRY.register(
+    Histogram(
+        "gudlft_request_duration_seconds",
+        "Time spent serving requests, per endpoint.",
+        ("endpoint",),
+    )
+)
+PHASE_LATENCY = REGISTRY.register(
+    Histogram(
+        "gudlft_phase_duration_seconds",
+        "Time spent in lookup, validation, mutation and render phases.",
+        ("endpoint", "phase"),
+    )
+)
+BOOKING_REJECTIONS = REGISTRY.register(
+    Counter(
+        "gudlft_booking_rejections_total",
+        "Rejected bookings, per rejection reason.",
+        ("reason",),
+    )
+)
+IDEMPOTENT_REPLAYS = REGISTRY.register(
+    Counter(
+        "gudlft_idempotent_replays_total",
+        "Booking requests answered from the idempotency cache.",
+        ("endpoint",),
+    )
+)
+RATE_LIMITED = REGISTRY.register(
+    Counter(
+        "gudlft_rate_limited_total",
+        "Requests refused by the rate limiters, per endpoint and scope.",
+        ("endpoint", "scope"),
+    )
+)
+WAITING_ROOM_WAIT = REGISTRY.register(
+    Histogram(
+        "gudlft_waiting_room_wait_seconds",
+        "Time from queuing a booking to its outcome, per competition.",
+        ("competition",),
+        DEFAULT_BUCKETS + (10.0, 30.0, 60.0),
+    )
+)
+FLUSH_DURATION = REGISTRY.register(
+    Histogram(
+        "gudlft_flush_duration_seconds",
+        "Time spent writing the state to disk, per write-behind flush.",
+    )
+)
+FLUSH_LAG = REGISTRY.register(
+    Histogram(
+        "gudlft_flush_lag_seconds",
+        "Age of the oldest change written by a write-behind flush.",
+        buckets=DEFAULT_BUCKETS + (10.0, 30.0, 60.0),
+    )
+)
+FLUSH_FAILURES = REGISTRY.register(
+    Counter(
+        "gudlft_flush_failures_total",
+        "Write-behind flushes that failed and will be retried.",
+    )
+)
+FRAGMENT_LOOKUPS = REGISTRY.register(
+    Counter(
+        "gudlft_fragment_cache_lookups_total",
+        "Rendered fragment lookups, per cache and result (hit or miss).",
+        ("cache", "result"),
+    )
+)
+
+DATA_RELOADS = REGISTRY.register(
+    Counter(
+        "gudlft_data_reloads_total",
+        "Edits of the JSON snapshots merged or skipped as invalid.",
+        ("file", "result"),
+    )
+)
+
+
+def timed(phase):
+    """
+    Times a phase of the current request.
+
+    Parameters:
+    phase (str): "lookup", "validation", "mutation" or "render".
+
+    Returns:
+    _Timer: Observes the duration of the `with` block.
+    """
+
+    return PHASE_LATENCY.time(current_endpoint.get(), phase)
@@ -0,0 +1,156 @@
+import cProfile
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request
+
+
+class RequestProfiler:
+    """
+    Profiles a sample of the live requests with cProfile.
+
+    One request in `sample_every`, and every request carrying the
+    `header`, is profiled. Profiles are aggregated per endpoint and dumped
+    to pstats files every `dump_interval` seconds, keeping the `keep` most
+    recent files of each endpoint. A single request is profiled at a
+    time: requests arriving meanwhile are served without profiling.
+    """
+
+    def __init__(
+        self,
+        directory,
+        sample_every=0,
+        header=None,
+        dump_interval=60.0,
+        keep=10,
+    ):
+        """
+        Parameters:
+        directory (str): The directory of the pstats files.
+        sample_every (int): Profile one request in N, 0 to disable.
+        header (str): Requests with this header are profiled, if given.
+        dump_interval (float): Seconds between two dumps.
+        keep (int): Number of pstats files kept per endpoint.
+        """
+
+        self.directory = directory
+        self.sample_every = sample_every
+        self.header = header
+        self.dump_interval = dump_interval
+        self.keep = keep
+        self._requests = itertools.count(1)
+        self._running = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._last_dump = time.monotonic()
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+
+    def _sampled(self):
+        if self.header and self.header in request.headers:
+            return True
+        return (
+            self.sample_every > 0
+            and next(self._requests) % self.sample_every == 0
+        )
+
+    def _start(self):
+        if not self._sampled() or not self._running.acquire(blocking=False):
+            return
+        g.request_profile = cProfile.Profile()
+        g.request_profile.enable()
+
+    def _stop(self, exc):
+        profile = g.pop("request_profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        self._running.release()
+        self.add(request.endpoint or "none", profile)
+
+    def add(self, endpoint, profile):
+        """
+        Adds a profile to the aggregate of an endpoint.
+
+        Parameters:
+        endpoint (str): The endpoint of the profiled request.
+        profile (cProfile.Profile): The profile.
+        """
+
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                self._stats[endpoint] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            due = time.monotonic() - self._last_dump >= self.dump_interval
+        if due:
+            self.dump()
+
+    def dump(self):
+        """
+        Writes the aggregated profiles to pstats files and starts new ones.
+
+        Returns:
+        list: The paths of the written files.
+        """
+
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            self._last_dump = time.monotonic()
+        if not stats:
+            return []
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        paths = []
+        for endpoint, endpoint_stats in stats.items():
+            prefix = re.sub(r"[^\w.-]", "_", endpoint)
+            path = os.path.join(self.directory, f"{prefix}.{stamp}.pstats")
+            endpoint_stats.dump_stats(path)
+            paths.append(path)
+            self._rotate(prefix)
+        return paths
+
+    def _rotate(self, prefix):
+        files = sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.startswith(f"{prefix}.") and name.endswith(".pstats")
+        )
+        for name in files[: max(len(files) - self.keep, 0)]:
+            os.remove(os.path.join(self.directory, name))
+
+
+def init_profiler(app):
+    """
+    Installs the request profiler if the configuration enables it.
+
+    Nothing is installed when PROFILE_SAMPLE_EVERY is 0 and PROFILE_HEADER
+    is not set, so requests pay nothing for it.
+
+    Parameters:
+    app (Flask): The application.
+
+    Returns:
+    RequestProfiler: The profiler, or None if profiling is disabled.
+    """
+
+    config = app.config
+    if not config["PROFILE_SAMPLE_EVERY"] and not config["PROFILE_HEADER"]:
+        return None
+    profiler = RequestProfiler(
+        config["PROFILE_DIR"],
+        sample_every=config["PROFILE_SAMPLE_EVERY"],
+        header=config["PROFILE_HEADER"],
+        dump_interval=config["PROFILE_DUMP_INTERVAL"],
+        keep=config["PROFILE_KEEP"],
+    )
+    profiler.init_app(app)
+    return profiler
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter, one bucket per key.
+
+    Each key may make `burst` requests at once, then `rate` requests per
+    second. Buckets are kept in least recently used order: a bucket left
+    alone for `burst / rate` seconds is full again, which is the same as
+    having no bucket, so such buckets are swept from the front of the
+    order on every call. At most `maxsize` buckets are kept; beyond that
+    the least recently used one is dropped.
+    """
+
+    def __init__(self, rate, burst, maxsize=100000, clock=time.monotonic):
+        """
+        Creates a limiter without any bucket.
+
+        Parameters:
+        rate (float): Tokens added to a bucket per second.
+        burst (int): Capacity of a bucket.
+        maxsize (int): Maximum number of buckets kept.
+        clock (callable): Returns the current time, in seconds.
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._refill_time = burst / rate
+        self._clock = clock
+        # Key -> (tokens, time of the last update)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key):
+        """
+        Takes a token from the bucket of a key.
+
+        Parameters:
+        key (str): The limited key.
+
+        Returns:
+        float: 0 if the request is allowed, else the seconds to wait
+        before the bucket holds a token again.
+        """
+
+        now = self._clock()
+        with self._lock:
+            buckets = self._buckets
+            while buckets:
+                oldest = next(iter(buckets))
+                if now - buckets[oldest][1] < self._refill_time:
+                    break
+                del buckets[oldest]
+
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+                if len(buckets) >= self.maxsize:
+                    buckets.popitem(last=False)
+            else:
+                tokens = min(
+                    self.burst, bucket[0] + (now - bucket[1]) * self.rate
+                )
+                buckets.move_to_end(key)
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                return 0.0
+            buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    def release(self, key):
+        """
+        Gives back the token taken by a request that was not served.
+
+        Parameters:
+        key (str): The limited key.
+        """
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                tokens = min(self.burst, bucket[0] + 1)
+                self._buckets[key] = (tokens, bucket[1])
+
+
+def create_limiter(config, scope):
+    """
+    Creates the limiter of a scope from the configuration.
+
+    Parameters:
+    config (dict): The application configuration.
+    scope (str): "CLUB" or "IP".
+
+    Returns:
+    TokenBucketLimiter: The limiter, or None if the scope is not limited.
+    """
+
+    rate = config[f"RATE_LIMIT_{scope}_RATE"]
+    if not rate:
+        return None
+    return TokenBucketLimiter(
+        rate,
+        config[f"RATE_LIMIT_{scope}_BURST"],
+        config["RATE_LIMIT_MAX_KEYS"],
+    )
@@ -0,0 +1,90 @@
+class Record:
+    """
+    Base class of the typed, `__slots__` based club and competition records.
+
+    Records keep the field names of the JSON files and support the same
+    item access as the dicts they replace (`club["points"]`), so the
+    templates and the booking code work with both. Item access is mapped
+    straight onto the attribute machinery, without a Python-level call.
+    """
+
+    __slots__ = ()
+
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def keys(self):
+        return self.__slots__
+
+    def update(self, fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Club(Record):
+    __slots__ = ("name", "email", "points")
+
+    def __init__(self, name, email, points):
+        self.name = name
+        self.email = email
+        self.points = int(points)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["email"], data["points"])
+
+
+class Competition(Record):
+    # numberOfPlaces keeps the camelCase of competitions.json.
+    __slots__ = ("name", "date", "numberOfPlaces")
+
+    def __init__(self, name, date, numberOfPlaces):
+        self.name = name
+        self.date = date
+        self.numberOfPlaces = int(numberOfPlaces)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["date"], data["numberOfPlaces"])
+
+
+def normalize_club(club):
+    """
+    Converts the points of a club dict to an integer, in place.
+
+    Parameters:
+    club (dict): The club data.
+
+    Returns:
+    dict: The same club.
+    """
+
+    club["points"] = int(club["points"])
+    return club
+
+
+def normalize_competition(competition):
+    """
+    Converts the places of a competition dict to an integer, in place.
+
+    Parameters:
+    competition (dict): The competition data.
+
+    Returns:
+    dict: The same competition.
+    """
+
+    competition["numberOfPlaces"] = int(competition["numberOfPlaces"])
+    return competition
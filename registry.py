@@ -0,0 +1,278 @@
+from itertools import islice
+
+
+class RecordList:
+    """
+    Records in insertion order, each removable in O(1).
+
+    The records are kept in a dict keyed by their identity, which keeps
+    the order of a list: removing one needs neither a scan nor a
+    comparison of records (records compare by value, field by field).
+    """
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records=()):
+        self._records = {id(record): record for record in records}
+
+    def append(self, record):
+        self._records[id(record)] = record
+
+    def remove(self, record):
+        """
+        Removes a record, found by identity.
+
+        Parameters:
+        record (dict): The record.
+
+        Raises:
+        ValueError: If the record is not in the list.
+        """
+
+        if self._records.pop(id(record), None) is None:
+            raise ValueError("record not in list")
+
+    def __contains__(self, record):
+        return id(record) in self._records
+
+    def __iter__(self):
+        # Iterates over a copy, taken at once: the data watcher may add or
+        # remove records while a request lists them.
+        return iter(list(self._records.values()))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self._records)
+        if not 0 <= index < len(self._records):
+            raise IndexError("record index out of range")
+        return next(islice(self._records.values(), index, None))
+
+    def __eq__(self, other):
+        if isinstance(other, (RecordList, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"RecordList({list(self)!r})"
+
+
+class Registry:
+    """
+    In-memory store of clubs and competitions with hash indexes.
+
+    The registry keeps the records in file order (so templates can
+    iterate over them) and maintains dictionaries indexing the very same
+    record objects by club email, club name and competition name. Every
+    mutation that touches an indexed key must go through the registry so
+    the indexes stay consistent with the records. Adding, removing or
+    re-keying a record costs O(1), without scanning the other records.
+    """
+
+    def __init__(self, competitions=None, clubs=None):
+        """
+        Builds the registry and its indexes.
+
+        Parameters:
+        competitions (list): List of competitions data.
+        clubs (list): List of clubs data.
+        """
+
+        # The records are shared, not copied: records mutated through the
+        # registry are the records the callers hold.
+        self.competitions = RecordList(competitions or ())
+        self.clubs = RecordList(clubs or ())
+        self._competitions_by_name = {}
+        self._clubs_by_email = {}
+        # Later clubs sharing an email, in order, by email.
+        self._email_duplicates = {}
+        self._clubs_by_name = {}
+        for competition in self.competitions:
+            self._competitions_by_name.setdefault(
+                competition["name"], competition
+            )
+        for club in self.clubs:
+            self._clubs_by_name.setdefault(club["name"], club)
+            self._index_email(club)
+
+    @classmethod
+    def from_iterables(cls, competitions, clubs):
+        """
+        Builds the registry while the records are being read.
+
+        The records are indexed as they are yielded, so a streaming loader
+        never has to hold a separate parsed list first.
+
+        Parameters:
+        competitions (iterable): The competitions data.
+        clubs (iterable): The clubs data.
+
+        Returns:
+        Registry: The registry.
+        """
+
+        registry = cls()
+        for competition in competitions:
+            registry.competitions.append(competition)
+            registry._competitions_by_name.setdefault(
+                competition["name"], competition
+            )
+        for club in clubs:
+            registry.clubs.append(club)
+            registry._clubs_by_name.setdefault(club["name"], club)
+            registry._index_email(club)
+        return registry
+
+    def _index_email(self, club):
+        # The first club registered for an email is the one found by it,
+        # like the linear scan.
+        first = self._clubs_by_email.setdefault(club["email"], club)
+        if first is not club:
+            self._email_duplicates.setdefault(club["email"], []).append(club)
+
+    def _unindex_email(self, club):
+        email = club["email"]
+        duplicates = self._email_duplicates.get(email)
+        if self._clubs_by_email.get(email) is club:
+            if duplicates:
+                self._clubs_by_email[email] = duplicates.pop(0)
+            else:
+                del self._clubs_by_email[email]
+        elif duplicates:
+            duplicates[:] = [
+                other for other in duplicates if other is not club
+            ]
+        if duplicates == []:
+            del self._email_duplicates[email]
+
+    def club_by_email(self, email):
+        return self._clubs_by_email.get(email)
+
+    def club_by_name(self, name):
+        return self._clubs_by_name.get(name)
+
+    def competition_by_name(self, name):
+        return self._competitions_by_name.get(name)
+
+    def add_club(self, club):
+        """
+        Adds a club, or replaces the club with the same name.
+
+        Parameters:
+        club (dict): The club data.
+        """
+
+        existing = self._clubs_by_name.get(club["name"])
+        if existing is not None:
+            self.remove_club(existing["name"])
+        self.clubs.append(club)
+        self._clubs_by_name[club["name"]] = club
+        self._index_email(club)
+
+    def remove_club(self, name):
+        """
+        Removes a club by name.
+
+        Parameters:
+        name (str): The name of the club.
+
+        Returns:
+        dict: The removed club, or None if it was not registered.
+        """
+
+        club = self._clubs_by_name.pop(name, None)
+        if club is None:
+            return None
+        self.clubs.remove(club)
+        self._unindex_email(club)
+        return club
+
+    def update_club(self, club_name, **fields):
+        """
+        Updates fields of a club and re-indexes it if a key changed.
+
+        Parameters:
+        club_name (str): The current name of the club.
+        **fields: The fields to update.
+
+        Returns:
+        dict: The updated club, or None if it was not registered.
+        """
+
+        club = self._clubs_by_name.get(club_name)
+        if club is None:
+            return None
+        if "name" not in fields and "email" not in fields:
+            club.update(fields)
+            return club
+        # Only the indexes change: the club keeps its position.
+        del self._clubs_by_name[club_name]
+        self._unindex_email(club)
+        club.update(fields)
+        existing = self._clubs_by_name.get(club["name"])
+        if existing is not None:
+            self.remove_club(existing["name"])
+        self._clubs_by_name[club["name"]] = club
+        self._index_email(club)
+        return club
+
+    def add_competition(self, competition):
+        """
+        Adds a competition, or replaces the competition with the same name.
+
+        Parameters:
+        competition (dict): The competition data.
+        """
+
+        existing = self._competitions_by_name.get(competition["name"])
+        if existing is not None:
+            self.remove_competition(existing["name"])
+        self.competitions.append(competition)
+        self._competitions_by_name[competition["name"]] = competition
+
+    def remove_competition(self, name):
+        """
+        Removes a competition by name.
+
+        Parameters:
+        name (str): The name of the competition.
+
+        Returns:
+        dict: The removed competition, or None if it was not registered.
+        """
+
+        competition = self._competitions_by_name.pop(name, None)
+        if competition is not None:
+            self.competitions.remove(competition)
+        return competition
+
+    def update_competition(self, competition_name, **fields):
+        """
+        Updates fields of a competition and re-indexes it if renamed.
+
+        A competition renamed onto the name of another one replaces it, as
+        add_competition does.
+
+        Parameters:
+        competition_name (str): The current name of the competition.
+        **fields: The fields to update.
+
+        Returns:
+        dict: The updated competition, or None if it was not registered.
+        """
+
+        competition = self._competitions_by_name.get(competition_name)
+        if competition is None:
+            return None
+        if "name" in fields and fields["name"] != competition_name:
+            del self._competitions_by_name[competition_name]
+            existing = self._competitions_by_name.get(fields["name"])
+            if existing is not None:
+                self.remove_competition(existing["name"])
+            self._competitions_by_name[fields["name"]] = competition
+        competition.update(fields)
+        return competition
@@ -0,0 +1,125 @@
+from bisect import bisect_left, bisect_right
+import threading
+
+from utils import parse_date
+
+
+class CompetitionSchedule:
+    """
+    Competitions ordered by date, with their dates parsed once.
+
+    Splitting the competitions into upcoming and past ones is a binary
+    search on the sorted dates; the booking guard reads the parsed date
+    of a competition from a dict. The sorted lists are changed by the data
+    watcher while requests read them, so a lock keeps them in step.
+    """
+
+    def __init__(self, competitions=()):
+        """
+        Parses the dates and sorts the competitions.
+
+        Parameters:
+        competitions (list): List of competitions data.
+        """
+
+        self._dates = {}
+        self._entries = []
+        self._order = 0
+        for competition in competitions:
+            self._dates[competition["name"]] = parse_date(competition["date"])
+            self._entries.append(self._entry(competition))
+        self._entries.sort(key=lambda entry: entry[:2])
+        self._keys = [entry[0] for entry in self._entries]
+        self._lock = threading.Lock()
+
+    def _entry(self, competition):
+        self._order += 1
+        return (self._dates[competition["name"]], self._order, competition)
+
+    def date(self, competition):
+        """
+        Returns the parsed date of a competition.
+
+        Parameters:
+        competition (dict): The competition.
+
+        Returns:
+        datetime: The date of the competition.
+        """
+
+        return self._dates.get(competition["name"]) or parse_date(
+            competition["date"]
+        )
+
+    def add(self, competition):
+        """
+        Schedules a new competition.
+
+        Parameters:
+        competition (dict): The competition.
+        """
+
+        date = parse_date(competition["date"])
+        with self._lock:
+            self._remove(competition["name"])
+            self._dates[competition["name"]] = date
+            entry = self._entry(competition)
+            # The new entry has the highest order, so it goes after its
+            # ties.
+            index = bisect_right(self._keys, entry[0])
+            self._entries.insert(index, entry)
+            self._keys.insert(index, entry[0])
+
+    def remove(self, competition_name):
+        """
+        Unschedules a competition.
+
+        Parameters:
+        competition_name (str): The name of the competition.
+        """
+
+        with self._lock:
+            self._remove(competition_name)
+
+    def _remove(self, competition_name):
+        date = self._dates.pop(competition_name, None)
+        if date is None:
+            return
+        # Only the competitions of that date are searched: one renamed in
+        # place is not found, and is left scheduled.
+        end = bisect_right(self._keys, date)
+        for index in range(bisect_left(self._keys, date), end):
+            if self._entries[index][2]["name"] == competition_name:
+                del self._entries[index]
+                del self._keys[index]
+                return
+
+    def upcoming(self, now):
+        """
+        Returns the competitions that have not started yet, soonest first.
+
+        Parameters:
+        now (datetime): The current date.
+
+        Returns:
+        list: The upcoming competitions.
+        """
+
+        with self._lock:
+            index = bisect_left(self._keys, now)
+            return [entry[2] for entry in self._entries[index:]]
+
+    def past(self, now):
+        """
+        Returns the competitions that have already started, most recent first.
+
+        Parameters:
+        now (datetime): The current date.
+
+        Returns:
+        list: The past competitions.
+        """
+
+        with self._lock:
+            index = bisect_left(self._keys, now)
+            return [entry[2] for entry in reversed(self._entries[:index])]
@@ -1,28 +1,115 @@
-from flask import Flask, render_template, request, redirect, flash, url_for
+from flask import (
+    Flask,
+    abort,
+    before_render_template,
+    g,
+    make_response,
+    render_template,
+    request,
+    redirect,
+    flash,
+    jsonify,
+    send_file,
+    session,
+    template_rendered,
+    url_for,
+)
+from markupsafe import Markup, escape
 from utils import (
-    load_clubs,
-    load_competitions,
     search_club_email,
     search_club_name,
     search_competition,
-    save_clubs,
-    save_competitions,
 )
-from datetime import datetime
+from assets import create_assets
+from booking import BookingError, check_upcoming
+from fragments import FragmentCache
+from idempotency import (
+    IdempotencyCache,
+    IdempotencyInProgress,
+    IdempotencyMismatch,
+)
+from json_provider import CompactJSONProvider
+from metrics import (
+    BOOKING_REJECTIONS,
+    IDEMPOTENT_REPLAYS,
+    PHASE_LATENCY,
+    RATE_LIMITED,
+    REGISTRY,
+    REQUESTS,
+    REQUEST_LATENCY,
+    current_endpoint,
+)
+from profiling import init_profiler
+from ratelimit import create_limiter
+from storage import MemoryStorage, create_storage
+from waiting_room import WaitingRoom, WaitingRoomFull
+from datetime import datetime, timezone
+from functools import wraps
+import atexit
+import gc
+import math
+import os
+import secrets
+import threading
+import time
 
 app = Flask(__name__)
-app.secret_key = "something_special"
-app.config.from_object("config.Config")
+app.json = CompactJSONProvider(app)
+app.config.from_object(os.environ.get("GUDLFT_CONFIG", "config.Config"))
+if not app.config["SECRET_KEY"]:
+    if app.config["LOGIN_REQUIRED"]:
+        # A key known in advance would let anyone sign a session for any
+        # club.
+        raise RuntimeError(
+            "GUDLFT_SECRET_KEY must be set: it signs the login sessions."
+        )
+    # Only flashed messages use the session: a key per process will do.
+    app.config["SECRET_KEY"] = secrets.token_hex()
+
+# The loaded records live as long as the process: collections would only
+# scan them over and over while they are created, and then in every worker.
+gc.disable()
+try:
+    storage = create_storage(app.config)
+finally:
+    gc.enable()
+gc.freeze()
+atexit.register(storage.close)
+assets = create_assets(app.config, app.static_folder)
+profiler = init_profiler(app)
+if profiler is not None:
+    atexit.register(profiler.dump)
+competitions = storage.competitions()
+clubs = storage.clubs()
+competition_rows = FragmentCache(
+    app.config["FRAGMENT_CACHE_SIZE"], "competition_rows"
+)
+idempotency = IdempotencyCache(
+    app.config["IDEMPOTENCY_CACHE_SIZE"],
+    app.config["IDEMPOTENCY_TTL"],
+    app.config["IDEMPOTENCY_WAIT_TIMEOUT"],
+)
+club_limiter = create_limiter(app.config, "CLUB")
+ip_limiter = create_limiter(app.config, "IP")
+
+# Stands for the club in cached competition rows; replaced per request.
+CLUB_PLACEHOLDER = "__GUDLFT_CLUB__"
+
+WAITING_ROOM_FULL = "Too many bookings are waiting, please retry later."
+WAITING_ROOM_ONLY = "This competition is only booked through its waiting room."
+LOGIN_FIRST = "Please log in with your club email to book places."
+OTHER_CLUB = "You can only book places for your own club."
 
-competitions = load_competitions()
-clubs = load_clubs()
-totalPlacesReserved = {}
+# Start times of the templates being rendered by the current thread.
+_render_starts = threading.local()
 
 
 def set_test_data(competitions_data, clubs_data):
     """
     Sets the test data for competitions and clubs.
 
+    The test data is served from a fresh in-memory storage.
+
     Parameters:
     competitions_data (list): List of competitions data.
     clubs_data (list): List of clubs data.
@@ -30,11 +117,367 @@ def set_test_data(competitions_data, clubs_data):
 
     global competitions
     global clubs
+    global storage
+    global idempotency
+    global club_limiter
+    global ip_limiter
     competitions = competitions_data
     clubs = clubs_data
+    storage = MemoryStorage(competitions, clubs)
+    idempotency = IdempotencyCache(
+        app.config["IDEMPOTENCY_CACHE_SIZE"],
+        app.config["IDEMPOTENCY_TTL"],
+        app.config["IDEMPOTENCY_WAIT_TIMEOUT"],
+    )
+    club_limiter = create_limiter(app.config, "CLUB")
+    ip_limiter = create_limiter(app.config, "IP")
+    close_waiting_rooms()
+    waiting_rooms.update(open_waiting_rooms())
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.endpoint_token = current_endpoint.set(request.endpoint or "none")
+    _render_starts.stack = []
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or "none"
+    REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, endpoint)
+    REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    return response
+
+
+@app.teardown_request
+def reset_request_metrics(exc):
+    token = g.pop("endpoint_token", None)
+    if token is not None:
+        current_endpoint.reset(token)
+
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    if not hasattr(_render_starts, "stack"):
+        _render_starts.stack = []
+    _render_starts.stack.append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    stack = getattr(_render_starts, "stack", None)
+    if stack:
+        PHASE_LATENCY.observe(
+            time.perf_counter() - stack.pop(), current_endpoint.get(), "render"
+        )
+
+
+def conditional_get(view):
+    """
+    Answers conditional GETs of a read-only page without rendering it.
+
+    The page is tagged with the data version stamp of the storage, which
+    changes on every successful booking. A request whose `If-None-Match`
+    (or `If-Modified-Since`) matches the current stamp gets an empty
+    `304 Not Modified` response. Pages showing flashed messages are never
+    answered from the client cache.
+
+    `Last-Modified` only has a one second resolution, so it is left out
+    while the data may still change within the second of its last change:
+    a later booking in that second would not move it.
+
+    Parameters:
+    view (callable): The view function.
+
+    Returns:
+    callable: The wrapped view function.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if session.get("_flashes"):
+            return view(*args, **kwargs)
+        stamp, modified = storage.version()
+        last_modified = datetime.fromtimestamp(int(modified), timezone.utc)
+        settled = int(modified) < int(time.time())
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(stamp)
+        else:
+            not_modified = (
+                settled
+                and request.if_modified_since is not None
+                and last_modified <= request.if_modified_since
+            )
+        if not_modified:
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(stamp)
+        if settled:
+            response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
+
+
+def current_club():
+    """
+    Returns the club logged in the session of the current request.
+
+    The session cookie is signed with the secret key and holds the name
+    of the club, which the storage resolves from its index. A club that
+    no longer exists is logged out.
+
+    Returns:
+    dict: The club data, or None if no club is logged in.
+    """
+
+    if "session_club" not in g:
+        name = session.get("club")
+        club = None if name is None else search_club_name(name, storage)
+        if club is None:
+            session.pop("club", None)
+        g.session_club = club
+    return g.session_club
+
+
+def authenticated(view):
+    """
+    Books places on behalf of the club logged in the session only.
+
+    The club named in the URL, in the hidden `club` field of the form or
+    in the JSON body must be the logged in club, otherwise the request
+    is refused with a 403 error. Without a session, the request is
+    refused with a 401 error when `LOGIN_REQUIRED` is set, and the named
+    club is trusted otherwise.
+
+    Parameters:
+    view (callable): The view function.
+
+    Returns:
+    callable: The wrapped view function.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        club = current_club()
+        if club is None:
+            if not app.config["LOGIN_REQUIRED"]:
+                return view(*args, **kwargs)
+            if request.is_json:
+                return api_error("login_required", LOGIN_FIRST, 401)
+            flash(LOGIN_FIRST, "error")
+            return render_template("index.html"), 401
+        named = kwargs.get("club") or request.form.get("club")
+        if named is None and request.is_json:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                named = data.get("club")
+        if named is not None and named != club["name"]:
+            if request.is_json:
+                return api_error("forbidden", OTHER_CLUB, 403)
+            flash(OTHER_CLUB, "error")
+            return render_welcome(club), 403
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def rate_limited(view):
+    """
+    Limits the booking requests of each club, and of each client address.
+
+    Only the logged in club is limited, since any club can be named in the
+    form or the JSON body. A request over one of the limits is answered
+    with a 429 error and a `Retry-After` header, without running the view,
+    and the tokens it took from the other limits are given back.
+
+    Parameters:
+    view (callable): The view function.
+
+    Returns:
+    callable: The wrapped view function.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        checks = []
+        if ip_limiter is not None:
+            checks.append((ip_limiter, "ip", request.remote_addr))
+        if club_limiter is not None:
+            club = current_club()
+            if club is not None:
+                checks.append((club_limiter, "club", club["name"]))
+        for index, (limiter, scope, key) in enumerate(checks):
+            retry_after = limiter.acquire(key)
+            if retry_after:
+                for taken, _, taken_key in checks[:index]:
+                    taken.release(taken_key)
+                RATE_LIMITED.inc(request.endpoint, scope)
+                return too_many_requests(retry_after)
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def too_many_requests(retry_after):
+    message = "Too many requests, please retry later."
+    if request.is_json:
+        response = jsonify(error="rate_limited", message=message)
+    else:
+        response = make_response(message)
+        response.mimetype = "text/plain"
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def idempotent(view):
+    """
+    Applies a booking request at most once per idempotency key.
+
+    The key comes from the `Idempotency-Key` header, or the
+    `idempotency_key` form field. The first request with a key runs the
+    view; retries with the same key get its response again, marked with
+    an `Idempotent-Replayed` header, without booking anything. A key
+    reused for a different request is rejected with a 422 error, and a
+    retry still waiting for the first request after
+    IDEMPOTENCY_WAIT_TIMEOUT seconds with a 409 error.
+    Requests without a key are not affected.
+
+    Parameters:
+    view (callable): The view function.
+
+    Returns:
+    callable: The wrapped view function.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != "POST":
+            return view(*args, **kwargs)
+        key = request.headers.get("Idempotency-Key") or request.form.get(
+            "idempotency_key"
+        )
+        if not key:
+            return view(*args, **kwargs)
+
+        def respond():
+            response = make_response(view(*args, **kwargs))
+            return (
+                response.get_data(),
+                response.status_code,
+                list(response.headers.items()),
+            )
+
+        # The form is parsed first: the raw body is then only left for
+        # the JSON requests.
+        fingerprint = (
+            request.endpoint,
+            tuple(sorted(request.form.items(multi=True))),
+            request.get_data(),
+        )
+        try:
+            # Keys are scoped by club: another club can not replay them.
+            (body, status, headers), replayed = idempotency.run(
+                f"{request.endpoint}:{session.get('club', '')}:{key}",
+                fingerprint,
+                respond,
+            )
+        except IdempotencyMismatch:
+            message = "This idempotency key was used for another request."
+            if request.is_json:
+                return api_error("idempotency_mismatch", message, 422)
+            flash(message, "error")
+            return redirect(url_for("index")), 422
+        except IdempotencyInProgress:
+            message = "This request is still running, please retry later."
+            if request.is_json:
+                response = make_response(
+                    api_error("idempotency_in_progress", message, 409)
+                )
+            else:
+                flash(message, "error")
+                response = make_response(redirect(url_for("index")), 409)
+            response.headers["Retry-After"] = "1"
+            return response
+        response = app.response_class(body, status, headers)
+        if replayed:
+            IDEMPOTENT_REPLAYS.inc(request.endpoint)
+            response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    return wrapper
+
+
+def render_competition_rows(competitions, club):
+    """
+    Renders the rows of the competitions table of the welcome page.
+
+    The rows only depend on the competitions, except for the club in the
+    booking links. They are cached with a placeholder for the club, which
+    is substituted per request, and re-rendered only when the date or the
+    number of places of a competition changes.
+
+    Parameters:
+    competitions (list): The competitions to list.
+    club (dict): The club data, or the club name.
+
+    Returns:
+    Markup: The rendered rows.
+    """
+
+    club_name = club if isinstance(club, str) else club["name"]
+    prefix = url_for("book", competition=CLUB_PLACEHOLDER, club="_")[:-1]
+    club_segment = str(
+        escape(url_for("book", competition=CLUB_PLACEHOLDER, club=club_name))
+    )[len(prefix) :]
+    rows = [
+        competition_rows.get(
+            comp["name"],
+            (comp["date"], comp["numberOfPlaces"]),
+            lambda comp=comp: render_template(
+                "competition_row.html",
+                comp=comp,
+                club={"name": CLUB_PLACEHOLDER},
+            ),
+        )
+        for comp in competitions
+    ]
+    return Markup("".join(rows).replace(CLUB_PLACEHOLDER, club_segment))
+
+
+def render_welcome(club):
+    """
+    Renders the welcome page of a club.
+
+    Upcoming competitions are listed with their booking links, past ones
+    are only archived.
+
+    Parameters:
+    club (dict): The club data.
+
+    Returns:
+    str: The rendered welcome page.
+    """
+
+    now = datetime.now()
+    return render_template(
+        "welcome.html",
+        club=club,
+        competition_rows=render_competition_rows(
+            storage.upcoming_competitions(now), club
+        ),
+        past_competitions=storage.past_competitions(now),
+    )
 
 
 @app.route("/")
+@conditional_get
 def index():
     """
     Renders the index page.
@@ -51,30 +494,36 @@ def show_summary():
     """
     Displays the summary page for a club.
 
-    If the request method is GET, it redirects to the index page.
-    If the request method is POST, it searches for the club by email
-    and displays the welcome page if the club is found, otherwise shows an error.
+    If the request method is GET, it displays the welcome page of the
+    logged in club, or redirects to the index page.
+    If the request method is POST, it searches for the club by email,
+    logs it in the session and displays the welcome page if the club is
+    found, otherwise shows an error.
 
     Returns:
     Response: The rendered welcome page or an error message.
     """
 
     if request.method == "GET":
-        return redirect(url_for("index"))
-    foundclub = search_club_email(request.form["email"], clubs)
+        club = current_club()
+        if club is None:
+            return redirect(url_for("index"))
+        return render_welcome(club)
+    foundclub = search_club_email(request.form["email"], storage)
     if foundclub == None:
+        session.pop("club", None)
         flash("No account related to this email.", "error")
         return render_template("index.html"), 401
     else:
         club = foundclub
-        return render_template(
-            "welcome.html",
-            club=club,
-            competitions=competitions,
-        )
+        session["club"] = club["name"]
+        g.session_club = club
+        return render_welcome(club)
 
 
 @app.route("/book/<competition>/<club>")
+@authenticated
+@rate_limited
 def book(competition, club):
     """
     Displays the booking page for a specific competition and club.
@@ -87,37 +536,26 @@ def book(competition, club):
     Response: The rendered booking page or an error message.
     """
 
-    foundClub = search_club_name(club, clubs)
-    foundCompetition = search_competition(competition, competitions)
+    foundClub = current_club() or search_club_name(club, storage)
+    foundCompetition = search_competition(competition, storage)
     if foundCompetition == None or foundClub == None:
         flash("Something went wrong-please try again", "error")
         return (
-            render_template(
-                "welcome.html",
-                club=club,
-                competitions=competitions,
-                clubs=clubs,
-            ),
+            render_welcome(club),
             400,
         )
 
     if foundClub and foundCompetition:
-        competition_date = datetime.strptime(
-            foundCompetition["date"], "%Y-%m-%d %H:%M:%S"
-        )
-        if competition_date < datetime.now():
-            flash(
-                "Error: can not purchase a place for past competitions",
-                "error",
+        try:
+            check_upcoming(
+                storage.competition_date(foundCompetition), datetime.now()
             )
+        except BookingError as error:
+            BOOKING_REJECTIONS.inc(error.reason)
+            flash(error.message, "error")
             return (
-                render_template(
-                    "welcome.html",
-                    club=foundClub,
-                    competitions=competitions,
-                    clubs=clubs,
-                ),
-                400,
+                render_welcome(foundClub),
+                error.status_code,
             )
 
         return render_template(
@@ -126,17 +564,15 @@ def book(competition, club):
     else:
         flash("Something went wrong-please try again", "error")
         return (
-            render_template(
-                "welcome.html",
-                club=foundClub,
-                competitions=competitions,
-                clubs=clubs,
-            ),
+            render_welcome(foundClub),
             400,
         )
 
 
 @app.route("/purchasePlaces", methods=["POST", "GET"])
+@authenticated
+@rate_limited
+@idempotent
 def purchasePlaces():
     """
     Handles the place purchasing for a competition.
@@ -152,11 +588,11 @@ def purchasePlaces():
     if request.method == "GET":
         return redirect(url_for("index"))
     try:
-        competition = search_competition(
-            request.form["competition"], competitions
-        )
+        competition = search_competition(request.form["competition"], storage)
 
-        club = search_club_name(request.form["club"], clubs)
+        club = current_club() or search_club_name(
+            request.form["club"], storage
+        )
 
         if competition == None or club == None:
             flash("Competition or club not found.", "error")
@@ -169,7 +605,6 @@ def purchasePlaces():
     placesRequired = (
         int(request.form["places"]) if request.form["places"] else None
     )
-    placesRemaining = int(competition["numberOfPlaces"])
 
     if placesRequired is None:
         flash("Please enter the number of places to reserve.", "error")
@@ -180,105 +615,536 @@ def purchasePlaces():
             400,
         )
 
-    if request.form["competition"] not in totalPlacesReserved:
-        totalPlacesReserved[request.form["competition"]] = 0
-
-    totalPlacesForCompetition = totalPlacesReserved[
-        request.form["competition"]
-    ]
+    try:
+        check_upcoming(storage.competition_date(competition), datetime.now())
+    except BookingError as error:
+        BOOKING_REJECTIONS.inc(error.reason)
+        flash(error.message, "error")
+        return render_welcome(club), error.status_code
 
-    if totalPlacesForCompetition == 12:
-        flash(
-            "You have already booked 12 places for this competition.", "error"
-        )
-        return (
-            render_template(
-                "welcome.html", club=club, competitions=competitions
-            ),
-            403,
-        )
+    room = waiting_rooms.get(competition["name"])
+    if room is not None:
+        try:
+            ticket = room.submit(
+                club["name"], competition["name"], placesRequired
+            )
+        except WaitingRoomFull:
+            flash(WAITING_ROOM_FULL, "error")
+            response = make_response(
+                render_template(
+                    "booking.html", club=club, competition=competition
+                ),
+                503,
+            )
+            response.headers["Retry-After"] = "1"
+            return response
+        return render_waiting_room(room, ticket), 202
 
-    if placesRequired > int(club["points"]):
-        flash("You don't have enough points.", "error")
+    try:
+        club, competition = storage.book(club, competition, placesRequired)
+    except BookingError as error:
+        BOOKING_REJECTIONS.inc(error.reason)
+        flash(error.message, "error")
+        if error.reason in ("cap_reached", "cap_total"):
+            return render_welcome(club), error.status_code
         return (
             render_template(
                 "booking.html", club=club, competition=competition
             ),
-            403,
+            error.status_code,
         )
-    elif placesRequired > placesRemaining:
-        flash(
-            "Not enough places available, you are trying to book more than the remaining places.",
-            "error",
+
+    flash("Great-booking complete!", "error")
+    return render_welcome(club)
+
+
+@app.route("/pointsBoard")
+@conditional_get
+def pointsBoard():
+    """
+    Displays a page of the points board.
+
+    The clubs are read in rank order from the storage, without sorting.
+    The `offset` and `limit` query parameters select the ranks to display.
+
+    Returns:
+    Response: The rendered points board page.
+    """
+
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = request.args.get(
+        "limit", app.config["POINTS_BOARD_PAGE_SIZE"], type=int
+    )
+    limit = min(max(limit, 1), app.config["POINTS_BOARD_MAX_PAGE_SIZE"])
+    total = storage.club_count()
+    return render_template(
+        "points_board.html",
+        clubs=storage.leaderboard_page(offset, limit),
+        offset=offset,
+        limit=limit,
+        total=total,
+    )
+
+
+@app.route("/api/v1/competitions")
+def api_competitions():
+    """
+    Lists the competitions with their remaining places, as JSON.
+
+    The `status` query parameter selects the "upcoming" (default),
+    "past" or "all" competitions. The split moves with the clock, not
+    with the data version, so the list is not answered from the client
+    cache.
+
+    Returns:
+    Response: The JSON list of competitions.
+    """
+
+    status = request.args.get("status", "upcoming")
+    now = datetime.now()
+    if status == "upcoming":
+        found = storage.upcoming_competitions(now)
+    elif status == "past":
+        found = storage.past_competitions(now)
+    elif status == "all":
+        found = storage.competitions()
+    else:
+        return api_error("invalid", f"Unknown status: {status}", 400)
+    return jsonify(competitions=[competition_json(c) for c in found])
+
+
+@app.route("/api/v1/clubs/<club>/points")
+def api_club_points(club):
+    """
+    Returns the points of a club, as JSON.
+
+    Parameters:
+    club (str): The name of the club.
+
+    Returns:
+    Response: The JSON club points, or a 404 error.
+    """
+
+    foundClub = search_club_name(club, storage)
+    if foundClub is None:
+        return api_error("not_found", "Club not found.", 404)
+    return jsonify(club_json(foundClub))
+
+
+@app.route("/api/v1/bookings", methods=["POST"])
+@authenticated
+@rate_limited
+@idempotent
+def api_book():
+    """
+    Books places in a competition for a club, from a JSON body.
+
+    The body holds the `competition` name and the number of `places`,
+    booked for the logged in club; the `club` name is only needed
+    without a session. The booking follows the rules of purchasePlaces,
+    and past competitions can not be booked.
+
+    Returns:
+    Response: The JSON updated club and competition, or an error.
+    """
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return api_error("invalid", "Expected a JSON object.", 400)
+    places = data.get("places")
+    if not isinstance(places, int) or isinstance(places, bool):
+        return api_error("invalid", "places must be an integer.", 400)
+    club = current_club()
+    if not isinstance(data.get("competition"), str) or (
+        club is None and not isinstance(data.get("club"), str)
+    ):
+        return api_error("invalid", "club and competition are required.", 400)
+
+    club = club or search_club_name(data["club"], storage)
+    competition = search_competition(data.get("competition"), storage)
+    if competition is None or club is None:
+        return api_error("not_found", "Competition or club not found.", 404)
+
+    # Past competitions are refused before they can be queued.
+    room = waiting_rooms.get(competition["name"])
+    try:
+        check_upcoming(storage.competition_date(competition), datetime.now())
+        if room is None:
+            club, competition = storage.book(club, competition, places)
+    except BookingError as error:
+        BOOKING_REJECTIONS.inc(error.reason)
+        # The HTML form answers some rejections with 200; the API never
+        # reports a rejected booking as a success.
+        status_code = error.status_code if error.status_code >= 400 else 403
+        return api_error(error.reason, error.message, status_code)
+
+    if room is not None:
+        try:
+            ticket = room.submit(club["name"], competition["name"], places)
+        except WaitingRoomFull:
+            response, status_code = api_error(
+                "waiting_room_full", WAITING_ROOM_FULL, 503
+            )
+            response.headers["Retry-After"] = "1"
+            return response, status_code
+        poll = url_for(
+            "api_waiting_room",
+            competition=competition["name"],
+            ticket=ticket.id,
         )
-        return (
-            render_template(
-                "booking.html", club=club, competition=competition
-            ),
-            409,
+        response = jsonify(
+            status="queued",
+            ticket=ticket.id,
+            position=room.position(ticket),
+            poll=poll,
         )
-    elif placesRequired < 0:
-        flash("You can't book a negative number of places.", "error")
-        return (
-            render_template(
-                "booking.html", club=club, competition=competition
-            ),
+        response.headers["Location"] = poll
+        return response, 202
+    return (
+        jsonify(
+            club=club_json(club),
+            competition=competition_json(competition),
+            places=places,
+        ),
+        201,
+    )
+
+
+@app.route("/api/v1/bookings/batch", methods=["POST"])
+@authenticated
+@rate_limited
+@idempotent
+def api_book_batch():
+    """
+    Books places in several competitions for a club, all or nothing.
+
+    The JSON body holds a list of `bookings`, each with a `competition`
+    name and a number of `places`, booked for the logged in club (or the
+    `club` named in the body, without a session). Every booking
+    follows the rules of purchasePlaces, past competitions can not be
+    booked, and a single rejected booking cancels the whole batch.
+
+    Returns:
+    Response: The JSON updated club and competitions, or an error.
+    """
+
+    data = request.get_json(silent=True)
+    club = current_club()
+    if not isinstance(data, dict) or (
+        club is None and not isinstance(data.get("club"), str)
+    ):
+        return api_error("invalid", "club is required.", 400)
+    items = data.get("bookings")
+    if (
+        not isinstance(items, list)
+        or not items
+        or len(items) > app.config["BATCH_BOOKING_MAX_SIZE"]
+    ):
+        return api_error(
+            "invalid",
+            "bookings must be a list of 1 to "
+            f"{app.config['BATCH_BOOKING_MAX_SIZE']} bookings.",
             400,
         )
-    elif placesRequired > 12:
-        flash("You can't book more than 12 places in a competition.", "error")
-        return (
-            render_template(
-                "booking.html", club=club, competition=competition
-            ),
-            403,
-        )
-    elif totalPlacesForCompetition + placesRequired > 12:
-        flash(
-            "You can't book more than 12 places for this competition.", "error"
+
+    club = club or search_club_name(data["club"], storage)
+    if club is None:
+        return api_error("not_found", "Club not found.", 404)
+
+    bookings = []
+    now = datetime.now()
+    for item in items:
+        if (
+            not isinstance(item, dict)
+            or not isinstance(item.get("competition"), str)
+            or not isinstance(item.get("places"), int)
+            or isinstance(item.get("places"), bool)
+        ):
+            return api_error(
+                "invalid",
+                "Each booking needs a competition and integer places.",
+                400,
+            )
+        competition = search_competition(item["competition"], storage)
+        if competition is None:
+            return api_error(
+                "not_found",
+                f"Competition not found: {item['competition']}",
+                404,
+            )
+        if competition["name"] in waiting_rooms:
+            # A batch would jump the queue of the waiting room.
+            return api_error(
+                "waiting_room",
+                WAITING_ROOM_ONLY,
+                409,
+                competition["name"],
+            )
+        try:
+            check_upcoming(storage.competition_date(competition), now)
+        except BookingError as error:
+            BOOKING_REJECTIONS.inc(error.reason)
+            return api_error(
+                error.reason,
+                error.message,
+                error.status_code,
+                competition["name"],
+            )
+        bookings.append((competition, item["places"]))
+
+    try:
+        club, competitions = storage.book_many(club, bookings)
+    except BookingError as error:
+        BOOKING_REJECTIONS.inc(error.reason)
+        status_code = error.status_code if error.status_code >= 400 else 403
+        return api_error(
+            error.reason,
+            error.message,
+            status_code,
+            error.competition,
         )
-    else:
-        totalPlacesReserved[request.form["competition"]] += placesRequired
-        competition["numberOfPlaces"] = (
-            int(competition["numberOfPlaces"]) - placesRequired
+    return (
+        jsonify(
+            club=club_json(club),
+            competitions=[competition_json(c) for c in competitions],
+        ),
+        201,
+    )
+
+
+def apply_queued_booking(club_name, competition_name, places):
+    """
+    Applies a booking taken from a waiting room.
+
+    Parameters:
+    club_name (str): The name of the booking club.
+    competition_name (str): The name of the competition.
+    places (int): The number of places requested.
+
+    Returns:
+    dict: The outcome of the booking, as sent to the polling clients.
+    """
+
+    club = search_club_name(club_name, storage)
+    competition = search_competition(competition_name, storage)
+    try:
+        check_upcoming(storage.competition_date(competition), datetime.now())
+        club, competition = storage.book(club, competition, places)
+    except BookingError as error:
+        BOOKING_REJECTIONS.inc(error.reason)
+        return {
+            "booked": False,
+            "reason": error.reason,
+            "message": error.message,
+            "statusCode": error.status_code,
+        }
+    return {
+        "booked": True,
+        "club": club_json(club),
+        "competition": competition_json(competition),
+        "places": places,
+    }
+
+
+def open_waiting_rooms():
+    return {
+        name: WaitingRoom(
+            name,
+            apply_queued_booking,
+            app.config["WAITING_ROOM_SIZE"],
+            app.config["WAITING_ROOM_KEEP"],
         )
-        club["points"] = int(club["points"]) - placesRequired
+        for name in app.config["WAITING_ROOM_COMPETITIONS"]
+    }
 
-        # Save changes to JSON files
-        # save_competitions(competitions)
-        # save_clubs(clubs)
 
-        flash("Great-booking complete!", "error")
+def close_waiting_rooms():
+    for room in waiting_rooms.values():
+        room.close()
+    waiting_rooms.clear()
+
+
+waiting_rooms = open_waiting_rooms()
+atexit.register(close_waiting_rooms)
+
 
+def render_waiting_room(room, ticket):
+    club_name, competition_name, places = ticket.job
     return render_template(
-        "welcome.html", club=club, competitions=competitions
+        "waiting_room.html",
+        club=club_name,
+        competition=competition_name,
+        places=places,
+        ticket=ticket.id,
+        position=room.position(ticket),
+        refresh=app.config["WAITING_ROOM_REFRESH"],
     )
 
 
-@app.route("/pointsBoard")
-def pointsBoard():
+@app.route("/waitingRoom/<competition>/<ticket>")
+def waiting_room(competition, ticket):
     """
-    Displays the points board.
+    Shows the place of a queued booking, then its outcome once applied.
+
+    Parameters:
+    competition (str): The name of the competition.
+    ticket (str): The ticket of the booking.
 
     Returns:
-    Response: The rendered points board page.
+    Response: The waiting room page, or the welcome page with the outcome.
+    """
+
+    room = waiting_rooms.get(competition)
+    found = room.ticket(ticket) if room is not None else None
+    if found is None:
+        flash("Unknown or expired booking ticket.", "error")
+        return render_template("index.html"), 404
+    if found.outcome is None:
+        return render_waiting_room(room, found)
+
+    outcome = found.outcome
+    if outcome["booked"]:
+        flash("Great-booking complete!", "error")
+        status_code = 200
+    else:
+        flash(outcome["message"], "error")
+        status_code = outcome["statusCode"]
+    club = search_club_name(found.job[0], storage)
+    if club is None:
+        # The club was removed from the data files since.
+        return render_template("index.html"), status_code
+    return render_welcome(club), status_code
+
+
+@app.route("/api/v1/waitingRoom/<competition>/<ticket>")
+def api_waiting_room(competition, ticket):
+    """
+    Returns the position of a queued booking, or its outcome, as JSON.
+
+    Polling only reads the ticket: no record is looked up until the
+    booking is applied.
+
+    Parameters:
+    competition (str): The name of the competition.
+    ticket (str): The ticket of the booking.
+
+    Returns:
+    Response: The JSON status of the ticket, or a 404 error.
+    """
+
+    room = waiting_rooms.get(competition)
+    found = room.ticket(ticket) if room is not None else None
+    if found is None:
+        return api_error("not_found", "Unknown or expired ticket.", 404)
+    if found.outcome is None:
+        return jsonify(status="queued", position=room.position(found))
+    return jsonify(status="done", **found.outcome)
+
+
+def competition_json(competition):
+    return {
+        "name": competition["name"],
+        "date": competition["date"],
+        "numberOfPlaces": competition["numberOfPlaces"],
+    }
+
+
+def club_json(club):
+    return {"name": club["name"], "points": club["points"]}
+
+
+def api_error(reason, message, status_code, competition=None):
+    body = {"error": reason, "message": message}
+    if competition is not None:
+        body["competition"] = competition
+    return jsonify(body), status_code
+
+
+@app.template_global()
+def asset_url(filename):
+    """
+    Returns the URL of a static file, fingerprinted when it was built.
+
+    Parameters:
+    filename (str): The path of the file in the static folder.
+
+    Returns:
+    str: The URL of the file.
+    """
+
+    if assets is not None:
+        hashed = assets.names.get(filename)
+        if hashed is not None:
+            return url_for("asset", filename=hashed)
+    return url_for("static", filename=filename)
+
+
+@app.route("/assets/<path:filename>")
+def asset(filename):
+    """
+    Serves a fingerprinted static file, precompressed when possible.
+
+    The brotli or gzip variant is chosen from the `Accept-Encoding`
+    header. The name of the file changes with its content, so the
+    response can be cached for good.
+
+    Parameters:
+    filename (str): The fingerprinted name of the file.
+
+    Returns:
+    Response: The file, or a 404 error.
+    """
+
+    found = None
+    if assets is not None:
+        accepted = {
+            encoding
+            for encoding in ("br", "gzip")
+            if request.accept_encodings[encoding]
+        }
+        found = assets.variant(filename, accepted)
+    if found is None:
+        abort(404)
+    path, encoding = found
+    response = send_file(
+        path,
+        mimetype=assets.mimetype(filename),
+        max_age=app.config["ASSETS_MAX_AGE"],
+        conditional=True,
+    )
+    if encoding is not None:
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route("/metrics")
+def metrics():
+    """
+    Exposes the metrics of this process in the Prometheus text format.
+
+    Returns:
+    Response: The metrics, as text/plain.
     """
 
-    club_list = sorted(
-        clubs, key=lambda club: int(club["points"]), reverse=True
+    return app.response_class(
+        REGISTRY.expose(),
+        mimetype="text/plain; version=0.0.4; charset=utf-8",
     )
-    return render_template("points_board.html", clubs=club_list)
 
 
 @app.route("/logout")
 def logout():
     """
-    Logs out the user by redirecting to the index page.
+    Logs out the club of the session and redirects to the index page.
 
     Returns:
     Response: Redirect to the index page.
     """
 
+    session.pop("club", None)
     return redirect(url_for("index"))
 
 
@@ -0,0 +1,125 @@
+import os
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, the JSON snapshots are used alone
+    msgpack = None
+
+from records import Club, Competition
+
+MAGIC = b"GUDLFT-STATE"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct(">12sHI")
+
+
+def _source_stats(sources):
+    stats = {}
+    for path in sources:
+        st = os.stat(path)
+        stats[path] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def write_binary_snapshot(
+    path,
+    competitions,
+    clubs,
+    reservations,
+    competitions_seq,
+    clubs_seq,
+    sources,
+):
+    """
+    Atomically writes the state to a binary (msgpack) snapshot.
+
+    Records are stored as positional rows, without their field names. The
+    snapshot also records the modification time and size of the JSON
+    snapshots it was built from, so it is ignored once they change.
+
+    Parameters:
+    path (str): The path of the binary snapshot.
+    competitions (list): List of competitions data.
+    clubs (list): List of clubs data.
+    reservations (list): [club, competition, places] reserved places.
+    competitions_seq (int): Last journal event included in the competitions.
+    clubs_seq (int): Last journal event included in the clubs.
+    sources (tuple): The JSON snapshot files matching this state.
+
+    Returns:
+    bool: True if the snapshot was written, False without msgpack.
+    """
+
+    if msgpack is None:
+        return False
+    body = msgpack.packb(
+        {
+            "sources": _source_stats(sources),
+            "competitionsSeq": competitions_seq,
+            "clubsSeq": clubs_seq,
+            "reservations": reservations,
+            "competitions": [
+                [c["name"], c["date"], int(c["numberOfPlaces"])]
+                for c in competitions
+            ],
+            "clubs": [
+                [c["name"], c["email"], int(c["points"])] for c in clubs
+            ],
+        },
+        use_bin_type=True,
+    )
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, zlib.crc32(body))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header + body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+def load_binary_snapshot(path, sources):
+    """
+    Loads the state from a binary snapshot, if it is usable.
+
+    The snapshot is rejected when it is missing, when its checksum or
+    format does not match, or when one of the JSON snapshots changed
+    since it was written.
+
+    Parameters:
+    path (str): The path of the binary snapshot.
+    sources (tuple): The JSON snapshot files the state must match.
+
+    Returns:
+    dict: The "competitions" and "clubs" records, "reservations",
+    "competitionsSeq" and "clubsSeq", or None.
+    """
+
+    if msgpack is None or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, checksum = _HEADER.unpack_from(data)
+    body = memoryview(data)[_HEADER.size :]
+    if (
+        magic != MAGIC
+        or version != FORMAT_VERSION
+        or zlib.crc32(body) != checksum
+    ):
+        return None
+    state = msgpack.unpackb(body, raw=False, use_list=False)
+    try:
+        if {k: list(v) for k, v in state["sources"].items()} != (
+            _source_stats(sources)
+        ):
+            return None
+    except FileNotFoundError:
+        return None
+    state["competitions"] = [
+        Competition(*row) for row in state["competitions"]
+    ]
+    state["clubs"] = [Club(*row) for row in state["clubs"]]
+    return state
@@ -0,0 +1,717 @@
+from functools import partial
+import sqlite3
+import threading
+import time
+import uuid
+
+from booking import (
+    BookingError,
+    StripedLock,
+    book_many,
+    book_places,
+    check_booking,
+)
+from flusher import WriteBehindFlusher
+from hot_reload import DataWatcher, snapshot_base
+from journal import BookingJournal, replay, save_state
+from leaderboard import Leaderboard
+from ledger import ReservationLedger
+from metrics import timed
+from records import (
+    Club,
+    Competition,
+    normalize_club,
+    normalize_competition,
+)
+from registry import Registry
+from schedule import CompetitionSchedule
+from snapshot import load_binary_snapshot, write_binary_snapshot
+from utils import (
+    CLUBS_FILE,
+    COMPETITIONS_FILE,
+    DATE_FORMAT,
+    parse_date,
+)
+from json_stream import iter_snapshot
+
+
+class MemoryStorage:
+    """
+    Storage backend keeping clubs and competitions in process memory.
+
+    Lookups go through the registry indexes and bookings through the
+    striped booking locks. Durability comes from the optional booking
+    journal, the optional write-behind flusher keeps the snapshots up to
+    date, and the optional data watcher merges their edits. The state is
+    private to the process, so this backend only fits a single worker
+    process (and the tests).
+    """
+
+    def __init__(
+        self,
+        competitions=None,
+        clubs=None,
+        ledger=None,
+        journal=None,
+        stripes=64,
+        registry=None,
+    ):
+        """
+        Builds the backend around already loaded records.
+
+        Parameters:
+        competitions (list): List of competitions data.
+        clubs (list): List of clubs data.
+        ledger (ReservationLedger): The places already reserved.
+        journal (BookingJournal): The journal recording bookings, if any.
+        stripes (int): Number of booking lock stripes.
+        registry (Registry): Already indexed records, instead of the lists.
+        """
+
+        if registry is None:
+            # Dict records are kept (the callers may hold them) but their
+            # counters are converted once, so bookings never parse them.
+            for competition in competitions or ():
+                normalize_competition(competition)
+            for club in clubs or ():
+                normalize_club(club)
+            registry = Registry(competitions, clubs)
+        self.registry = registry
+        self.ledger = ledger if ledger is not None else ReservationLedger()
+        self.journal = journal
+        self.flusher = None
+        self.watcher = None
+        self.locks = StripedLock(stripes)
+        self.leaderboard = Leaderboard(self.registry.clubs)
+        self.schedule = CompetitionSchedule(self.registry.competitions)
+        self._epoch = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._modified = time.time()
+        self._version_lock = threading.Lock()
+
+    def club_by_email(self, email):
+        return self.registry.club_by_email(email)
+
+    def club_by_name(self, name):
+        return self.registry.club_by_name(name)
+
+    def competition_by_name(self, name):
+        return self.registry.competition_by_name(name)
+
+    def competitions(self):
+        return self.registry.competitions
+
+    def clubs(self):
+        return self.registry.clubs
+
+    def state(self):
+        return self.registry.competitions, self.registry.clubs, self.ledger
+
+    def club_count(self):
+        return len(self.registry.clubs)
+
+    def competition_date(self, competition):
+        return self.schedule.date(competition)
+
+    def version(self):
+        """
+        Returns a stamp identifying the current state of the data.
+
+        Returns:
+        tuple: The stamp (str) and the time of the last change (float).
+        """
+
+        return f"{self._epoch}-{self._version}", self._modified
+
+    def bump_version(self):
+        with self._version_lock:
+            self._version += 1
+            self._modified = time.time()
+
+    def upcoming_competitions(self, now):
+        return self.schedule.upcoming(now)
+
+    def past_competitions(self, now):
+        return self.schedule.past(now)
+
+    def leaderboard_page(self, offset, limit):
+        """
+        Returns clubs ranked by points, without sorting.
+
+        Parameters:
+        offset (int): The rank of the first club, from 0.
+        limit (int): The maximum number of clubs.
+
+        Returns:
+        list: The clubs, best first.
+        """
+
+        return self.leaderboard.page(offset, limit)
+
+    def book(self, club, competition, places):
+        """
+        Atomically checks and applies a booking.
+
+        Parameters:
+        club (dict): The booking club.
+        competition (dict): The competition.
+        places (int): The number of places requested.
+
+        Returns:
+        tuple: The updated club and competition.
+
+        Raises:
+        BookingError: If the booking is not allowed.
+        """
+
+        book_places(
+            club, competition, places, self.ledger, self.locks, self.journal
+        )
+        if self.flusher is not None:
+            self.flusher.mark_dirty(club["name"], competition["name"])
+        self.leaderboard.update(club)
+        self.bump_version()
+        return club, competition
+
+    def book_many(self, club, bookings):
+        """
+        Atomically checks and applies several bookings of a club.
+
+        Parameters:
+        club (dict): The booking club.
+        bookings (list): The (competition, places) pairs to book.
+
+        Returns:
+        tuple: The updated club and the list of booked competitions.
+
+        Raises:
+        BookingError: If one of the bookings is not allowed.
+        """
+
+        book_many(club, bookings, self.ledger, self.locks, self.journal)
+        if self.flusher is not None:
+            self.flusher.mark_dirty(
+                club["name"], *(c["name"] for c, _ in bookings)
+            )
+        self.leaderboard.update(club)
+        self.bump_version()
+        return club, [competition for competition, _ in bookings]
+
+    def save(self, competitions_file, clubs_file, binary_file=None):
+        """
+        Atomically writes the current state to the snapshots.
+
+        Bookings are paused while the state is copied, so the snapshots
+        never hold half of a booking, and resume while it is written.
+
+        Parameters:
+        competitions_file (str): The competitions snapshot file.
+        clubs_file (str): The clubs snapshot file.
+        binary_file (str): The binary snapshot file, or None.
+
+        Returns:
+        tuple: The written competitions and clubs.
+        """
+
+        with self.locks.hold_all():
+            competitions = [dict(c) for c in self.registry.competitions]
+            clubs = [dict(c) for c in self.registry.clubs]
+            reservations = self.ledger.entries()
+        save_state(
+            competitions_file,
+            clubs_file,
+            binary_file,
+            competitions,
+            clubs,
+            reservations,
+        )
+        return competitions, clubs
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+        if self.flusher is not None:
+            self.flusher.close()
+        if self.journal is not None:
+            self.journal.close()
+
+
+class SQLiteStorage:
+    """
+    Storage backend sharing clubs and competitions through SQLite.
+
+    The database runs in WAL mode, so any number of worker processes can
+    read concurrently while one of them writes. Bookings run in a
+    `BEGIN IMMEDIATE` transaction: the rules are checked against the
+    committed rows and applied in the same transaction, so workers can
+    not oversell a competition between them.
+
+    Records are returned as dicts with the same keys as the JSON files.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS clubs (
+            name TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS clubs_email ON clubs (email);
+        CREATE INDEX IF NOT EXISTS clubs_points
+            ON clubs (points DESC, position);
+        CREATE TABLE IF NOT EXISTS competitions (
+            name TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            number_of_places INTEGER NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS competitions_date
+            ON competitions (date, position);
+        CREATE TABLE IF NOT EXISTS reservations (
+            club TEXT NOT NULL,
+            competition TEXT NOT NULL,
+            places INTEGER NOT NULL,
+            PRIMARY KEY (club, competition)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS reservations_competition
+            ON reservations (competition);
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            epoch TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            modified REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, timeout=30.0):
+        """
+        Opens (and creates if needed) the database.
+
+        Parameters:
+        path (str): The path of the database file.
+        timeout (float): Seconds to wait for a concurrent writer.
+        """
+
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        columns = [
+            row[1]
+            for row in connection.execute("PRAGMA table_info(reservations)")
+        ]
+        if columns and "club" not in columns:
+            # Reservations used to be counted per competition only, which
+            # can not be attributed to the clubs that made them.
+            connection.execute("DROP TABLE reservations")
+        connection.executescript(self.SCHEMA)
+        connection.execute(
+            "INSERT OR IGNORE INTO data_version VALUES (0, ?, 0, ?)",
+            (uuid.uuid4().hex[:8], time.time()),
+        )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _club(row):
+        if row is None:
+            return None
+        return Club(*row)
+
+    @staticmethod
+    def _competition(row):
+        if row is None:
+            return None
+        return Competition(*row)
+
+    def import_records(self, competitions, clubs, meta=None):
+        """
+        Fills an empty database with the given records.
+
+        Several workers may start at once: the first one to take the write
+        lock imports the records, the others find the tables filled.
+
+        Parameters:
+        competitions (iterable): The competitions data.
+        clubs (iterable): The clubs data.
+        meta (dict): The other entries of the competitions snapshot,
+        filled by the time the competitions are consumed.
+
+        Returns:
+        bool: True if the records were imported.
+        """
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("SELECT 1 FROM clubs LIMIT 1").fetchone():
+                connection.execute("ROLLBACK")
+                return False
+            connection.executemany(
+                "INSERT INTO competitions VALUES (?, ?, ?, ?)",
+                (
+                    (c["name"], c["date"], int(c["numberOfPlaces"]), i)
+                    for i, c in enumerate(competitions)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO clubs VALUES (?, ?, ?, ?)",
+                (
+                    (c["name"], c["email"], int(c["points"]), i)
+                    for i, c in enumerate(clubs)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO reservations VALUES (?, ?, ?)",
+                (meta or {}).get("reservations", []),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return True
+
+    def club_by_email(self, email):
+        return self._club(
+            self._connection()
+            .execute(
+                "SELECT name, email, points FROM clubs WHERE email = ?"
+                " ORDER BY position LIMIT 1",
+                (email,),
+            )
+            .fetchone()
+        )
+
+    def club_by_name(self, name):
+        return self._club(
+            self._connection()
+            .execute(
+                "SELECT name, email, points FROM clubs WHERE name = ?",
+                (name,),
+            )
+            .fetchone()
+        )
+
+    def competition_by_name(self, name):
+        return self._competition(
+            self._connection()
+            .execute(
+                "SELECT name, date, number_of_places FROM competitions"
+                " WHERE name = ?",
+                (name,),
+            )
+            .fetchone()
+        )
+
+    def competitions(self):
+        rows = self._connection().execute(
+            "SELECT name, date, number_of_places FROM competitions"
+            " ORDER BY position"
+        )
+        return [self._competition(row) for row in rows]
+
+    def clubs(self):
+        rows = self._connection().execute(
+            "SELECT name, email, points FROM clubs ORDER BY position"
+        )
+        return [self._club(row) for row in rows]
+
+    def club_count(self):
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM clubs")
+            .fetchone()[0]
+        )
+
+    def competition_date(self, competition):
+        return parse_date(competition["date"])
+
+    def version(self):
+        """
+        Returns a stamp identifying the current state of the data.
+
+        The stamp is shared by all the workers using the database.
+
+        Returns:
+        tuple: The stamp (str) and the time of the last change (float).
+        """
+
+        epoch, version, modified = (
+            self._connection()
+            .execute("SELECT epoch, version, modified FROM data_version")
+            .fetchone()
+        )
+        return f"{epoch}-{version}", modified
+
+    def _bump_version(self, connection):
+        connection.execute(
+            "UPDATE data_version SET version = version + 1, modified = ?",
+            (time.time(),),
+        )
+
+    def upcoming_competitions(self, now):
+        # Dates are stored in a sortable text format, so the date index
+        # answers range queries without parsing anything.
+        rows = self._connection().execute(
+            "SELECT name, date, number_of_places FROM competitions"
+            " WHERE date >= ? ORDER BY date, position",
+            (now.strftime(DATE_FORMAT),),
+        )
+        return [self._competition(row) for row in rows]
+
+    def past_competitions(self, now):
+        rows = self._connection().execute(
+            "SELECT name, date, number_of_places FROM competitions"
+            " WHERE date < ? ORDER BY date DESC, position DESC",
+            (now.strftime(DATE_FORMAT),),
+        )
+        return [self._competition(row) for row in rows]
+
+    def leaderboard_page(self, offset, limit):
+        """
+        Returns clubs ranked by points, read in order from the points index.
+
+        Parameters:
+        offset (int): The rank of the first club, from 0.
+        limit (int): The maximum number of clubs.
+
+        Returns:
+        list: The clubs, best first.
+        """
+
+        rows = self._connection().execute(
+            "SELECT name, email, points FROM clubs"
+            " ORDER BY points DESC, position LIMIT ? OFFSET ?",
+            (limit, offset),
+        )
+        return [self._club(row) for row in rows]
+
+    def reserved(self, club_name, competition_name):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT places FROM reservations"
+                " WHERE club = ? AND competition = ?",
+                (club_name, competition_name),
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def book(self, club, competition, places):
+        """
+        Atomically checks and applies a booking in one transaction.
+
+        Parameters:
+        club (dict): The booking club.
+        competition (dict): The competition.
+        places (int): The number of places requested.
+
+        Returns:
+        tuple: The updated club and competition.
+
+        Raises:
+        BookingError: If the booking is not allowed.
+        """
+
+        club, competitions = self.book_many(club, [(competition, places)])
+        return club, competitions[0]
+
+    def book_many(self, club, bookings):
+        """
+        Atomically checks and applies several bookings in one transaction.
+
+        Each booking is checked against the rows updated by the previous
+        ones; any rejection rolls the whole transaction back.
+
+        Parameters:
+        club (dict): The booking club.
+        bookings (list): The (competition, places) pairs to book.
+
+        Returns:
+        tuple: The updated club and the list of booked competitions.
+
+        Raises:
+        BookingError: If one of the bookings is not allowed.
+        """
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            booked = []
+            for competition, places in bookings:
+                club = self.club_by_name(club["name"])
+                competition = self.competition_by_name(competition["name"])
+                reserved = self.reserved(club["name"], competition["name"])
+                try:
+                    with timed("validation"):
+                        check_booking(
+                            club,
+                            competition,
+                            places,
+                            ReservationLedger(
+                                [(club["name"], competition["name"], reserved)]
+                            ),
+                        )
+                except BookingError as error:
+                    error.competition = competition["name"]
+                    raise
+                with timed("mutation"):
+                    connection.execute(
+                        "UPDATE clubs SET points = points - ? WHERE name = ?",
+                        (places, club["name"]),
+                    )
+                    connection.execute(
+                        "UPDATE competitions SET number_of_places ="
+                        " number_of_places - ? WHERE name = ?",
+                        (places, competition["name"]),
+                    )
+                    connection.execute(
+                        "INSERT INTO reservations VALUES (?, ?, ?) ON CONFLICT"
+                        " (club, competition) DO UPDATE"
+                        " SET places = places + ?",
+                        (club["name"], competition["name"], places, places),
+                    )
+                booked.append(competition)
+            self._bump_version(connection)
+            club = self.club_by_name(club["name"])
+            booked = [self.competition_by_name(c["name"]) for c in booked]
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return club, booked
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def create_storage(config):
+    """
+    Creates the storage backend selected by the configuration.
+
+    The memory backend loads the binary snapshot, or the JSON snapshots
+    when it is missing or stale, and replays the booking journal on top of
+    them. The SQLite backend imports the JSON files the
+    first time the database is created.
+
+    Parameters:
+    config (dict): The application configuration.
+
+    Returns:
+    MemoryStorage or SQLiteStorage: The storage backend.
+    """
+
+    if config["STORAGE_BACKEND"] not in ("memory", "sqlite"):
+        raise ValueError(
+            f"Unknown storage backend: {config['STORAGE_BACKEND']}"
+        )
+
+    competitions_meta = {}
+    clubs_meta = {}
+    competitions = map(
+        Competition.from_dict,
+        iter_snapshot(COMPETITIONS_FILE, "competitions", competitions_meta),
+    )
+    clubs = map(Club.from_dict, iter_snapshot(CLUBS_FILE, "clubs", clubs_meta))
+
+    if config["STORAGE_BACKEND"] == "sqlite":
+        storage = SQLiteStorage(config["SQLITE_PATH"])
+        if not storage.club_count():
+            # Rows are inserted as the records are parsed.
+            storage.import_records(competitions, clubs, competitions_meta)
+        return storage
+
+    sources = (COMPETITIONS_FILE, CLUBS_FILE)
+    reload_interval = config["HOT_RELOAD_INTERVAL"]
+    snapshot_path = config["SNAPSHOT_PATH"]
+    state = None
+    if snapshot_path:
+        state = load_binary_snapshot(snapshot_path, sources)
+    if state is not None:
+        registry = Registry(state["competitions"], state["clubs"])
+        ledger = ReservationLedger(state["reservations"])
+        competitions_seq = state["competitionsSeq"]
+        clubs_seq = state["clubsSeq"]
+    else:
+        # Records are indexed as they are parsed.
+        registry = Registry.from_iterables(competitions, clubs)
+        # Snapshots from before the ledger only hold per competition
+        # totals ("placesReserved"), which no club can be held to.
+        ledger = ReservationLedger(competitions_meta.get("reservations", []))
+        competitions_seq = competitions_meta.get("journalSeq", 0)
+        clubs_seq = clubs_meta.get("journalSeq", 0)
+        if snapshot_path:
+            write_binary_snapshot(
+                snapshot_path,
+                registry.competitions,
+                registry.clubs,
+                ledger.entries(),
+                competitions_seq,
+                clubs_seq,
+                sources,
+            )
+    # What the JSON snapshots hold, before the journal is replayed.
+    base = (
+        snapshot_base(registry.competitions, registry.clubs)
+        if reload_interval
+        else None
+    )
+    if config["JOURNAL_PATH"]:
+        replay(
+            config["JOURNAL_PATH"],
+            registry,
+            ledger,
+            competitions_seq=competitions_seq,
+            clubs_seq=clubs_seq,
+        )
+    storage = MemoryStorage(
+        ledger=ledger,
+        stripes=config["BOOKING_LOCK_STRIPES"],
+        registry=registry,
+    )
+
+    # Our own writes of the snapshots must not be read back as edits.
+    snapshot_writer = None
+    if reload_interval:
+        storage.watcher = DataWatcher(
+            storage, COMPETITIONS_FILE, CLUBS_FILE, reload_interval, base
+        )
+        snapshot_writer = storage.watcher.own_write
+    flush_interval = config["FLUSH_INTERVAL"]
+    if config["JOURNAL_PATH"]:
+        storage.journal = BookingJournal(
+            config["JOURNAL_PATH"],
+            storage.state,
+            fsync_every=config["JOURNAL_FSYNC_EVERY"],
+            compact_every=config["JOURNAL_COMPACT_EVERY"],
+            clubs_file=CLUBS_FILE,
+            competitions_file=COMPETITIONS_FILE,
+            start_seq=max(competitions_seq, clubs_seq),
+            binary_file=snapshot_path,
+            snapshot_writer=snapshot_writer,
+            locks=storage.locks,
+        )
+    # Compacting the journal copies the whole state under its lock: it is
+    # left to compact_every rather than run on every interval.
+    if flush_interval and storage.journal is None:
+        flush = partial(
+            storage.save, COMPETITIONS_FILE, CLUBS_FILE, snapshot_path
+        )
+        if snapshot_writer is not None:
+            flush = partial(snapshot_writer, flush)
+        storage.flusher = WriteBehindFlusher(flush, flush_interval)
+    return storage
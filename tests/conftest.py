@@ -0,0 +1,4 @@
+import os
+
+# Les tests ne doivent jamais écrire dans le journal des réservations.
+os.environ.setdefault("GUDLFT_CONFIG", "config.TestConfig")
@@ -7,7 +7,7 @@ from utils import load_competitions, load_clubs
 competitions = [
     {
         "name": "test competition soon",
-        "date": "2024-10-22 13:30:00",
+        "date": "2999-10-22 13:30:00",
         "numberOfPlaces": "35",
     }
 ]
@@ -85,6 +85,7 @@ class FunctionalTest(TestCase):
 
         Expected outcome: The booking page for the competition should be displayed.
         """
+        set_test_data(competitions, clubs)
         response = self.client.get(
             "/book/test%20competition%20soon/Simply%20Lift"
         )
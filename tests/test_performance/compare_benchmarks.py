@@ -0,0 +1,55 @@
+"""
+Compares two benchmark result files written by test_benchmarks.py.
+
+Usage:
+    python tests/test_performance/compare_benchmarks.py \
+        result_benchmarks/benchmarks-<old>.json \
+        result_benchmarks/benchmarks-<new>.json
+"""
+
+import json
+import sys
+
+
+def compare(old, new):
+    """
+    Lists the timings found in both results, with their ratio.
+
+    Parameters:
+    old (dict): The reference results.
+    new (dict): The compared results.
+
+    Returns:
+    list: (benchmark, size, old seconds, new seconds, new / old) tuples.
+    """
+
+    rows = []
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        old_sizes = old["results"][name]
+        new_sizes = new["results"][name]
+        for size in sorted(set(old_sizes) & set(new_sizes), key=int):
+            before, after = old_sizes[size], new_sizes[size]
+            rows.append((name, size, before, after, after / before))
+    return rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 2
+    with open(argv[0]) as f:
+        old = json.load(f)
+    with open(argv[1]) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+    for name, size, before, after, ratio in compare(old, new):
+        print(
+            f"{name:32} {size:>8} {before * 1e6:12.1f} us"
+            f" {after * 1e6:12.1f} us  x{ratio:.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
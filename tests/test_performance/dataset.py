@@ -0,0 +1,143 @@
+"""
+Deterministic generator of clubs.json / competitions.json datasets.
+
+Usage:
+    python tests/test_performance/dataset.py --clubs 100000 \
+        --competitions 1000 --out /tmp/gudlft-dataset
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+)
+from utils import DATE_FORMAT, write_snapshot
+
+SEED = 2024
+# The first competition is the one every club rushes to when it opens.
+OPENING_COMPETITION = 0
+OPENING_PLACES = 100
+_FIRST_PAST_DATE = datetime(2020, 1, 1, 9)
+_FIRST_UPCOMING_DATE = datetime(2100, 1, 1, 9)
+
+
+def club_name(index):
+    return f"Club {index:07d}"
+
+
+def club_email(index):
+    return f"club{index:07d}@example.com"
+
+
+def competition_name(index):
+    return f"Competition {index:07d}"
+
+
+def generate_clubs(count, seed=SEED):
+    """
+    Generates clubs with random points, the same for the same seed.
+
+    Parameters:
+    count (int): The number of clubs.
+    seed (int): The random seed.
+
+    Returns:
+    list: The clubs, as stored in clubs.json.
+    """
+
+    rng = random.Random(seed)
+    return [
+        {
+            "name": club_name(i),
+            "email": club_email(i),
+            "points": str(rng.randint(0, 30)),
+        }
+        for i in range(count)
+    ]
+
+
+def generate_competitions(
+    count, seed=SEED, past_ratio=0.2, opening_places=OPENING_PLACES
+):
+    """
+    Generates competitions, the same for the same seed.
+
+    About `past_ratio` of them are already over. The opening competition
+    is always upcoming and offers `opening_places` places.
+
+    Parameters:
+    count (int): The number of competitions.
+    seed (int): The random seed.
+    past_ratio (float): The share of past competitions.
+    opening_places (int): The places of the opening competition.
+
+    Returns:
+    list: The competitions, as stored in competitions.json.
+    """
+
+    rng = random.Random(seed + 1)
+    competitions = []
+    for i in range(count):
+        past = i != OPENING_COMPETITION and rng.random() < past_ratio
+        first_date = _FIRST_PAST_DATE if past else _FIRST_UPCOMING_DATE
+        date = first_date + timedelta(
+            days=rng.randrange(3650), hours=rng.randrange(10)
+        )
+        places = (
+            opening_places if i == OPENING_COMPETITION else rng.randint(5, 40)
+        )
+        competitions.append(
+            {
+                "name": competition_name(i),
+                "date": date.strftime(DATE_FORMAT),
+                "numberOfPlaces": str(places),
+            }
+        )
+    return competitions
+
+
+def write_dataset(directory, clubs, competitions, seed=SEED):
+    """
+    Writes a clubs.json and a competitions.json dataset to a directory.
+
+    Parameters:
+    directory (str): The target directory, created if needed.
+    clubs (int): The number of clubs.
+    competitions (int): The number of competitions.
+    seed (int): The random seed.
+
+    Returns:
+    tuple: The paths of clubs.json and competitions.json.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    clubs_file = os.path.join(directory, "clubs.json")
+    competitions_file = os.path.join(directory, "competitions.json")
+    write_snapshot(clubs_file, "clubs", generate_clubs(clubs, seed))
+    write_snapshot(
+        competitions_file,
+        "competitions",
+        generate_competitions(competitions, seed),
+    )
+    return clubs_file, competitions_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clubs", type=int, default=1000)
+    parser.add_argument("--competitions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", default=".")
+    args = parser.parse_args(argv)
+    for path in write_dataset(
+        args.out, args.clubs, args.competitions, args.seed
+    ):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Runs a locust scenario headless against a server serving a generated
+dataset, writes the CSV stats and checks them against the baselines.
+
+Usage:
+    python tests/test_performance/load_test.py mixed --users 50 \
+        --run-time 60s [--update-baseline]
+
+The exit status is 1 when the p95 latency or the error rate of the run
+regresses past the stored baseline of the scenario.
+"""
+
+import argparse
+import csv
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+sys.path.append(HERE)
+from dataset import OPENING_COMPETITION, competition_name, write_dataset
+
+# Scenario -> locust user classes.
+SCENARIOS = {
+    "mixed": [
+        "BrowsingClub",
+        "LoginHeavyClub",
+        "LeaderboardVisitor",
+        "ApiClient",
+    ],
+    "stampede": ["OpeningStampede"],
+    "waiting_room": ["WaitingRoomStampede"],
+    "login": ["LoginHeavyClub"],
+    "leaderboard": ["LeaderboardVisitor"],
+}
+# Scenarios spawning all their users at once.
+STAMPEDES = ("stampede", "waiting_room")
+# Scenario -> configuration entries overriding config.Config.
+SCENARIO_CONFIG = {
+    "waiting_room": {
+        "WAITING_ROOM_COMPETITIONS": [competition_name(OPENING_COMPETITION)],
+    },
+}
+BASELINES_FILE = os.path.join(HERE, "load_baselines.json")
+# A run regresses when its p95 exceeds the baseline by this ratio (and
+# at least by the slack, as a few milliseconds are noise), or its error
+# rate exceeds the baseline by this many points.
+P95_TOLERANCE = 0.5
+P95_SLACK_MS = 25
+ERROR_RATE_TOLERANCE = 0.01
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_config(directory, overrides):
+    """
+    Writes a configuration module extending config.Config.
+
+    Parameters:
+    directory (str): The working directory of the server.
+    overrides (dict): The configuration entries to override.
+
+    Returns:
+    str: The import path of the configuration class.
+    """
+
+    lines = [
+        "from config import Config",
+        "",
+        "",
+        "class LoadTestConfig(Config):",
+    ]
+    lines += [f"    {key} = {value!r}" for key, value in overrides.items()]
+    with open(os.path.join(directory, "load_test_config.py"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return "load_test_config.LoadTestConfig"
+
+
+def start_server(directory, port, config="config.Config"):
+    """
+    Starts the application in `directory`, where the dataset lives.
+
+    Parameters:
+    directory (str): The working directory of the server.
+    port (int): The port to listen on.
+    config (str): The import path of the configuration class.
+
+    Returns:
+    subprocess.Popen: The server process, once it answers.
+    """
+
+    env = dict(os.environ, GUDLFT_CONFIG=config)
+    env.setdefault("GUDLFT_SECRET_KEY", secrets.token_hex())
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "flask",
+            "--app",
+            os.path.join(ROOT, "server.py"),
+            "run",
+            "--port",
+            str(port),
+        ],
+        cwd=directory,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("The server did not start.")
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("The server did not answer in time.")
+
+
+def run_locust(scenario, host, csv_prefix, users, spawn_rate, run_time, env):
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "locust",
+            "-f",
+            os.path.join(HERE, "locustfile.py"),
+            "--headless",
+            "--only-summary",
+            "--users",
+            str(users),
+            "--spawn-rate",
+            str(spawn_rate),
+            "--run-time",
+            run_time,
+            "--host",
+            host,
+            "--csv",
+            csv_prefix,
+            *SCENARIOS[scenario],
+        ],
+        env=env,
+        check=False,
+    )
+
+
+def read_stats(csv_prefix):
+    """
+    Reads the aggregated figures of a locust run.
+
+    Parameters:
+    csv_prefix (str): The --csv prefix of the run.
+
+    Returns:
+    dict: The request count, error rate, median, p95 and p99 in
+    milliseconds.
+    """
+
+    with open(f"{csv_prefix}_stats.csv", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] == "Aggregated":
+                requests = int(row["Request Count"])
+                failures = int(row["Failure Count"])
+                return {
+                    "requests": requests,
+                    "error_rate": failures / requests if requests else 1.0,
+                    "median_ms": float(row["Median Response Time"]),
+                    "p95_ms": float(row["95%"]),
+                    "p99_ms": float(row["99%"]),
+                }
+    raise ValueError(f"No aggregated stats in {csv_prefix}_stats.csv")
+
+
+def regressions(stats, baseline):
+    """
+    Compares the figures of a run with the baseline of its scenario.
+
+    Parameters:
+    stats (dict): The figures of the run.
+    baseline (dict): The stored figures.
+
+    Returns:
+    list: The regressions, as messages.
+    """
+
+    found = []
+    max_p95 = max(
+        baseline["p95_ms"] * (1 + P95_TOLERANCE),
+        baseline["p95_ms"] + P95_SLACK_MS,
+    )
+    if stats["p95_ms"] > max_p95:
+        found.append(
+            f"p95 {stats['p95_ms']:.0f} ms > {max_p95:.0f} ms"
+            f" (baseline {baseline['p95_ms']:.0f} ms)"
+        )
+    max_error_rate = baseline["error_rate"] + ERROR_RATE_TOLERANCE
+    if stats["error_rate"] > max_error_rate:
+        found.append(
+            f"error rate {stats['error_rate']:.2%} > {max_error_rate:.2%}"
+            f" (baseline {baseline['error_rate']:.2%})"
+        )
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless locust run checked against baselines."
+    )
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument(
+        "--spawn-rate",
+        type=float,
+        help="Users started per second (default: all at once for the"
+        " stampedes, 10 otherwise).",
+    )
+    parser.add_argument("--run-time", default="60s")
+    parser.add_argument("--clubs", type=int, default=1000)
+    parser.add_argument("--competitions", type=int, default=100)
+    parser.add_argument(
+        "--out",
+        default=os.path.join(ROOT, "result_locust"),
+        help="Directory of the CSV stats.",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store this run as the baseline of the scenario.",
+    )
+    args = parser.parse_args(argv)
+    spawn_rate = args.spawn_rate or (
+        args.users if args.scenario in STAMPEDES else 10
+    )
+
+    os.makedirs(args.out, exist_ok=True)
+    csv_prefix = os.path.join(args.out, args.scenario)
+    env = dict(
+        os.environ,
+        GUDLFT_LOAD_CLUBS=str(args.clubs),
+        GUDLFT_LOAD_COMPETITIONS=str(args.competitions),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        write_dataset(directory, args.clubs, args.competitions)
+        config = "config.Config"
+        if args.scenario in SCENARIO_CONFIG:
+            config = write_config(directory, SCENARIO_CONFIG[args.scenario])
+        port = free_port()
+        server = start_server(directory, port, config)
+        try:
+            run_locust(
+                args.scenario,
+                f"http://127.0.0.1:{port}",
+                csv_prefix,
+                args.users,
+                spawn_rate,
+                args.run_time,
+                env,
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    stats = read_stats(csv_prefix)
+    print(
+        f"{args.scenario}: {stats['requests']} requests,"
+        f" {stats['error_rate']:.2%} errors, median {stats['median_ms']:.0f}"
+        f" ms, p95 {stats['p95_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms"
+    )
+
+    baselines = {}
+    if os.path.exists(BASELINES_FILE):
+        with open(BASELINES_FILE) as f:
+            baselines = json.load(f)
+    if args.update_baseline:
+        baselines[args.scenario] = {
+            "p95_ms": stats["p95_ms"],
+            "error_rate": stats["error_rate"],
+            "users": args.users,
+            "clubs": args.clubs,
+            "competitions": args.competitions,
+        }
+        with open(BASELINES_FILE, "w") as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline of {args.scenario} updated.")
+        return 0
+    if args.scenario not in baselines:
+        print(f"No baseline for {args.scenario}, run with --update-baseline.")
+        return 0
+    baseline = baselines[args.scenario]
+    if (baseline["users"], baseline["clubs"], baseline["competitions"]) != (
+        args.users,
+        args.clubs,
+        args.competitions,
+    ):
+        print(
+            f"Warning: the baseline was recorded with {baseline['users']}"
+            f" users, {baseline['clubs']} clubs and"
+            f" {baseline['competitions']} competitions."
+        )
+    found = regressions(stats, baseline)
+    for message in found:
+        print(f"REGRESSION {args.scenario}: {message}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,274 @@
-from locust import HttpUser, task, between
-import sys
+"""
+Load-test scenarios of the GUDLFT site.
+
+The server must serve a dataset generated by dataset.py with the sizes
+given by GUDLFT_LOAD_CLUBS and GUDLFT_LOAD_COMPETITIONS (1000 and 100 by
+default). load_test.py generates it, starts the server and runs the
+scenarios headless. To run them by hand, name the user classes of the
+scenario (all the classes together would mix in the stampede):
+
+    locust -f tests/test_performance/locustfile.py BrowsingClub LoginHeavyClub
+"""
+
+from locust import HttpUser, between, constant, task
+from datetime import datetime
 import os
+import random
+import sys
+import time
 
-sys.path.append(
-    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(os.path.dirname(__file__))
+from dataset import (
+    OPENING_COMPETITION,
+    SEED,
+    club_email,
+    club_name,
+    competition_name,
+    generate_competitions,
 )
-from utils import load_clubs, load_competitions
+from utils import DATE_FORMAT
 
+CLUBS = int(os.environ.get("GUDLFT_LOAD_CLUBS", 1000))
+COMPETITIONS = int(os.environ.get("GUDLFT_LOAD_COMPETITIONS", 100))
+PAGE_SIZE = 50
+
+UPCOMING = [
+    c["name"]
+    for c in generate_competitions(COMPETITIONS, SEED)
+    if datetime.strptime(c["date"], DATE_FORMAT) > datetime.now()
+]
+OPENING = competition_name(OPENING_COMPETITION)
+
+# Rejected bookings (not enough points, sold out, 12 places cap) and
+# rate limited requests are normal outcomes under load, not errors.
+BOOKING_STATUSES = (200, 403, 409, 429)
 
-class LocustTestServer(HttpUser):
-    wait_time = between(1, 5)
-    competition = load_competitions()[0]
-    club = load_clubs()[0]
+
+def expect(response, *statuses):
+    if response.status_code in statuses:
+        response.success()
+    else:
+        response.failure(f"Unexpected status {response.status_code}")
+
+
+class ClubUser(HttpUser):
+    """
+    A secretary of one of the generated clubs.
+    """
+
+    abstract = True
 
     def on_start(self):
-        self.client.get("/", name=".index")
-        self.client.post(
+        index = random.randrange(CLUBS)
+        self.club = club_name(index)
+        self.email = club_email(index)
+        # Bookings are made for the club logged in the session.
+        self.login()
+
+    def login(self):
+        with self.client.post(
             "/showSummary",
-            data={"email": self.club["email"]},
-            name=".show_summary",
-        )
+            data={"email": self.email},
+            name="/showSummary",
+            catch_response=True,
+        ) as response:
+            expect(response, 200)
+
+    def open_booking(self, competition):
+        with self.client.get(
+            f"/book/{competition}/{self.club}",
+            name="/book/[competition]/[club]",
+            catch_response=True,
+        ) as response:
+            expect(response, 200, 304, 429)
+
+    def purchase(self, competition, places):
+        with self.client.post(
+            "/purchasePlaces",
+            data={
+                "club": self.club,
+                "competition": competition,
+                "places": places,
+            },
+            name="/purchasePlaces",
+            catch_response=True,
+        ) as response:
+            expect(response, *BOOKING_STATUSES)
+
+
+class BrowsingClub(ClubUser):
+    """
+    Logs in, browses the upcoming competitions and books a few places.
+    """
+
+    weight = 5
+    wait_time = between(1, 5)
+
+    @task(3)
+    def open_competition(self):
+        self.open_booking(random.choice(UPCOMING))
+
+    @task
+    def book_places(self):
+        self.purchase(random.choice(UPCOMING), random.randint(1, 3))
+
+    @task
+    def welcome_page(self):
+        self.login()
+
+    @task
+    def points_board(self):
+        self.client.get("/pointsBoard", name="/pointsBoard")
+
+
+class LoginHeavyClub(ClubUser):
+    """
+    Logs in again and again, sometimes with an unknown email.
+    """
+
+    weight = 3
+    wait_time = between(0.5, 2)
+
+    @task(9)
+    def known_email(self):
+        self.login()
+
+    @task
+    def unknown_email(self):
+        with self.client.post(
+            "/showSummary",
+            data={"email": "nobody@example.com"},
+            name="/showSummary [unknown]",
+            catch_response=True,
+        ) as response:
+            expect(response, 401)
+
+
+class LeaderboardVisitor(HttpUser):
+    """
+    Pages through the points board, revalidating the pages it has seen.
+    """
+
+    weight = 2
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.etags = {}
 
     @task
-    def get_booking(self):
+    def points_board_page(self):
+        offset = PAGE_SIZE * random.randrange(max(CLUBS // PAGE_SIZE, 1))
+        headers = {}
+        if offset in self.etags:
+            headers["If-None-Match"] = self.etags[offset]
+        with self.client.get(
+            f"/pointsBoard?offset={offset}&limit={PAGE_SIZE}",
+            headers=headers,
+            name="/pointsBoard?offset=[offset]",
+            catch_response=True,
+        ) as response:
+            expect(response, 200, 304)
+            if response.headers.get("ETag"):
+                self.etags[offset] = response.headers["ETag"]
+
+
+class ApiClient(ClubUser):
+    """
+    Uses the JSON API.
+    """
+
+    weight = 2
+    wait_time = between(1, 3)
+
+    @task(3)
+    def competitions(self):
+        self.client.get("/api/v1/competitions", name="/api/v1/competitions")
+
+    @task(2)
+    def points(self):
         self.client.get(
-            f"/book/{self.competition['name']}/{self.club['name']}",
-            name="book",
+            f"/api/v1/clubs/{self.club}/points",
+            name="/api/v1/clubs/[club]/points",
         )
 
     @task
-    def post_booking(self):
-        self.client.post(
-            "/purchasePlaces",
-            data={
-                "places": 0,
-                "club": self.club["name"],
-                "competition": self.competition["name"],
+    def book(self):
+        with self.client.post(
+            "/api/v1/bookings",
+            json={
+                "club": self.club,
+                "competition": random.choice(UPCOMING),
+                "places": 1,
             },
-            name="purchase_places",
-        )
+            name="/api/v1/bookings",
+            catch_response=True,
+        ) as response:
+            expect(response, 201, 403, 409, 429)
+
+
+class OpeningStampede(ClubUser):
+    """
+    Every club rushes to the opening competition as soon as it opens.
+
+    Not part of the mixed population: run it on its own, with all the
+    users spawned at once.
+    """
+
+    wait_time = constant(0)
 
     @task
-    def get_board(self):
-        self.client.get("/pointsBoard", name="points_Board")
+    def rush(self):
+        self.open_booking(OPENING)
+        self.purchase(OPENING, random.randint(1, 2))
+
+
+class WaitingRoomStampede(ClubUser):
+    """
+    Every club rushes to the opening competition, served by a waiting room.
+
+    Each booking is queued through the API, then its ticket is polled
+    until the outcome is known; the time from queuing to outcome is
+    reported as the "waiting room booking" request. The server must list
+    the opening competition in WAITING_ROOM_COMPETITIONS.
+    """
+
+    wait_time = constant(0)
+    poll_interval = 0.2
+
+    @task
+    def rush(self):
+        start = time.perf_counter()
+        with self.client.post(
+            "/api/v1/bookings",
+            json={
+                "club": self.club,
+                "competition": OPENING,
+                "places": random.randint(1, 2),
+            },
+            name="/api/v1/bookings [waiting room]",
+            catch_response=True,
+        ) as response:
+            expect(response, 202, 429, 503)
+        if response.status_code != 202:
+            return
+        poll = response.json()["poll"]
+        while True:
+            time.sleep(self.poll_interval)
+            with self.client.get(
+                poll,
+                name="/api/v1/waitingRoom/[competition]/[ticket]",
+                catch_response=True,
+            ) as polled:
+                expect(polled, 200)
+            if polled.status_code != 200:
+                return
+            if polled.json()["status"] == "done":
+                break
+        self.environment.events.request.fire(
+            request_type="QUEUE",
+            name="waiting room booking",
+            response_time=(time.perf_counter() - start) * 1000,
+            response_length=0,
+            exception=None,
+            context={},
+        )
@@ -0,0 +1,254 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.dirname(__file__))
+from dataset import (
+    club_email,
+    club_name,
+    competition_name,
+    generate_clubs,
+    generate_competitions,
+    write_dataset,
+)
+from leaderboard import Leaderboard
+from server import app, set_test_data
+from storage import MemoryStorage
+from utils import (
+    load_clubs,
+    parse_date,
+    search_club_email,
+    search_club_name,
+    search_competition,
+)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# The benchmarks take most of a minute: they only run when asked for.
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("GUDLFT_BENCH"),
+    reason="set GUDLFT_BENCH=1 to run the benchmarks",
+)
+
+SIZES = [1_000, 100_000]
+if os.environ.get("GUDLFT_BENCH_LARGE"):
+    SIZES.append(1_000_000)
+
+
+def git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=ROOT,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    """
+    Collects the timings and saves them as JSON once the module is done.
+
+    The file is named after the current commit, to compare commits with
+    compare_benchmarks.py, and written to the GUDLFT_BENCH_OUT folder, or
+    to a temporary folder when it is not set. Runs of a subset of the
+    benchmarks on the same commit update the timings they measured.
+    """
+
+    collected = {}
+    yield collected
+    commit = git_commit()
+    results_dir = os.environ.get("GUDLFT_BENCH_OUT") or str(
+        tmp_path_factory.mktemp("benchmarks")
+    )
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"benchmarks-{commit}.json")
+    saved = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)["results"]
+    for name, sizes in collected.items():
+        saved.setdefault(name, {}).update(sizes)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "commit": commit,
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "results": saved,
+            },
+            f,
+            indent=4,
+            sort_keys=True,
+        )
+    print(f"\nBenchmarks saved to {path}")
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}")
+def dataset(request, tmp_path_factory):
+    """
+    A generated dataset of `size` clubs, and a competition per 100 clubs.
+    """
+
+    size = request.param
+    directory = str(tmp_path_factory.mktemp(f"dataset-{size}"))
+    competitions = max(size // 100, 10)
+    write_dataset(directory, size, competitions)
+    return {
+        "size": size,
+        "directory": directory,
+        "clubs": generate_clubs(size),
+        "competitions": generate_competitions(competitions),
+    }
+
+
+def record(results, name, size, seconds):
+    results.setdefault(name, {})[str(size)] = seconds
+    print(f"\n{name} [{size}]: {seconds * 1e6:.1f} us")
+
+
+def best(func, number):
+    """
+    Returns the best time of one call of `func`, in seconds.
+    """
+
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def test_search_benchmarks(dataset, results):
+    """
+    Times the club and competition lookups, through the storage indexes and
+    by scanning the lists.
+
+    Expected outcome: Every searched record is found.
+    """
+
+    size = dataset["size"]
+    clubs = dataset["clubs"]
+    competitions = dataset["competitions"]
+    storage = MemoryStorage(competitions, clubs)
+    # The last records are the worst case of a scan.
+    email = club_email(size - 1)
+    name = club_name(size - 1)
+    competition = competition_name(len(competitions) - 1)
+
+    for label, source, number in (
+        ("index", storage, 10_000),
+        ("scan", clubs, 3),
+    ):
+        assert search_club_email(email, source) is not None
+        assert search_club_name(name, source) is not None
+        record(
+            results,
+            f"search_club_email_{label}",
+            size,
+            best(lambda: search_club_email(email, source), number),
+        )
+        record(
+            results,
+            f"search_club_name_{label}",
+            size,
+            best(lambda: search_club_name(name, source), number),
+        )
+    for label, source in (("index", storage), ("scan", competitions)):
+        assert search_competition(competition, source) is not None
+        record(
+            results,
+            f"search_competition_{label}",
+            size,
+            best(lambda: search_competition(competition, source), 1000),
+        )
+
+
+def test_load_clubs_benchmark(dataset, results, monkeypatch):
+    """
+    Times loading clubs.json.
+
+    Expected outcome: Every club is loaded.
+    """
+
+    monkeypatch.chdir(dataset["directory"])
+    start = time.perf_counter()
+    clubs = load_clubs()
+    record(results, "load_clubs", dataset["size"], time.perf_counter() - start)
+    assert len(clubs) == dataset["size"]
+
+
+def test_points_board_benchmark(dataset, results):
+    """
+    Times ranking the clubs by points and reading the first board page.
+
+    Expected outcome: The first page holds the best clubs.
+    """
+
+    storage = MemoryStorage(dataset["competitions"], dataset["clubs"])
+    start = time.perf_counter()
+    leaderboard = Leaderboard(storage.clubs())
+    record(
+        results,
+        "points_board_ranking",
+        dataset["size"],
+        time.perf_counter() - start,
+    )
+    record(
+        results,
+        "points_board_page",
+        dataset["size"],
+        best(lambda: leaderboard.page(0, 50), 1000),
+    )
+    page = leaderboard.page(0, 50)
+    assert page[0]["points"] == max(c["points"] for c in storage.clubs())
+
+
+def test_purchase_places_benchmark(dataset, results):
+    """
+    Times full purchasePlaces round trips through the test client.
+
+    Every round trip books one place for another club.
+
+    Expected outcome: Every booking succeeds.
+    """
+
+    set_test_data(dataset["competitions"], dataset["clubs"])
+    now = datetime.now()
+    upcoming = [
+        c["name"]
+        for c in dataset["competitions"]
+        if parse_date(c["date"]) > now
+    ]
+    clubs = [c for c in dataset["clubs"] if c["points"] > 0][:50]
+    client = app.test_client()
+    timings = []
+    for n, club in enumerate(clubs):
+        start = time.perf_counter()
+        response = client.post(
+            "/purchasePlaces",
+            data={
+                "club": club["name"],
+                "competition": upcoming[n % len(upcoming)],
+                "places": 1,
+            },
+        )
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        assert b"Great-booking complete!" in response.data
+    timings.sort()
+    record(
+        results,
+        "purchase_places_median",
+        dataset["size"],
+        timings[len(timings) // 2],
+    )
@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+SIZES = [10_000, 100_000]
+if os.environ.get("GUDLFT_BENCH_LARGE"):
+    SIZES.append(1_000_000)
+
+# Creates the memory backend in a fresh interpreter and prints the time
+# it took and whether the binary snapshot was usable at that point.
+STARTER = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import storage
+from snapshot import load_binary_snapshot
+
+storage.CLUBS_FILE = {clubs!r}
+storage.COMPETITIONS_FILE = {competitions!r}
+sources = ({competitions!r}, {clubs!r})
+binary = load_binary_snapshot({snapshot!r}, sources) is not None
+start = time.perf_counter()
+backend = storage.create_storage({{
+    "STORAGE_BACKEND": "memory",
+    "SNAPSHOT_PATH": {snapshot!r},
+    "JOURNAL_PATH": None,
+    "BOOKING_LOCK_STRIPES": 64,
+    "FLUSH_INTERVAL": 0,
+    "HOT_RELOAD_INTERVAL": 0,
+}})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed, "binary": binary, "clubs": backend.club_count()
+}}))
+"""
+
+
+def start(tmp_path):
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            STARTER.format(
+                root=ROOT,
+                clubs=str(tmp_path / "clubs.json"),
+                competitions=str(tmp_path / "competitions.json"),
+                snapshot=str(tmp_path / "state.msgpack"),
+            ),
+        ]
+    )
+    return json.loads(output)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_cold_start_json_and_binary_snapshot(size, tmp_path):
+    """
+    Reports the startup time of the memory backend from the JSON snapshots
+    and from the binary snapshot written by the first start.
+
+    Set GUDLFT_BENCH_LARGE=1 to also measure 1M clubs.
+
+    Expected outcome: The second start uses the binary snapshot.
+    """
+
+    pytest.importorskip("msgpack")
+    with open(tmp_path / "clubs.json", "w") as f:
+        json.dump(
+            {
+                "clubs": [
+                    {
+                        "name": f"Club {i}",
+                        "email": f"club{i}@example.com",
+                        "points": str(i % 50),
+                    }
+                    for i in range(size)
+                ]
+            },
+            f,
+            indent=4,
+        )
+    with open(tmp_path / "competitions.json", "w") as f:
+        json.dump(
+            {
+                "competitions": [
+                    {
+                        "name": f"Competition {i}",
+                        "date": "2999-03-27 10:00:00",
+                        "numberOfPlaces": "25",
+                    }
+                    for i in range(100)
+                ]
+            },
+            f,
+            indent=4,
+        )
+
+    cold = start(tmp_path)
+    warm = start(tmp_path)
+    print(
+        f"\n{size} clubs: JSON start {cold['seconds']:.2f}s"
+        f" (binary snapshot written), binary start {warm['seconds']:.2f}s"
+    )
+    assert not cold["binary"] and warm["binary"]
+    assert cold["clubs"] == warm["clubs"] == size
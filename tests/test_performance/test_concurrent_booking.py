@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+from booking import BookingError, StripedLock, book_places
+from journal import BookingJournal, replay
+from ledger import ReservationLedger
+from registry import Registry
+from utils import load_snapshot
+
+COMPETITIONS = 200
+PLACES_PER_COMPETITION = 10
+
+
+def make_registry(threads):
+    competitions = [
+        {
+            "name": f"Competition {i}",
+            "date": "2030-01-01 10:00:00",
+            "numberOfPlaces": PLACES_PER_COMPETITION,
+        }
+        for i in range(COMPETITIONS)
+    ]
+    clubs = [
+        {"name": f"Club {i}", "email": f"club{i}@example.com", "points": 10**6}
+        for i in range(threads)
+    ]
+    return Registry(competitions, clubs)
+
+
+def open_journal(folder, registry, reserved, locks):
+    return BookingJournal(
+        str(folder / "bookings.journal"),
+        lambda: (registry.competitions, registry.clubs, reserved),
+        fsync_every=8,
+        compact_every=500,
+        clubs_file=str(folder / "clubs.json"),
+        competitions_file=str(folder / "competitions.json"),
+        locks=locks,
+    )
+
+
+def run_stress(threads, journal_folder=None):
+    """
+    Lets `threads` clubs book one place at a time until everything is sold.
+
+    Parameters:
+    threads (int): The number of booking clubs.
+    journal_folder (Path): Where to journal the bookings, if anywhere.
+
+    Returns:
+    tuple: The registry, the reserved places and the successful bookings per second.
+    """
+
+    registry = make_registry(threads)
+    reserved = ReservationLedger()
+    locks = StripedLock()
+    journal = None
+    if journal_folder is not None:
+        journal = open_journal(journal_folder, registry, reserved, locks)
+    booked = [0] * threads
+    start = threading.Barrier(threads)
+
+    def worker(n):
+        club = registry.clubs[n]
+        order = registry.competitions[n:] + registry.competitions[:n]
+        start.wait()
+        for competition in order:
+            while True:
+                try:
+                    book_places(club, competition, 1, reserved, locks, journal)
+                except BookingError:
+                    break
+                booked[n] += 1
+
+    workers = [
+        threading.Thread(target=worker, args=(n,)) for n in range(threads)
+    ]
+    begin = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - begin
+    if journal is not None:
+        journal.close()
+    return registry, reserved, booked, sum(booked) / elapsed
+
+
+@pytest.mark.parametrize("threads", [1, 8, 32])
+def test_no_oversell_under_concurrency(threads):
+    """
+    Test that concurrent bookings never oversell a competition.
+
+    Steps:
+    1. Start `threads` clubs booking one place at a time on every competition.
+    2. Let them run until every competition is sold out.
+    3. Compare places sold, places reserved and points spent.
+
+    Expected outcome: Every place is sold exactly once and no points are lost.
+    """
+
+    registry, reserved, booked, rate = run_stress(threads)
+    print(f"\n{threads} threads: {rate:,.0f} bookings/sec")
+
+    total_places = COMPETITIONS * PLACES_PER_COMPETITION
+    assert sum(booked) == total_places
+    assert all(c["numberOfPlaces"] == 0 for c in registry.competitions)
+    assert all(
+        reserved.competition_total(c["name"]) == PLACES_PER_COMPETITION
+        for c in registry.competitions
+    )
+    spent = sum(10**6 - club["points"] for club in registry.clubs)
+    assert spent == total_places
+
+
+@pytest.mark.parametrize("threads", [8, 32])
+def test_journaled_bookings_survive_restart(tmp_path, threads):
+    """
+    Test concurrent bookings recorded in the journal, with compactions.
+
+    Steps:
+    1. Start `threads` clubs booking through a journal compacted every
+       500 events, until every competition is sold out.
+    2. Reload the snapshots and replay the journal.
+
+    Expected outcome: Nothing is oversold, and the reloaded state is the
+    state left by the bookings.
+    """
+
+    registry, reserved, booked, rate = run_stress(threads, tmp_path)
+    print(f"\n{threads} threads, journaled: {rate:,.0f} bookings/sec")
+
+    assert sum(booked) == COMPETITIONS * PLACES_PER_COMPETITION
+    assert all(c["numberOfPlaces"] == 0 for c in registry.competitions)
+    competitions, meta = load_snapshot(
+        str(tmp_path / "competitions.json"), "competitions"
+    )
+    clubs, clubs_meta = load_snapshot(str(tmp_path / "clubs.json"), "clubs")
+    reloaded = Registry(competitions, clubs)
+    reloaded_reserved = ReservationLedger(meta["reservations"])
+    replay(
+        str(tmp_path / "bookings.journal"),
+        reloaded,
+        reloaded_reserved,
+        competitions_seq=meta["journalSeq"],
+        clubs_seq=clubs_meta["journalSeq"],
+    )
+    assert meta["journalSeq"] == sum(booked)
+    assert [c["points"] for c in reloaded.clubs] == [
+        c["points"] for c in registry.clubs
+    ]
+    assert all(c["numberOfPlaces"] == 0 for c in reloaded.competitions)
+    assert reloaded_reserved.entries() == reserved.entries()
+
+
+def test_single_competition_stampede():
+    """
+    Test that 32 clubs racing for the last places of one competition never oversell it.
+
+    Expected outcome: Exactly the remaining places are booked.
+    """
+
+    registry = make_registry(32)
+    competition = registry.competitions[0]
+    competition["numberOfPlaces"] = 5
+    reserved = ReservationLedger()
+    locks = StripedLock()
+    start = threading.Barrier(32)
+    successes = []
+
+    def worker(club):
+        start.wait()
+        try:
+            book_places(club, competition, 1, reserved, locks)
+            successes.append(club["name"])
+        except BookingError:
+            pass
+
+    workers = [
+        threading.Thread(target=worker, args=(club,))
+        for club in registry.clubs
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert len(successes) == 5
+    assert competition["numberOfPlaces"] == 0
@@ -0,0 +1,46 @@
+import tracemalloc
+
+from records import Club
+
+SIZE = 100_000
+
+
+def allocated(build):
+    tracemalloc.start()
+    try:
+        records = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(records) == SIZE
+    return size
+
+
+def test_club_records_memory():
+    """
+    Reports the memory taken by 100k clubs stored as dicts and as records.
+
+    Field values are shared between both layouts, so only the containers
+    are measured.
+
+    Expected outcome: Records take less memory than dicts.
+    """
+
+    names = [f"Club {i}" for i in range(SIZE)]
+    emails = [f"club{i}@example.com" for i in range(SIZE)]
+    points = [i % 50 for i in range(SIZE)]
+
+    dicts = allocated(
+        lambda: [
+            {"name": n, "email": e, "points": p}
+            for n, e, p in zip(names, emails, points)
+        ]
+    )
+    records = allocated(
+        lambda: [Club(n, e, p) for n, e, p in zip(names, emails, points)]
+    )
+    print(
+        f"\n{SIZE} clubs: dicts {dicts / 1024 / 1024:.1f} MiB,"
+        f" records {records / 1024 / 1024:.1f} MiB"
+    )
+    assert records < dicts
@@ -0,0 +1,99 @@
+import multiprocessing
+import time
+
+import pytest
+from booking import BookingError
+from storage import SQLiteStorage
+
+COMPETITIONS = 500
+CLUBS = 100
+OPERATIONS_PER_WORKER = 400
+
+
+def seed(path):
+    storage = SQLiteStorage(path)
+    storage.import_records(
+        [
+            {
+                "name": f"Competition {i}",
+                "date": "2030-01-01 10:00:00",
+                "numberOfPlaces": 12,
+            }
+            for i in range(COMPETITIONS)
+        ],
+        [
+            {
+                "name": f"Club {i}",
+                "email": f"club{i}@example.com",
+                "points": 10**6,
+            }
+            for i in range(CLUBS)
+        ],
+    )
+    storage.close()
+
+
+def worker(path, worker_id, results):
+    """
+    Runs a mix of logins and bookings, like a gunicorn worker would.
+
+    Every operation looks a club up by email, as `show_summary` does,
+    and every other one also books a place, as `purchasePlaces` does.
+    """
+
+    storage = SQLiteStorage(path)
+    booked = 0
+    for n in range(OPERATIONS_PER_WORKER):
+        i = worker_id * OPERATIONS_PER_WORKER + n
+        club = storage.club_by_email(f"club{i % CLUBS}@example.com")
+        if n % 2:
+            competition = storage.competition_by_name(
+                f"Competition {i % COMPETITIONS}"
+            )
+            try:
+                storage.book(club, competition, 1)
+                booked += 1
+            except BookingError:
+                pass
+    storage.close()
+    results.put(booked)
+
+
+@pytest.mark.parametrize("workers", [1, 4, 8])
+def test_sqlite_throughput_with_workers(workers, tmp_path):
+    """
+    Test that several worker processes share one consistent SQLite state.
+
+    Steps:
+    1. Seed a database, then start `workers` processes on it.
+    2. Each process mixes club lookups and bookings.
+    3. Compare the bookings reported by the workers with the stored state.
+
+    Expected outcome: The stored state accounts for every booking exactly once.
+    """
+
+    path = str(tmp_path / "gudlft.sqlite3")
+    seed(path)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(path, n, results))
+        for n in range(workers)
+    ]
+    begin = time.perf_counter()
+    for process in processes:
+        process.start()
+    booked = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - begin
+    print(
+        f"\n{workers} workers: "
+        f"{workers * OPERATIONS_PER_WORKER / elapsed:,.0f} operations/sec"
+    )
+
+    storage = SQLiteStorage(path)
+    remaining = sum(c["numberOfPlaces"] for c in storage.competitions())
+    spent = sum(10**6 - c["points"] for c in storage.clubs())
+    storage.close()
+    assert COMPETITIONS * 12 - remaining == booked
+    assert spent == booked
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+SIZES = [10_000, 100_000]
+if os.environ.get("GUDLFT_BENCH_LARGE"):
+    SIZES.append(1_000_000)
+
+# Loads a clubs file in a fresh interpreter and prints the load time and
+# the peak resident set size of the process.
+LOADER = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from registry import Registry
+from json_stream import iter_snapshot
+
+start = time.perf_counter()
+if {streaming!r}:
+    registry = Registry.from_iterables([], iter_snapshot({path!r}, "clubs"))
+else:
+    with open({path!r}) as f:
+        registry = Registry([], json.load(f)["clubs"])
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "peak_kib": peak, "clubs": len(registry.clubs)}}))
+"""
+
+
+def measure(path, streaming):
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            LOADER.format(root=ROOT, path=path, streaming=streaming),
+        ]
+    )
+    return json.loads(output)
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32", reason="peak RSS is read with resource"
+)
+@pytest.mark.parametrize("size", SIZES)
+def test_streaming_loader_time_and_memory(size, tmp_path):
+    """
+    Reports load time and peak RSS of the streaming and json.load loaders.
+
+    Set GUDLFT_BENCH_LARGE=1 to also measure 1M records.
+
+    Expected outcome: Both loaders index every club.
+    """
+
+    path = str(tmp_path / "clubs.json")
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "clubs": [
+                    {
+                        "name": f"Club {i}",
+                        "email": f"club{i}@example.com",
+                        "points": str(i % 50),
+                    }
+                    for i in range(size)
+                ]
+            },
+            f,
+            indent=4,
+        )
+
+    for streaming in (False, True):
+        result = measure(path, streaming)
+        label = "streaming" if streaming else "json.load"
+        print(
+            f"\n{size} clubs, {label}: {result['seconds']:.2f}s,"
+            f" peak RSS {result['peak_kib'] / 1024:.0f} MiB"
+        )
+        assert result["clubs"] == size
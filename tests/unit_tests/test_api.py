@@ -0,0 +1,142 @@
+import pytest
+from server import app, set_test_data
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Spring Festival",
+                "date": "2020-03-27 10:00:00",
+                "numberOfPlaces": "25",
+            },
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "10",
+            },
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "13",
+            },
+            {
+                "name": "Iron Temple",
+                "email": "admin@irontemple.com",
+                "points": "4",
+            },
+        ],
+    )
+    with app.test_client() as client:
+        yield client
+
+
+def book(client, **data):
+    body = {"club": "Simply Lift", "competition": "Winter Open", "places": 2}
+    body.update(data)
+    return client.post("/api/v1/bookings", json=body)
+
+
+def test_list_upcoming_competitions(client):
+    """
+    Test listing the competitions through the API.
+
+    Expected outcome: Only upcoming competitions are listed, with integer places, in compact JSON.
+    """
+
+    response = client.get("/api/v1/competitions")
+    assert response.status_code == 200
+    assert response.json == {
+        "competitions": [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": 10,
+            }
+        ]
+    }
+    assert b", " not in response.data
+    response = client.get("/api/v1/competitions?status=all")
+    assert len(response.json["competitions"]) == 2
+
+
+def test_club_points(client):
+    """
+    Test reading the points of a club through the API.
+
+    Expected outcome: Known clubs return their points, unknown clubs a 404.
+    """
+
+    response = client.get("/api/v1/clubs/Iron%20Temple/points")
+    assert response.json == {"name": "Iron Temple", "points": 4}
+    assert client.get("/api/v1/clubs/Unknown/points").status_code == 404
+
+
+def test_book_places(client):
+    """
+    Test a successful booking through the API.
+
+    Expected outcome: 201 with the updated club points and remaining places.
+    """
+
+    response = book(client)
+    assert response.status_code == 201
+    assert response.json["club"] == {"name": "Simply Lift", "points": 11}
+    assert response.json["competition"]["numberOfPlaces"] == 8
+
+
+@pytest.mark.parametrize(
+    "data, status_code, reason",
+    [
+        ({"club": "Iron Temple", "places": 5}, 403, "points"),
+        ({"places": 11}, 409, "sold_out"),
+        ({"places": -1}, 400, "negative"),
+        ({"competition": "Spring Festival"}, 400, "past"),
+        ({"places": "2"}, 400, "invalid"),
+        ({"club": "Unknown"}, 404, "not_found"),
+    ],
+)
+def test_booking_rules(client, data, status_code, reason):
+    """
+    Test that the API enforces the same rules as purchasePlaces.
+
+    Expected outcome: Each rejected booking returns its reason and status code.
+    """
+
+    response = book(client, **data)
+    assert response.status_code == status_code
+    assert response.json["error"] == reason
+
+
+def test_cap_total_is_an_error(client):
+    """
+    Test that going over 12 places in total is reported as an error by the API.
+
+    Expected outcome: The second booking is rejected with 403.
+    """
+
+    client.application.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "30",
+            }
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "30",
+            }
+        ],
+    )
+    assert book(client, places=10).status_code == 201
+    response = book(client, places=5)
+    assert response.status_code == 403
+    assert response.json["error"] == "cap_total"
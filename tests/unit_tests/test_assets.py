@@ -0,0 +1,101 @@
+import gzip
+import os
+
+import brotli
+import pytest
+import server
+from assets import AssetManifest, create_assets
+from server import app
+
+STYLES = b"body { color: #333; }\n" * 50
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    static = tmp_path / "static"
+    (static / "img").mkdir(parents=True)
+    (static / "styles.css").write_bytes(STYLES)
+    (static / "img" / "dot.txt").write_bytes(b".")
+    return str(static)
+
+
+@pytest.fixture
+def client(static_dir, tmp_path, monkeypatch):
+    app.config["TESTING"] = True
+    assets = AssetManifest(static_dir, str(tmp_path / "build"))
+    monkeypatch.setattr(server, "assets", assets)
+    with app.test_client() as client:
+        yield client, assets
+
+
+def test_manifest_fingerprints_and_compresses(static_dir, tmp_path):
+    """
+    Test the build of the fingerprinted files.
+
+    Expected outcome: The names hold the content hash, the variants
+    decompress to the file, tiny files are not compressed, and a changed
+    file gets a new name.
+    """
+
+    build = str(tmp_path / "build")
+    assets = AssetManifest(static_dir, build)
+    hashed = assets.names["styles.css"]
+    assert hashed.startswith("styles.") and hashed.endswith(".css")
+    path = os.path.join(build, hashed)
+    with open(path + ".br", "rb") as f:
+        assert brotli.decompress(f.read()) == STYLES
+    with open(path + ".gz", "rb") as f:
+        assert gzip.decompress(f.read()) == STYLES
+    dot = assets.names["img/dot.txt"]
+    assert assets.variant(dot, {"br", "gzip"}) == (
+        os.path.join(build, dot),
+        None,
+    )
+
+    with open(os.path.join(static_dir, "styles.css"), "ab") as f:
+        f.write(b"h1 { margin: 0; }\n")
+    assert AssetManifest(static_dir, build).names["styles.css"] != hashed
+    assert create_assets({"STATIC_BUILD_DIR": None}, static_dir) is None
+
+
+@pytest.mark.parametrize(
+    "accept, encoding, decode",
+    [
+        ("gzip, deflate, br", "br", brotli.decompress),
+        ("gzip", "gzip", gzip.decompress),
+        ("identity", None, bytes),
+    ],
+)
+def test_asset_encoding_negotiation(client, accept, encoding, decode):
+    """
+    Test serving a fingerprinted file to clients accepting encodings.
+
+    Expected outcome: The best accepted variant is served with its
+    Content-Encoding, as CSS, and cached as immutable.
+    """
+
+    client, assets = client
+    url = f"/assets/{assets.names['styles.css']}"
+    response = client.get(url, headers={"Accept-Encoding": accept})
+    assert response.status_code == 200
+    assert response.content_encoding == encoding
+    assert response.mimetype == "text/css"
+    assert "Accept-Encoding" in response.vary
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == app.config["ASSETS_MAX_AGE"]
+    assert decode(response.get_data()) == STYLES
+
+
+def test_templates_use_fingerprinted_urls(client):
+    """
+    Test the asset_url helper in the pages and unknown asset names.
+
+    Expected outcome: Pages link the fingerprinted stylesheet, and
+    unknown or unhashed names are not found.
+    """
+
+    client, assets = client
+    response = client.get("/")
+    assert f"/assets/{assets.names['styles.css']}".encode() in response.data
+    assert client.get("/assets/styles.css").status_code == 404
+    assert client.get("/assets/../config.py").status_code == 404
@@ -0,0 +1,135 @@
+import pytest
+from server import app, set_test_data
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "20",
+            },
+            {
+                "name": "Summer Cup",
+                "date": "2999-07-01 10:00:00",
+                "numberOfPlaces": "3",
+            },
+            {
+                "name": "Spring Festival",
+                "date": "2020-03-27 10:00:00",
+                "numberOfPlaces": "25",
+            },
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "13",
+            }
+        ],
+    )
+    with app.test_client() as client:
+        yield client
+
+
+def book(client, *bookings):
+    return client.post(
+        "/api/v1/bookings/batch",
+        json={
+            "club": "Simply Lift",
+            "bookings": [
+                {"competition": name, "places": places}
+                for name, places in bookings
+            ],
+        },
+    )
+
+
+def places(client):
+    response = client.get("/api/v1/competitions?status=all")
+    return {
+        c["name"]: c["numberOfPlaces"] for c in response.json["competitions"]
+    }
+
+
+def test_batch_is_applied(client):
+    """
+    Test a batch booking in two competitions.
+
+    Expected outcome: 201, with the points and places of both bookings deducted.
+    """
+
+    response = book(client, ("Winter Open", 4), ("Summer Cup", 3))
+    assert response.status_code == 201
+    assert response.json["club"]["points"] == 6
+    assert places(client) == {
+        "Winter Open": 16,
+        "Summer Cup": 0,
+        "Spring Festival": 25,
+    }
+
+
+@pytest.mark.parametrize(
+    "bookings, status_code, reason, competition",
+    [
+        (
+            (("Winter Open", 4), ("Summer Cup", 4)),
+            409,
+            "sold_out",
+            "Summer Cup",
+        ),
+        (
+            (("Winter Open", 8), ("Summer Cup", 3), ("Winter Open", 3)),
+            403,
+            "points",
+            "Winter Open",
+        ),
+        (
+            (("Winter Open", 7), ("Winter Open", 6)),
+            403,
+            "cap_total",
+            "Winter Open",
+        ),
+        (
+            (("Winter Open", 1), ("Spring Festival", 1)),
+            400,
+            "past",
+            "Spring Festival",
+        ),
+    ],
+)
+def test_batch_is_all_or_nothing(
+    client, bookings, status_code, reason, competition
+):
+    """
+    Test that one rejected booking cancels the whole batch.
+
+    Expected outcome: The error names the rejected competition and nothing is booked.
+    """
+
+    response = book(client, *bookings)
+    assert response.status_code == status_code
+    assert response.json["error"] == reason
+    assert response.json["competition"] == competition
+    assert places(client) == {
+        "Winter Open": 20,
+        "Summer Cup": 3,
+        "Spring Festival": 25,
+    }
+    points = client.get("/api/v1/clubs/Simply%20Lift/points").json["points"]
+    assert points == 13
+
+
+def test_batch_requires_bookings(client):
+    """
+    Test that an empty batch is rejected.
+
+    Expected outcome: 400 invalid.
+    """
+
+    response = book(client)
+    assert response.status_code == 400
+    assert response.json["error"] == "invalid"
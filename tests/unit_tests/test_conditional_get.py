@@ -0,0 +1,150 @@
+import time
+
+import pytest
+import server
+from server import app, set_test_data
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "10",
+            }
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "10",
+            }
+        ],
+    )
+    with app.test_client() as client:
+        yield client
+
+
+def test_points_board_not_modified(client):
+    """
+    Test that a conditional GET with the current ETag gets a 304 response.
+
+    Expected outcome: The page is sent once, then answered with 304 and an empty body.
+    """
+
+    response = client.get("/pointsBoard")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.get("/pointsBoard", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_booking_changes_etag(client):
+    """
+    Test that a successful booking invalidates the ETag of read-only pages.
+
+    Expected outcome: The old ETag no longer matches after a booking.
+    """
+
+    etag = client.get("/").headers["ETag"]
+    client.post(
+        "/purchasePlaces",
+        data={
+            "competition": "Winter Open",
+            "club": "Simply Lift",
+            "places": "1",
+        },
+    )
+    # Consume the flashed booking message.
+    client.get("/")
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_error_pages_are_not_tagged(client):
+    """
+    Test that error responses are neither tagged nor answered with 304.
+
+    Expected outcome: Booking an unknown competition returns 400 without ETag.
+    """
+
+    response = client.get("/book/Unknown/Simply%20Lift")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+
+
+def test_last_modified_once_the_second_is_over(client, monkeypatch):
+    """
+    Test Last-Modified around the second of the last change.
+
+    Steps:
+    1. Get a page in the second of the last change.
+    2. Get it again once the second is over, then revalidate it by date.
+
+    Expected outcome: Last-Modified is only sent, and If-Modified-Since
+    only honoured, once no booking can share its second.
+    """
+
+    now = time.time()
+    monkeypatch.setattr(server.storage, "_modified", now)
+    monkeypatch.setattr(time, "time", lambda: now)
+    response = client.get("/pointsBoard")
+    assert "Last-Modified" not in response.headers
+    response = client.get(
+        "/pointsBoard",
+        headers={"If-Modified-Since": "Fri, 31 Dec 2999 00:00:00 GMT"},
+    )
+    assert response.status_code == 200
+
+    monkeypatch.setattr(time, "time", lambda: now + 1)
+    response = client.get("/pointsBoard")
+    last_modified = response.headers["Last-Modified"]
+    response = client.get(
+        "/pointsBoard", headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+
+
+def test_booking_form_is_not_tagged(client):
+    """
+    Test the booking form of a competition.
+
+    Expected outcome: The booking page is never answered from the client
+    cache, since its competition may start while it is cached.
+    """
+
+    response = client.get("/book/Winter Open/Simply Lift")
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+def test_started_competition_leaves_upcoming_list(client):
+    """
+    Test the JSON list of upcoming competitions once one has started.
+
+    Expected outcome: The list is not tagged with the data version, so a
+    client sending its previous validators gets the new list.
+    """
+
+    response = client.get("/api/v1/competitions")
+    assert [c["name"] for c in response.json["competitions"]] == [
+        "Winter Open"
+    ]
+    assert "ETag" not in response.headers
+
+    competition = server.storage.competition_by_name("Winter Open")
+    server.storage.registry.update_competition(
+        "Winter Open", date="2000-01-15 09:00:00"
+    )
+    server.storage.schedule.add(competition)
+    response = client.get(
+        "/api/v1/competitions", headers={"If-None-Match": "*"}
+    )
+    assert response.status_code == 200
+    assert response.json["competitions"] == []
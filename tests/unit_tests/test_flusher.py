@@ -0,0 +1,146 @@
+import os
+import threading
+
+import pytest
+from flusher import WriteBehindFlusher
+from metrics import FLUSH_DURATION, FLUSH_FAILURES
+from storage import create_storage
+from utils import load_snapshot, write_snapshot
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    competitions_file = str(tmp_path / "competitions.json")
+    clubs_file = str(tmp_path / "clubs.json")
+    write_snapshot(
+        competitions_file,
+        "competitions",
+        [
+            {
+                "name": "Spring Festival",
+                "date": "2999-03-27 10:00:00",
+                "numberOfPlaces": 25,
+            }
+        ],
+    )
+    write_snapshot(
+        clubs_file,
+        "clubs",
+        [{"name": "Simply Lift", "email": "john@simplylift.co", "points": 13}],
+    )
+    monkeypatch.setattr("storage.COMPETITIONS_FILE", competitions_file)
+    monkeypatch.setattr("storage.CLUBS_FILE", clubs_file)
+    return tmp_path, competitions_file, clubs_file
+
+
+def make_config(tmp_path, journal):
+    return {
+        "STORAGE_BACKEND": "memory",
+        "SNAPSHOT_PATH": str(tmp_path / "state.msgpack"),
+        "JOURNAL_PATH": (
+            str(tmp_path / "bookings.journal") if journal else None
+        ),
+        "JOURNAL_FSYNC_EVERY": 1,
+        "JOURNAL_COMPACT_EVERY": 1000,
+        "BOOKING_LOCK_STRIPES": 4,
+        "FLUSH_INTERVAL": 3600,
+        "HOT_RELOAD_INTERVAL": 0,
+    }
+
+
+def test_flusher_coalesces_changes():
+    """
+    Test that the changes made between two flushes are written once.
+
+    Expected outcome: One flush for many changes, none when nothing
+    changed, and the flush duration is recorded.
+    """
+
+    flushes = []
+    flusher = WriteBehindFlusher(lambda: flushes.append(1), 3600)
+    count = FLUSH_DURATION.count()
+    for n in range(100):
+        flusher.mark_dirty(f"Club {n % 10}", "Spring Festival")
+    assert flusher.pending() == (10, 1)
+
+    assert flusher.flush_now()
+    assert not flusher.flush_now()
+    assert flushes == [1]
+    assert flusher.pending() == (0, 0)
+    assert FLUSH_DURATION.count() == count + 1
+    flusher.close()
+    assert flushes == [1]
+
+
+def test_failed_flush_keeps_changes_dirty():
+    """
+    Test that a failing flush is retried with the changes it missed.
+
+    Expected outcome: The changes stay dirty and the failure is counted.
+    """
+
+    def fail():
+        raise OSError("disk full")
+
+    flusher = WriteBehindFlusher(fail, 3600)
+    failures = FLUSH_FAILURES.value()
+    flusher.mark_dirty("Simply Lift", "Spring Festival")
+    assert not flusher.flush_now()
+    assert flusher.pending() == (1, 1)
+    assert FLUSH_FAILURES.value() == failures + 1
+    flusher.flush = lambda: None
+    flusher.close()
+    assert flusher.pending() == (0, 0)
+
+
+def test_flusher_runs_in_background():
+    """
+    Test that the worker flushes on its own once per interval.
+
+    Expected outcome: A change is flushed without any explicit call.
+    """
+
+    flushed = threading.Event()
+    flusher = WriteBehindFlusher(flushed.set, 0.01)
+    flusher.mark_dirty("Simply Lift", "Spring Festival")
+    assert flushed.wait(5)
+    flusher.close()
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_storage_writes_bookings_behind(files, journal):
+    """
+    Test the write-behind persistence of the memory backend.
+
+    Steps:
+    1. Book places; the snapshots are not written on the request thread.
+    2. Close the backend, which flushes the pending changes.
+    3. Start a new backend from the files.
+
+    Expected outcome: The snapshots hold the booking, no temporary file
+    is left, and the new backend starts from the booked state. With the
+    journal, its compactions write the snapshots instead of a flusher.
+    """
+
+    tmp_path, competitions_file, clubs_file = files
+    storage = create_storage(make_config(tmp_path, journal))
+    assert (storage.flusher is None) == journal
+    club = storage.club_by_name("Simply Lift")
+    competition = storage.competition_by_name("Spring Festival")
+    storage.book(club, competition, 2)
+    storage.book(club, competition, 3)
+    clubs, _ = load_snapshot(clubs_file, "clubs")
+    assert clubs[0]["points"] == 13
+    storage.close()
+
+    clubs, _ = load_snapshot(clubs_file, "clubs")
+    competitions, meta = load_snapshot(competitions_file, "competitions")
+    assert clubs[0]["points"] == 8
+    assert competitions[0]["numberOfPlaces"] == 20
+    assert meta["reservations"] == [["Simply Lift", "Spring Festival", 5]]
+    assert not [name for name in os.listdir(tmp_path) if ".tmp" in name]
+
+    storage = create_storage(make_config(tmp_path, journal))
+    assert storage.club_by_name("Simply Lift")["points"] == 8
+    assert storage.ledger.held("Simply Lift", "Spring Festival") == 5
+    storage.close()
@@ -0,0 +1,105 @@
+import pytest
+import server
+from fragments import FragmentCache
+from server import app, set_test_data
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "10",
+            },
+            {
+                "name": "Summer Cup",
+                "date": "2999-07-01 10:00:00",
+                "numberOfPlaces": "5",
+            },
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "10",
+            },
+            {
+                "name": "She & Lifts",
+                "email": "kate@shelifts.co.uk",
+                "points": "8",
+            },
+        ],
+    )
+    server.competition_rows.clear()
+    with app.test_client() as client:
+        yield client
+
+
+def test_fragment_cache_versions():
+    """
+    Test that a fragment is re-rendered only when its version changes.
+
+    Expected outcome: Same version hits the cache, a new version misses it.
+    """
+
+    cache = FragmentCache()
+    assert cache.get("a", (1,), lambda: "one") == "one"
+    assert cache.get("a", (1,), lambda: "stale") == "one"
+    assert cache.get("a", (2,), lambda: "two") == "two"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_fragment_cache_is_bounded():
+    """
+    Test that the cache drops its oldest fragments when full.
+
+    Expected outcome: The cache never holds more than maxsize fragments.
+    """
+
+    cache = FragmentCache(maxsize=2)
+    for key in "abc":
+        cache.get(key, (0,), lambda: key)
+    assert cache.get("a", (0,), lambda: "again") == "again"
+
+
+def test_rows_are_shared_between_clubs(client):
+    """
+    Test that logins of different clubs reuse the same cached rows.
+
+    Expected outcome: The second login hits the cache and gets its own booking links.
+    """
+
+    client.post("/showSummary", data={"email": "john@simplylift.co"})
+    hits, misses = server.competition_rows.hits, server.competition_rows.misses
+    response = client.post(
+        "/showSummary", data={"email": "kate@shelifts.co.uk"}
+    )
+    assert server.competition_rows.misses == misses
+    assert server.competition_rows.hits == hits + 2
+    assert b"/book/Winter%20Open/She%20&amp;%20Lifts" in response.data
+    assert b"Simply%20Lift" not in response.data
+
+
+def test_booking_invalidates_only_its_row(client):
+    """
+    Test that a booking re-renders only the row of the booked competition.
+
+    Expected outcome: One miss for the booked competition, one hit for the other.
+    """
+
+    client.post("/showSummary", data={"email": "john@simplylift.co"})
+    hits, misses = server.competition_rows.hits, server.competition_rows.misses
+    response = client.post(
+        "/purchasePlaces",
+        data={
+            "competition": "Summer Cup",
+            "club": "Simply Lift",
+            "places": "2",
+        },
+    )
+    assert server.competition_rows.misses == misses + 1
+    assert server.competition_rows.hits == hits + 1
+    assert b"Number of Places: 3" in response.data
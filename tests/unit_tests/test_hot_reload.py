@@ -0,0 +1,190 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+from metrics import DATA_RELOADS
+from storage import create_storage
+from utils import load_snapshot, write_snapshot
+
+SPRING_FESTIVAL = {
+    "name": "Spring Festival",
+    "date": "2999-03-27 10:00:00",
+    "numberOfPlaces": 25,
+}
+SIMPLY_LIFT = {
+    "name": "Simply Lift",
+    "email": "john@simplylift.co",
+    "points": 13,
+}
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    competitions_file = str(tmp_path / "competitions.json")
+    clubs_file = str(tmp_path / "clubs.json")
+    write_snapshot(competitions_file, "competitions", [SPRING_FESTIVAL])
+    write_snapshot(clubs_file, "clubs", [SIMPLY_LIFT])
+    monkeypatch.setattr("storage.COMPETITIONS_FILE", competitions_file)
+    monkeypatch.setattr("storage.CLUBS_FILE", clubs_file)
+    return tmp_path, competitions_file, clubs_file
+
+
+def make_config(tmp_path, interval=3600, flush_interval=0, journal=False):
+    return {
+        "STORAGE_BACKEND": "memory",
+        "SNAPSHOT_PATH": None,
+        "JOURNAL_PATH": (
+            str(tmp_path / "bookings.journal") if journal else None
+        ),
+        "JOURNAL_FSYNC_EVERY": 1,
+        "JOURNAL_COMPACT_EVERY": 1,
+        "BOOKING_LOCK_STRIPES": 4,
+        "FLUSH_INTERVAL": flush_interval,
+        "HOT_RELOAD_INTERVAL": interval,
+    }
+
+
+def edit(path, kind, records):
+    """
+    Rewrites a snapshot as an administrator would, with a later mtime.
+    """
+
+    mtime = os.stat(path).st_mtime_ns
+    write_snapshot(path, kind, records)
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+def test_edits_are_merged_into_live_state(files):
+    """
+    Test that edits of the snapshots reach a running backend.
+
+    Steps:
+    1. Book 2 places.
+    2. Add places and points in the files, and a new club and
+       competition.
+
+    Expected outcome: The added places and points are merged with the
+    booking, the new records are indexed, and the version changes.
+    """
+
+    tmp_path, competitions_file, clubs_file = files
+    storage = create_storage(make_config(tmp_path))
+    club = storage.club_by_name("Simply Lift")
+    competition = storage.competition_by_name("Spring Festival")
+    storage.book(club, competition, 2)
+    version = storage.version()
+
+    edit(
+        competitions_file,
+        "competitions",
+        [
+            dict(SPRING_FESTIVAL, numberOfPlaces=30),
+            {
+                "name": "Summer Cup",
+                "date": "2999-06-01 10:00:00",
+                "numberOfPlaces": 12,
+            },
+        ],
+    )
+    edit(
+        clubs_file,
+        "clubs",
+        [
+            dict(SIMPLY_LIFT, points=20),
+            {"name": "Iron Temple", "email": "admin@it.com", "points": 40},
+        ],
+    )
+    assert storage.watcher.check() == 4
+    assert storage.watcher.check() == 0
+
+    assert competition["numberOfPlaces"] == 28
+    assert club["points"] == 18
+    assert storage.ledger.held("Simply Lift", "Spring Festival") == 2
+    upcoming = storage.upcoming_competitions(datetime(2000, 1, 1))
+    assert [c["name"] for c in upcoming] == ["Spring Festival", "Summer Cup"]
+    assert storage.club_by_email("admin@it.com")["points"] == 40
+    ranking = storage.leaderboard_page(0, 10)
+    assert [c["name"] for c in ranking] == ["Iron Temple", "Simply Lift"]
+    assert storage.version() != version
+    storage.close()
+
+
+def test_removals_and_invalid_edits(files):
+    """
+    Test removed records and files saved halfway through an edit.
+
+    Expected outcome: A removed competition is unscheduled, an email
+    change re-indexes its club, and an invalid file changes nothing.
+    """
+
+    tmp_path, competitions_file, clubs_file = files
+    storage = create_storage(make_config(tmp_path))
+    invalid = DATA_RELOADS.value("clubs", "invalid")
+
+    edit(competitions_file, "competitions", [])
+    edit(clubs_file, "clubs", [dict(SIMPLY_LIFT, email="new@simplylift.co")])
+    assert storage.watcher.check() == 2
+    assert storage.competition_by_name("Spring Festival") is None
+    assert storage.upcoming_competitions(datetime(2000, 1, 1)) == []
+    assert storage.club_by_email("john@simplylift.co") is None
+    assert storage.club_by_email("new@simplylift.co")["points"] == 13
+
+    mtime = os.stat(clubs_file).st_mtime_ns
+    with open(clubs_file, "w") as file:
+        file.write('{"clubs": [{"name": "Simply Lift", "points"')
+    os.utime(clubs_file, ns=(mtime + 10**9, mtime + 10**9))
+    assert storage.watcher.check() == 0
+    assert DATA_RELOADS.value("clubs", "invalid") == invalid + 1
+    assert storage.club_by_name("Simply Lift")["points"] == 13
+    storage.close()
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_own_writes_are_not_read_back(files, journal):
+    """
+    Test that the snapshots written by the backend are not merged again.
+
+    Steps:
+    1. Book 2 places and flush them to the snapshots.
+    2. Edit the flushed snapshot by adding points.
+
+    Expected outcome: The flush is not merged as an edit, and the edit is
+    merged once on top of the flushed state.
+    """
+
+    tmp_path, competitions_file, clubs_file = files
+    config = make_config(tmp_path, flush_interval=3600, journal=journal)
+    storage = create_storage(config)
+    club = storage.club_by_name("Simply Lift")
+    storage.book(club, storage.competition_by_name("Spring Festival"), 2)
+    if journal:
+        storage.journal.compact_in_background().join()
+    else:
+        assert storage.flusher.flush_now()
+    assert storage.watcher.check() == 0
+    assert club["points"] == 11
+
+    clubs, meta = load_snapshot(clubs_file, "clubs")
+    clubs[0]["points"] += 5
+    edit(clubs_file, "clubs", clubs)
+    assert storage.watcher.check() == 1
+    assert club["points"] == 16
+    storage.close()
+
+
+def test_watcher_polls_in_background(files):
+    """
+    Test that the watcher merges edits on its own.
+
+    Expected outcome: An edit is merged without any explicit call.
+    """
+
+    tmp_path, competitions_file, clubs_file = files
+    storage = create_storage(make_config(tmp_path, interval=0.01))
+    edit(clubs_file, "clubs", [dict(SIMPLY_LIFT, points=30)])
+    deadline = time.monotonic() + 5
+    while storage.club_by_name("Simply Lift")["points"] != 30:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    storage.close()
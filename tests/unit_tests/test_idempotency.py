@@ -0,0 +1,236 @@
+import threading
+
+import pytest
+import server
+from idempotency import (
+    IdempotencyCache,
+    IdempotencyInProgress,
+    IdempotencyMismatch,
+)
+from server import app, set_test_data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def records():
+    competitions = [
+        {
+            "name": "Winter Open",
+            "date": "2999-01-15 09:00:00",
+            "numberOfPlaces": "25",
+        }
+    ]
+    clubs = [
+        {"name": "Simply Lift", "email": "john@simplylift.co", "points": "13"}
+    ]
+    app.config["TESTING"] = True
+    set_test_data(competitions, clubs)
+    return competitions[0], clubs[0]
+
+
+def test_cache_runs_once_per_key():
+    """
+    Test that a key runs its function once until it expires.
+
+    Expected outcome: The outcome is replayed within the TTL and computed
+    again after it.
+    """
+
+    clock = FakeClock()
+    cache = IdempotencyCache(maxsize=10, ttl=60, clock=clock)
+    calls = []
+
+    def func():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.run("k", "a", func) == (1, False)
+    clock.now = 59
+    assert cache.run("k", "a", func) == (1, True)
+    clock.now = 61
+    assert cache.run("k", "a", func) == (2, False)
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    Test that the cache keeps at most `maxsize` keys.
+
+    Expected outcome: The least recently used key is dropped.
+    """
+
+    cache = IdempotencyCache(maxsize=2)
+    cache.run("a", "a", lambda: "a")
+    cache.run("b", "b", lambda: "b")
+    cache.run("a", "a", lambda: "a")
+    cache.run("c", "c", lambda: "c")
+
+    assert len(cache) == 2
+    assert cache.run("a", "a", lambda: "new") == ("a", True)
+    assert cache.run("b", "b", lambda: "new") == ("new", False)
+
+
+def test_cache_rejects_another_request_and_forgets_failures():
+    """
+    Test the reuse of a key for another request, and a failing request.
+
+    Expected outcome: The reuse raises IdempotencyMismatch; a failure is
+    not recorded, so the next request with the key runs.
+    """
+
+    cache = IdempotencyCache()
+    cache.run("k", "a", lambda: 1)
+    with pytest.raises(IdempotencyMismatch):
+        cache.run("k", "b", lambda: 2)
+
+    def fail():
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        cache.run("f", "a", fail)
+    assert cache.run("f", "a", lambda: 3) == (3, False)
+
+
+def test_cache_keeps_requests_in_flight_and_times_out_waiters():
+    """
+    Test eviction and waiting while the request of a key is running.
+
+    Expected outcome: The key in flight is not evicted, a request waiting
+    for it past `wait_timeout` raises IdempotencyInProgress, and its
+    outcome is replayed once known.
+    """
+
+    cache = IdempotencyCache(maxsize=1, wait_timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+        return "a"
+
+    running = threading.Thread(target=cache.run, args=("a", "a", slow))
+    running.start()
+    started.wait()
+    cache.run("b", "b", lambda: "b")
+    cache.run("c", "c", lambda: "c")
+    with pytest.raises(IdempotencyInProgress):
+        cache.run("a", "a", lambda: "new")
+
+    release.set()
+    running.join()
+    assert cache.run("a", "a", lambda: "new") == ("a", True)
+    assert cache.run("b", "b", lambda: "new") == ("new", False)
+
+
+def test_concurrent_duplicate_purchases_book_once(records):
+    """
+    Test that duplicate purchasePlaces requests fired at once book once.
+
+    Steps:
+    1. 32 threads post the same booking with the same idempotency key.
+    2. Compare the responses, the points and the places left.
+
+    Expected outcome: The places are booked once and every thread gets
+    the same page.
+    """
+
+    competition, club = records
+    start = threading.Barrier(32)
+    responses = []
+
+    def worker():
+        client = app.test_client()
+        start.wait()
+        responses.append(
+            client.post(
+                "/purchasePlaces",
+                data={
+                    "club": "Simply Lift",
+                    "competition": "Winter Open",
+                    "places": "2",
+                },
+                headers={"Idempotency-Key": "retry-1"},
+            )
+        )
+
+    workers = [threading.Thread(target=worker) for _ in range(32)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert club["points"] == 11
+    assert competition["numberOfPlaces"] == 23
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.data for r in responses}) == 1
+    assert b"Great-booking complete!" in responses[0].data
+    replayed = [r for r in responses if r.headers.get("Idempotent-Replayed")]
+    assert len(replayed) == 31
+
+
+def test_api_booking_replay_and_mismatch(records):
+    """
+    Test retries of an API booking with an idempotency key.
+
+    Expected outcome: A retry returns the original response without
+    booking again; the key reused for another booking gets a 422 error.
+    """
+
+    competition, club = records
+    client = app.test_client()
+    body = {"club": "Simply Lift", "competition": "Winter Open", "places": 3}
+    headers = {"Idempotency-Key": "api-1"}
+
+    first = client.post("/api/v1/bookings", json=body, headers=headers)
+    retry = client.post("/api/v1/bookings", json=body, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json == first.json
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert club["points"] == 10
+
+    other = client.post(
+        "/api/v1/bookings", json=dict(body, places=1), headers=headers
+    )
+    assert other.status_code == 422
+    assert other.json["error"] == "idempotency_mismatch"
+    assert competition["numberOfPlaces"] == 22
+
+    without_key = client.post("/api/v1/bookings", json=body)
+    assert without_key.status_code == 201
+    assert club["points"] == 7
+
+
+def test_api_retry_of_request_in_flight_gets_409(records, monkeypatch):
+    """
+    Test a retry still waiting for the request running with its key.
+
+    Expected outcome: The retry gets a JSON 409 error with a Retry-After
+    header, and nothing is booked.
+    """
+
+    competition, club = records
+
+    def in_progress(key, fingerprint, func):
+        raise IdempotencyInProgress(key)
+
+    monkeypatch.setattr(server.idempotency, "run", in_progress)
+    response = app.test_client().post(
+        "/api/v1/bookings",
+        json={
+            "club": "Simply Lift",
+            "competition": "Winter Open",
+            "places": 1,
+        },
+        headers={"Idempotency-Key": "api-1"},
+    )
+    assert response.status_code == 409
+    assert response.json["error"] == "idempotency_in_progress"
+    assert response.headers["Retry-After"] == "1"
+    assert club["points"] == 13
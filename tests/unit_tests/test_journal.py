@@ -0,0 +1,171 @@
+import os
+
+import pytest
+from journal import BookingJournal, read_events, replay
+from ledger import ReservationLedger
+from registry import Registry
+from utils import load_snapshot, write_snapshot
+
+
+@pytest.fixture
+def files(tmp_path):
+    clubs_file = str(tmp_path / "clubs.json")
+    competitions_file = str(tmp_path / "competitions.json")
+    write_snapshot(
+        clubs_file,
+        "clubs",
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "13",
+            }
+        ],
+    )
+    write_snapshot(
+        competitions_file,
+        "competitions",
+        [
+            {
+                "name": "Spring Festival",
+                "date": "2020-03-27 10:00:00",
+                "numberOfPlaces": "25",
+            }
+        ],
+    )
+    return str(tmp_path / "bookings.journal"), clubs_file, competitions_file
+
+
+def load_state(path, clubs_file, competitions_file):
+    competitions, competitions_meta = load_snapshot(
+        competitions_file, "competitions"
+    )
+    clubs, clubs_meta = load_snapshot(clubs_file, "clubs")
+    registry = Registry(competitions, clubs)
+    reserved = ReservationLedger(competitions_meta.get("reservations", []))
+    replay(
+        path,
+        registry,
+        reserved,
+        competitions_seq=competitions_meta.get("journalSeq", 0),
+        clubs_seq=clubs_meta.get("journalSeq", 0),
+    )
+    return registry, reserved
+
+
+def open_journal(files, registry, reserved):
+    path, clubs_file, competitions_file = files
+    _, meta = load_snapshot(competitions_file, "competitions")
+    return BookingJournal(
+        path,
+        lambda: (registry.competitions, registry.clubs, reserved),
+        clubs_file=clubs_file,
+        competitions_file=competitions_file,
+        start_seq=meta.get("journalSeq", 0),
+    )
+
+
+def book(journal, registry, reserved, places):
+    club = registry.club_by_name("Simply Lift")
+    competition = registry.competition_by_name("Spring Festival")
+
+    def apply():
+        reserved.add("Simply Lift", "Spring Festival", places)
+        competition["numberOfPlaces"] = (
+            int(competition["numberOfPlaces"]) - places
+        )
+        club["points"] = int(club["points"]) - places
+
+    journal.record(club["name"], competition["name"], places, apply)
+
+
+def test_replay_restores_bookings(files):
+    """
+    Test that bookings survive a restart through the journal.
+
+    Expected outcome: Reloading the snapshots and replaying the journal gives the same state.
+    """
+
+    registry, reserved = load_state(*files)
+    journal = open_journal(files, registry, reserved)
+    book(journal, registry, reserved, 2)
+    book(journal, registry, reserved, 3)
+    journal.close()
+
+    registry, reserved = load_state(*files)
+    assert registry.club_by_name("Simply Lift")["points"] == 8
+    assert (
+        registry.competition_by_name("Spring Festival")["numberOfPlaces"] == 20
+    )
+    assert reserved.entries() == [["Simply Lift", "Spring Festival", 5]]
+
+
+def test_compaction_folds_journal_into_snapshots(files):
+    """
+    Test that compaction writes the snapshots and empties the journal.
+
+    Expected outcome: The events are not applied twice after a compaction.
+    """
+
+    registry, reserved = load_state(*files)
+    journal = open_journal(files, registry, reserved)
+    book(journal, registry, reserved, 2)
+    journal.compact_in_background().join()
+    book(journal, registry, reserved, 1)
+    journal.close()
+
+    assert [e["seq"] for e in read_events(files[0])] == [2]
+    registry, reserved = load_state(*files)
+    assert registry.club_by_name("Simply Lift")["points"] == 10
+    assert (
+        registry.competition_by_name("Spring Festival")["numberOfPlaces"] == 22
+    )
+    assert reserved.entries() == [["Simply Lift", "Spring Festival", 3]]
+
+    journal = open_journal(files, registry, reserved)
+    journal.compact()
+    book(journal, registry, reserved, 1)
+    journal.close()
+    registry, reserved = load_state(*files)
+    assert registry.club_by_name("Simply Lift")["points"] == 9
+
+
+def test_compaction_without_new_events_writes_nothing(files):
+    """
+    Test compacting a journal twice without booking in between.
+
+    Expected outcome: The second compaction returns False and leaves the
+    snapshots untouched.
+    """
+
+    path, clubs_file, competitions_file = files
+    registry, reserved = load_state(*files)
+    journal = open_journal(files, registry, reserved)
+    book(journal, registry, reserved, 2)
+    assert journal.compact()
+    mtime = os.stat(clubs_file).st_mtime_ns
+    assert not journal.compact()
+    assert os.stat(clubs_file).st_mtime_ns == mtime
+    journal.close()
+
+
+def test_torn_last_line_is_ignored(files):
+    """
+    Test that a partially written last event does not break the replay.
+
+    Expected outcome: Complete events are replayed and the torn one is dropped.
+    """
+
+    registry, reserved = load_state(*files)
+    journal = open_journal(files, registry, reserved)
+    book(journal, registry, reserved, 2)
+    journal.close()
+    with open(files[0], "a") as f:
+        f.write('{"seq":2,"club":"Simp')
+
+    registry, reserved = load_state(*files)
+    assert registry.club_by_name("Simply Lift")["points"] == 11
+    journal = open_journal(files, registry, reserved)
+    book(journal, registry, reserved, 1)
+    journal.close()
+    assert [e["seq"] for e in read_events(files[0])] == [1, 2]
@@ -0,0 +1,33 @@
+import datetime
+import decimal
+
+import json_provider
+import pytest
+from json_provider import CompactJSONProvider
+from server import app
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_provider_serializes_flask_types(monkeypatch, use_orjson):
+    """
+    Test the compact provider with and without orjson.
+
+    Expected outcome: Both give the same compact text, with dates and
+    decimals serialized by Flask's default and non ASCII text kept.
+    """
+
+    if not use_orjson:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    provider = CompactJSONProvider(app)
+    obj = {
+        "date": datetime.datetime(2020, 3, 27, 10, 0),
+        "points": decimal.Decimal("1.5"),
+        "club": "Güdlft",
+    }
+    assert provider.dumps(obj) == (
+        '{"date":"Fri, 27 Mar 2020 10:00:00 GMT",'
+        '"points":"1.5","club":"Güdlft"}'
+    )
+    assert provider.loads(provider.dumps([1, "é"])) == [1, "é"]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from json_stream import iter_snapshot
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "clubs.json"
+    data = {
+        "journalSeq": 12,
+        "clubs": [
+            {"name": f"Club {i} é", "email": f"{i}@x.io", "points": i * 7}
+            for i in range(50)
+        ],
+        "placesReserved": {"Spring Festival": 3},
+    }
+    path.write_text(json.dumps(data, indent=4))
+    return str(path), data
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_stream_matches_json_load(snapshot, chunk_size):
+    """
+    Test that streamed records are identical to a full json.load, whatever the chunk size.
+
+    Expected outcome: Same records in the same order, and the other entries in meta.
+    """
+
+    path, data = snapshot
+    meta = {}
+    records = list(iter_snapshot(path, "clubs", meta, chunk_size=chunk_size))
+    assert records == data["clubs"]
+    assert meta == {"journalSeq": 12, "placesReserved": {"Spring Festival": 3}}
+
+
+def test_stream_empty_list(tmp_path):
+    """
+    Test streaming a snapshot with no records.
+
+    Expected outcome: No record is yielded.
+    """
+
+    path = tmp_path / "competitions.json"
+    path.write_text('{"competitions": [ ]}')
+    assert list(iter_snapshot(str(path), "competitions")) == []
+
+
+def test_stream_missing_key(tmp_path):
+    """
+    Test streaming a snapshot without the requested key.
+
+    Expected outcome: KeyError, like indexing the parsed document.
+    """
+
+    path = tmp_path / "clubs.json"
+    path.write_text('{"other": []}')
+    with pytest.raises(KeyError):
+        list(iter_snapshot(str(path), "clubs"))
@@ -0,0 +1,134 @@
+import random
+
+import pytest
+from leaderboard import Leaderboard
+from server import app, set_test_data
+
+
+def ranked(clubs):
+    return sorted(clubs, key=lambda club: int(club["points"]), reverse=True)
+
+
+def test_leaderboard_matches_sorted_clubs():
+    """
+    Test that the incremental ranking always matches a full sort.
+
+    Steps:
+    1. Rank 500 clubs, some of them tied.
+    2. Change the points of random clubs and update the ranking.
+    3. Compare every page with a stable sort of the clubs.
+
+    Expected outcome: The pages are identical to slices of the sorted list.
+    """
+
+    rng = random.Random(42)
+    clubs = [
+        {"name": f"Club {i}", "email": f"{i}@example.com", "points": i % 37}
+        for i in range(500)
+    ]
+    leaderboard = Leaderboard(clubs)
+    for _ in range(2000):
+        club = rng.choice(clubs)
+        club["points"] = rng.randrange(50)
+        leaderboard.update(club)
+    expected = ranked(clubs)
+    assert leaderboard.page(0, 500) == expected
+    assert leaderboard.page(123, 10) == expected[123:133]
+    assert leaderboard.page(495, 50) == expected[495:]
+    assert leaderboard.page(500, 10) == []
+
+
+def test_leaderboard_remove():
+    """
+    Test that a removed club no longer appears in the ranking.
+
+    Expected outcome: The remaining clubs keep their relative order.
+    """
+
+    clubs = [
+        {"name": "A", "email": "a@example.com", "points": 3},
+        {"name": "B", "email": "b@example.com", "points": 5},
+        {"name": "C", "email": "c@example.com", "points": 1},
+    ]
+    leaderboard = Leaderboard(clubs)
+    leaderboard.remove("B")
+    assert [c["name"] for c in leaderboard.page(0, 10)] == ["A", "C"]
+    assert len(leaderboard) == 2
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        with app.app_context():
+            set_test_data(
+                [],
+                [
+                    {
+                        "name": f"Club {i}",
+                        "email": f"{i}@example.com",
+                        "points": str(i),
+                    }
+                    for i in range(30)
+                ],
+            )
+        yield client
+
+
+def test_points_board_pagination(client):
+    """
+    Test that the points board only renders the requested ranks.
+
+    Expected outcome: Ranks 11 to 15 are rendered, with links to the other pages.
+    """
+
+    response = client.get("/pointsBoard?offset=10&limit=5")
+    assert response.status_code == 200
+    assert b"Club 19" in response.data
+    assert b"Club 15" in response.data
+    assert b"Club 20" not in response.data
+    assert b"Club 14" not in response.data
+    assert b"Previous" in response.data
+    assert b"Next" in response.data
+
+
+def test_points_board_after_booking(client):
+    """
+    Test that a booking moves the club in the points board.
+
+    Expected outcome: The club drops below the clubs that now have more points.
+    """
+
+    set_test_data(
+        [
+            {
+                "name": "Spring Festival",
+                "date": "2999-03-27 10:00:00",
+                "numberOfPlaces": "25",
+            }
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "13",
+            },
+            {
+                "name": "She Lifts",
+                "email": "kate@shelifts.co.uk",
+                "points": "12",
+            },
+        ],
+    )
+    client.post(
+        "/purchasePlaces",
+        data={
+            "competition": "Spring Festival",
+            "club": "Simply Lift",
+            "places": "2",
+        },
+    )
+    response = client.get("/pointsBoard")
+    assert response.data.index(b"She Lifts") < response.data.index(
+        b"Simply Lift"
+    )
@@ -0,0 +1,130 @@
+import pytest
+from booking import BookingError, StripedLock, book_places
+from ledger import ReservationLedger
+from storage import MemoryStorage, SQLiteStorage
+
+
+def make_records():
+    competitions = [
+        {
+            "name": "Spring Festival",
+            "date": "2999-03-27 10:00:00",
+            "numberOfPlaces": "40",
+        }
+    ]
+    clubs = [
+        {"name": "Simply Lift", "email": "john@simplylift.co", "points": "30"},
+        {
+            "name": "Iron Temple",
+            "email": "admin@irontemple.com",
+            "points": "30",
+        },
+    ]
+    return competitions, clubs
+
+
+def test_ledger_totals():
+    """
+    Test that the ledger tracks the places of each club in each competition.
+
+    Expected outcome: Pair, club and competition totals add up, and only
+    the pairs holding places are stored.
+    """
+
+    ledger = ReservationLedger()
+    ledger.add("Simply Lift", "Spring Festival", 2)
+    ledger.add("Simply Lift", "Spring Festival", 3)
+    ledger.add("Simply Lift", "Fall Classic", 1)
+    ledger.add("Iron Temple", "Spring Festival", 4)
+    ledger.add("She Lifts", "Fall Classic", 0)
+
+    assert ledger.held("Simply Lift", "Spring Festival") == 5
+    assert ledger.held("Iron Temple", "Fall Classic") == 0
+    assert ledger.club_total("Simply Lift") == 6
+    assert ledger.club_total("She Lifts") == 0
+    assert ledger.competition_total("Spring Festival") == 9
+    assert len(ledger) == 3
+
+
+def test_ledger_entries_round_trip():
+    """
+    Test that a ledger rebuilt from its entries is the same ledger.
+
+    Expected outcome: The rebuilt ledger equals the original one.
+    """
+
+    ledger = ReservationLedger()
+    ledger.add("Simply Lift", "Spring Festival", 2)
+    ledger.add("Iron Temple", "Spring Festival", 4)
+
+    rebuilt = ReservationLedger(ledger.entries())
+    assert rebuilt == ledger
+    assert rebuilt.competition_total("Spring Festival") == 6
+
+
+def test_cap_applies_to_each_club():
+    """
+    Test that the 12 places cap is counted per club.
+
+    Steps:
+    1. A club books its 12 places in a competition.
+    2. The same club tries to book one more place.
+    3. Another club books 12 places in the same competition.
+
+    Expected outcome: Only the second step is rejected.
+    """
+
+    competitions, clubs = make_records()
+    storage = MemoryStorage(competitions, clubs)
+    competition = storage.competition_by_name("Spring Festival")
+    simply_lift = storage.club_by_name("Simply Lift")
+    iron_temple = storage.club_by_name("Iron Temple")
+    locks = StripedLock()
+
+    book_places(simply_lift, competition, 12, storage.ledger, locks)
+    with pytest.raises(BookingError) as error:
+        book_places(simply_lift, competition, 1, storage.ledger, locks)
+    assert error.value.reason == "cap_reached"
+    book_places(iron_temple, competition, 12, storage.ledger, locks)
+
+    assert competition["numberOfPlaces"] == 16
+    assert storage.ledger.competition_total("Spring Festival") == 24
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_storage_cap_per_club(backend, tmp_path):
+    """
+    Test that both backends keep the reservations of each club apart.
+
+    Expected outcome: Each club can book 12 places, not 12 between them.
+    """
+
+    competitions, clubs = make_records()
+    if backend == "memory":
+        storage = MemoryStorage(competitions, clubs)
+    else:
+        storage = SQLiteStorage(str(tmp_path / "gudlft.sqlite3"))
+        storage.import_records(competitions, clubs)
+
+    for name in ("Simply Lift", "Iron Temple"):
+        storage.book(
+            storage.club_by_name(name),
+            storage.competition_by_name("Spring Festival"),
+            10,
+        )
+    with pytest.raises(BookingError) as error:
+        storage.book(
+            storage.club_by_name("Simply Lift"),
+            storage.competition_by_name("Spring Festival"),
+            3,
+        )
+    assert error.value.reason == "cap_total"
+    storage.book(
+        storage.club_by_name("Iron Temple"),
+        storage.competition_by_name("Spring Festival"),
+        2,
+    )
+    assert (
+        storage.competition_by_name("Spring Festival")["numberOfPlaces"] == 18
+    )
+    storage.close()
@@ -0,0 +1,154 @@
+import pytest
+from metrics import (
+    BOOKING_REJECTIONS,
+    FRAGMENT_LOOKUPS,
+    PHASE_LATENCY,
+    REQUESTS,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+)
+from server import app, set_test_data
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "10",
+            },
+        ],
+        [
+            {
+                "name": "Iron Temple",
+                "email": "admin@irontemple.com",
+                "points": "4",
+            },
+        ],
+    )
+    with app.test_client() as client:
+        yield client
+
+
+def test_exposition_format():
+    """
+    Test the text exposition format of counters and histograms.
+
+    Expected outcome: Labelled samples, cumulative buckets, sum and count.
+    """
+
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("hits_total", "Hits.", ("route",)))
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    )
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(2.0)
+
+    assert registry.expose().splitlines() == [
+        "# HELP hits_total Hits.",
+        "# TYPE hits_total counter",
+        'hits_total{route="a\\"b"} 3',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 2.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_requests_and_phases_are_measured(client):
+    """
+    Test that requests, lookups and renders of an endpoint are measured.
+
+    Expected outcome: The counters of show_summary grow and /metrics lists them.
+    """
+
+    requests = REQUESTS.value("show_summary", "POST", "200")
+    lookups = PHASE_LATENCY.count("show_summary", "lookup")
+    renders = PHASE_LATENCY.count("show_summary", "render")
+
+    client.post("/showSummary", data={"email": "admin@irontemple.com"})
+
+    assert REQUESTS.value("show_summary", "POST", "200") == requests + 1
+    assert PHASE_LATENCY.count("show_summary", "lookup") == lookups + 1
+    assert PHASE_LATENCY.count("show_summary", "render") > renders
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert (
+        'gudlft_requests_total{endpoint="show_summary",method="POST",'
+        'status="200"}' in response.get_data(as_text=True)
+    )
+    assert (
+        'gudlft_request_duration_seconds_count{endpoint="show_summary"}'
+        in response.get_data(as_text=True)
+    )
+
+
+def test_booking_rejections_are_counted(client):
+    """
+    Test that rejected bookings are counted per reason, and accepted
+    bookings time their validation and mutation.
+
+    Expected outcome: One "points" rejection, one validation and mutation.
+    """
+
+    rejected = BOOKING_REJECTIONS.value("points")
+    mutations = PHASE_LATENCY.count("purchasePlaces", "mutation")
+
+    client.post(
+        "/purchasePlaces",
+        data={
+            "club": "Iron Temple",
+            "competition": "Winter Open",
+            "places": 5,
+        },
+    )
+    assert BOOKING_REJECTIONS.value("points") == rejected + 1
+    assert PHASE_LATENCY.count("purchasePlaces", "mutation") == mutations
+
+    client.post(
+        "/purchasePlaces",
+        data={
+            "club": "Iron Temple",
+            "competition": "Winter Open",
+            "places": 1,
+        },
+    )
+    assert PHASE_LATENCY.count("purchasePlaces", "mutation") == mutations + 1
+    assert 'gudlft_booking_rejections_total{reason="points"}' in client.get(
+        "/metrics"
+    ).get_data(as_text=True)
+
+
+def test_fragment_cache_lookups_are_exported(client):
+    """
+    Test that the hits and misses of the competition rows cache are
+    exported.
+
+    Expected outcome: Showing the welcome page twice counts a hit, and
+    /metrics lists the hits and misses of the cache.
+    """
+
+    hits = FRAGMENT_LOOKUPS.value("competition_rows", "hit")
+    for _ in range(2):
+        client.post("/showSummary", data={"email": "admin@irontemple.com"})
+    assert FRAGMENT_LOOKUPS.value("competition_rows", "hit") > hits
+
+    exposed = client.get("/metrics").get_data(as_text=True)
+    for result in ("hit", "miss"):
+        assert (
+            "gudlft_fragment_cache_lookups_total"
+            f'{{cache="competition_rows",result="{result}"}}' in exposed
+        )
@@ -0,0 +1,88 @@
+import os
+import pstats
+
+from flask import Flask
+
+from profiling import RequestProfiler, init_profiler
+
+
+def make_app(profiler):
+    app = Flask(__name__)
+
+    @app.route("/slow")
+    def slow_view():
+        return str(sum(range(1000)))
+
+    profiler.init_app(app)
+    return app
+
+
+def test_one_request_in_n_is_profiled(tmp_path):
+    """
+    Test that one request in N is profiled and aggregated per endpoint.
+
+    Expected outcome: The dumped pstats file holds 2 calls of the view out of 6 requests.
+    """
+
+    profiler = RequestProfiler(
+        str(tmp_path), sample_every=3, dump_interval=3600
+    )
+    client = make_app(profiler).test_client()
+    for _ in range(6):
+        assert client.get("/slow").status_code == 200
+
+    (path,) = profiler.dump()
+    assert os.path.basename(path).startswith("slow_view.")
+    stats = pstats.Stats(path)
+    calls = [
+        value[1]
+        for (_, _, function), value in stats.stats.items()
+        if function == "slow_view"
+    ]
+    assert calls == [2]
+
+
+def test_header_triggers_profiling(tmp_path):
+    """
+    Test that requests carrying the profiling header are profiled.
+
+    Expected outcome: Only the request with the header is profiled.
+    """
+
+    profiler = RequestProfiler(
+        str(tmp_path), header="X-Profile", dump_interval=3600
+    )
+    client = make_app(profiler).test_client()
+    client.get("/slow")
+    assert profiler.dump() == []
+    client.get("/slow", headers={"X-Profile": "1"})
+    assert len(profiler.dump()) == 1
+
+
+def test_dumps_are_rotated(tmp_path):
+    """
+    Test that profiles are dumped on schedule and old dumps are deleted.
+
+    Expected outcome: Every request is dumped, only the last 2 files are kept.
+    """
+
+    profiler = RequestProfiler(
+        str(tmp_path), sample_every=1, dump_interval=0, keep=2
+    )
+    client = make_app(profiler).test_client()
+    for _ in range(4):
+        client.get("/slow")
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_profiler_disabled_by_default():
+    """
+    Test that the default configuration installs no profiling hook.
+
+    Expected outcome: No profiler is created.
+    """
+
+    app = Flask(__name__)
+    app.config.from_object("config.Config")
+    assert init_profiler(app) is None
+    assert not app.before_request_funcs
@@ -5,12 +5,12 @@ from server import app, set_test_data
 competitions_data = [
     {
         "name": "Spring Festival",
-        "date": "2020-03-27 10:00:00",
+        "date": "2999-03-27 10:00:00",
         "numberOfPlaces": "25",
     },
     {
         "name": "Fall Classic",
-        "date": "2020-10-22 13:30:00",
+        "date": "2999-10-22 13:30:00",
         "numberOfPlaces": "13",
     },
 ]
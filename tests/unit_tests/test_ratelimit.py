@@ -0,0 +1,150 @@
+import pytest
+import server
+from ratelimit import TokenBucketLimiter
+from server import app, set_test_data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    set_test_data(
+        [
+            {
+                "name": "Winter Open",
+                "date": "2999-01-15 09:00:00",
+                "numberOfPlaces": "25",
+            }
+        ],
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "13",
+            },
+            {
+                "name": "Iron Temple",
+                "email": "admin@irontemple.com",
+                "points": "4",
+            },
+        ],
+    )
+    with app.test_client() as client:
+        yield client
+
+
+def test_bucket_allows_burst_then_rate():
+    """
+    Test that a bucket allows a burst, then refills at the given rate.
+
+    Expected outcome: Requests past the burst wait for the next token.
+    """
+
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(2, 3, clock=clock)
+
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0
+    clock.now = 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == pytest.approx(0.5)
+
+
+def test_buckets_are_swept_and_bounded():
+    """
+    Test the memory bounds of the limiter.
+
+    Expected outcome: Buckets full again are swept, and no more than
+    `maxsize` buckets are kept.
+    """
+
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(1, 2, maxsize=3, clock=clock)
+    for key in "abcde":
+        limiter.acquire(key)
+    assert len(limiter) == 3
+
+    clock.now = 1
+    limiter.acquire("f")
+    clock.now = 2.5
+    limiter.acquire("g")
+    # c, d and e were idle for 2 seconds, the time to refill 2 tokens.
+    assert len(limiter) == 2
+
+
+def test_purchase_over_club_limit_gets_429(client, monkeypatch):
+    """
+    Test that a club booking too fast is refused with 429.
+
+    Expected outcome: The request past the burst gets a 429 with a
+    Retry-After header and books nothing; other clubs are not limited.
+    """
+
+    monkeypatch.setattr(server, "club_limiter", TokenBucketLimiter(0.1, 2))
+    client.post("/showSummary", data={"email": "john@simplylift.co"})
+    data = {"club": "Simply Lift", "competition": "Winter Open", "places": 1}
+    for _ in range(2):
+        assert client.post("/purchasePlaces", data=data).status_code == 200
+
+    response = client.post("/purchasePlaces", data=data)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert server.storage.club_by_name("Simply Lift")["points"] == 11
+
+    response = client.get("/book/Winter Open/Simply Lift")
+    assert response.status_code == 429
+    with app.test_client() as other:
+        other.post("/showSummary", data={"email": "admin@irontemple.com"})
+        response = other.post(
+            "/api/v1/bookings",
+            json={"competition": "Winter Open", "places": 1},
+        )
+    assert response.status_code == 201
+
+
+def test_club_limit_ignores_named_club_and_spares_ip(client, monkeypatch):
+    """
+    Test the club limit with a club named in the form, and a refused club.
+
+    Expected outcome: A club named without a session is not limited, and
+    a request refused by the club limit gives its address token back.
+    """
+
+    monkeypatch.setattr(server, "club_limiter", TokenBucketLimiter(0.1, 1))
+    monkeypatch.setattr(server, "ip_limiter", TokenBucketLimiter(0.1, 4))
+    data = {"club": "Simply Lift", "competition": "Winter Open", "places": 1}
+    assert client.post("/purchasePlaces", data=data).status_code == 200
+    assert client.post("/purchasePlaces", data=data).status_code == 200
+
+    client.post("/showSummary", data={"email": "john@simplylift.co"})
+    assert client.post("/purchasePlaces", data=data).status_code == 200
+    for _ in range(3):
+        assert client.post("/purchasePlaces", data=data).status_code == 429
+    client.get("/logout")
+    assert client.post("/purchasePlaces", data=data).status_code == 200
+    assert server.storage.club_by_name("Simply Lift")["points"] == 9
+
+
+def test_api_over_ip_limit_gets_json_429(client, monkeypatch):
+    """
+    Test the per address limit on the JSON API.
+
+    Expected outcome: The request past the burst gets a JSON 429 error.
+    """
+
+    monkeypatch.setattr(server, "ip_limiter", TokenBucketLimiter(1, 1))
+    body = {"club": "Simply Lift", "competition": "Winter Open", "places": 1}
+    assert client.post("/api/v1/bookings", json=body).status_code == 201
+
+    response = client.post("/api/v1/bookings", json=body)
+    assert response.status_code == 429
+    assert response.json["error"] == "rate_limited"
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,100 @@
+import json
+
+from booking import StripedLock, book_many
+from ledger import ReservationLedger
+from records import Club, Competition
+from storage import MemoryStorage
+
+
+def test_records_convert_counters_once():
+    """
+    Test that records parse the counters of the JSON files.
+
+    Expected outcome: Points and places are integers, other fields unchanged.
+    """
+
+    club = Club.from_dict(
+        {"name": "Iron Temple", "email": "admin@irontemple.com", "points": "4"}
+    )
+    competition = Competition.from_dict(
+        {
+            "name": "Fall Classic",
+            "date": "2020-10-22 13:30:00",
+            "numberOfPlaces": "13",
+        }
+    )
+    assert club.points == 4
+    assert club["points"] == 4
+    assert competition["numberOfPlaces"] == 13
+    assert competition["date"] == "2020-10-22 13:30:00"
+
+
+def test_records_behave_like_dicts():
+    """
+    Test the dict-like access used by the templates, the journal and the
+    booking code.
+
+    Expected outcome: Item access, update and dict() work, extra fields
+    are refused.
+    """
+
+    club = Club("Simply Lift", "john@simplylift.co", 13)
+    club["points"] -= 3
+    club.update({"email": "contact@simplylift.co"})
+    assert dict(club) == {
+        "name": "Simply Lift",
+        "email": "contact@simplylift.co",
+        "points": 10,
+    }
+    assert json.loads(json.dumps(club.to_dict()))["points"] == 10
+    assert club == Club("Simply Lift", "contact@simplylift.co", 10)
+    try:
+        club["unknown"] = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("records must not accept unknown fields")
+
+
+def test_batch_booking_on_records():
+    """
+    Test that batch bookings work on records, whose trial copies are dicts.
+
+    Expected outcome: The records are updated in place.
+    """
+
+    club = Club("Simply Lift", "john@simplylift.co", 20)
+    competition = Competition("Fall Classic", "2999-10-22 13:30:00", 20)
+    ledger = ReservationLedger()
+    book_many(
+        club,
+        [(competition, 2), (competition, 3)],
+        ledger,
+        StripedLock(),
+    )
+    assert club.points == 15
+    assert competition.numberOfPlaces == 15
+    assert ledger.held("Simply Lift", "Fall Classic") == 5
+
+
+def test_memory_storage_normalizes_dicts_in_place():
+    """
+    Test that the memory backend keeps the given dicts as live records.
+
+    Expected outcome: The counters of the same dicts become integers.
+    """
+
+    clubs = [
+        {"name": "She Lifts", "email": "kate@shelifts.co.uk", "points": "12"}
+    ]
+    competitions = [
+        {
+            "name": "Spring Festival",
+            "date": "2999-03-27 10:00:00",
+            "numberOfPlaces": "25",
+        }
+    ]
+    storage = MemoryStorage(competitions, clubs)
+    assert storage.club_by_name("She Lifts") is clubs[0]
+    assert clubs[0]["points"] == 12
+    assert competitions[0]["numberOfPlaces"] == 25
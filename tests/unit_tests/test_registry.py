@@ -0,0 +1,155 @@
+import pytest
+from registry import Registry
+from utils import search_club_email, search_club_name, search_competition
+
+
+@pytest.fixture
+def registry():
+    competitions = [
+        {
+            "name": "Spring Festival",
+            "date": "2020-03-27 10:00:00",
+            "numberOfPlaces": "25",
+        },
+    ]
+    clubs = [
+        {"name": "Simply Lift", "email": "john@simplylift.co", "points": "10"},
+        {
+            "name": "Iron Temple",
+            "email": "admin@irontemple.com",
+            "points": "4",
+        },
+    ]
+    return Registry(competitions, clubs)
+
+
+def test_helpers_use_indexes(registry):
+    """
+    Test that the search helpers resolve records through the registry.
+
+    Expected outcome: The helpers return the indexed records, or None when unknown.
+    """
+
+    assert search_club_email("john@simplylift.co", registry)["name"] == (
+        "Simply Lift"
+    )
+    assert search_club_name("Iron Temple", registry)["points"] == "4"
+    assert search_competition("Spring Festival", registry) is (
+        registry.competitions[0]
+    )
+    assert search_club_email("unknown@example.com", registry) is None
+    assert search_competition("Unknown", registry) is None
+
+
+def test_helpers_scan_other_sequences(registry):
+    """
+    Test the search helpers with record lists and tuples.
+
+    Expected outcome: Sequences without indexes are scanned, whatever
+    their type.
+    """
+
+    for clubs in (registry.clubs, tuple(registry.clubs)):
+        assert search_club_email("john@simplylift.co", clubs)["name"] == (
+            "Simply Lift"
+        )
+        assert search_club_name("Iron Temple", clubs)["points"] == "4"
+        assert search_club_name("Unknown", clubs) is None
+    competitions = tuple(registry.competitions)
+    assert search_competition("Spring Festival", competitions) is (
+        competitions[0]
+    )
+    assert search_competition("Spring Festival", registry.competitions) is (
+        competitions[0]
+    )
+
+
+def test_update_club_reindexes(registry):
+    """
+    Test that renaming a club or changing its email updates the indexes.
+
+    Expected outcome: The club is only found under its new keys and keeps its position.
+    """
+
+    registry.update_club(
+        "Simply Lift", name="Simply Lifting", email="new@simplylift.co"
+    )
+    assert registry.club_by_name("Simply Lift") is None
+    assert registry.club_by_email("john@simplylift.co") is None
+    assert registry.club_by_email("new@simplylift.co")["name"] == (
+        "Simply Lifting"
+    )
+    assert registry.clubs[0]["name"] == "Simply Lifting"
+
+
+def test_add_and_remove_competition(registry):
+    """
+    Test that added and removed competitions are reflected in the index and the list.
+
+    Expected outcome: The shared list and the index stay consistent.
+    """
+
+    competition = {
+        "name": "Fall Classic",
+        "date": "2020-10-22 13:30:00",
+        "numberOfPlaces": "13",
+    }
+    registry.add_competition(competition)
+    assert registry.competition_by_name("Fall Classic") is competition
+    assert registry.remove_competition("Spring Festival") is not None
+    assert [c["name"] for c in registry.competitions] == ["Fall Classic"]
+
+
+def test_remove_club_promotes_email_duplicate(registry):
+    """
+    Test removing the club found by an email shared with a later club.
+
+    Expected outcome: The email then finds the later club, and the other
+    clubs keep their order.
+    """
+
+    registry.add_club(
+        {"name": "She Lifts", "email": "john@simplylift.co", "points": "12"}
+    )
+    registry.add_club(
+        {"name": "Big Lift", "email": "big@lift.co", "points": "3"}
+    )
+    assert registry.club_by_email("john@simplylift.co")["name"] == (
+        "Simply Lift"
+    )
+    registry.remove_club("Simply Lift")
+    assert registry.club_by_email("john@simplylift.co")["name"] == (
+        "She Lifts"
+    )
+    assert [c["name"] for c in registry.clubs] == [
+        "Iron Temple",
+        "She Lifts",
+        "Big Lift",
+    ]
+    assert len(registry.clubs) == 3
+    assert registry.clubs[-1]["name"] == "Big Lift"
+    registry.remove_club("She Lifts")
+    assert registry.club_by_email("john@simplylift.co") is None
+
+
+def test_rename_competition_onto_another(registry):
+    """
+    Test renaming a competition to the name of another competition.
+
+    Expected outcome: The renamed competition replaces the other one, in
+    the list and in the index, so no record is left out of the index.
+    """
+
+    registry.add_competition(
+        {
+            "name": "Fall Classic",
+            "date": "2020-10-22 13:30:00",
+            "numberOfPlaces": "13",
+        }
+    )
+    renamed = registry.update_competition(
+        "Fall Classic", name="Spring Festival"
+    )
+    assert registry.competition_by_name("Spring Festival") is renamed
+    assert registry.competition_by_name("Fall Classic") is None
+    assert list(registry.competitions) == [renamed]
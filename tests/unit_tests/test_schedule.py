@@ -0,0 +1,133 @@
+from datetime import datetime
+
+from schedule import CompetitionSchedule
+from server import app, set_test_data
+
+competitions_data = [
+    {
+        "name": "Spring Festival",
+        "date": "2020-03-27 10:00:00",
+        "numberOfPlaces": "25",
+    },
+    {
+        "name": "Winter Open",
+        "date": "2999-01-15 09:00:00",
+        "numberOfPlaces": "10",
+    },
+    {
+        "name": "Fall Classic",
+        "date": "2020-10-22 13:30:00",
+        "numberOfPlaces": "13",
+    },
+]
+
+
+def test_schedule_splits_upcoming_and_past():
+    """
+    Test that the schedule splits competitions around a given date.
+
+    Expected outcome: Upcoming competitions come soonest first, past ones most recent first.
+    """
+
+    schedule = CompetitionSchedule(competitions_data)
+    now = datetime(2020, 6, 1)
+    assert [c["name"] for c in schedule.upcoming(now)] == [
+        "Fall Classic",
+        "Winter Open",
+    ]
+    assert [c["name"] for c in schedule.past(now)] == ["Spring Festival"]
+    assert schedule.date(competitions_data[0]) == datetime(2020, 3, 27, 10)
+
+
+def test_schedule_add_and_remove():
+    """
+    Test that added and removed competitions are kept in date order.
+
+    Expected outcome: The competitions are listed in date order after the changes.
+    """
+
+    schedule = CompetitionSchedule(competitions_data)
+    schedule.add(
+        {
+            "name": "Summer Cup",
+            "date": "2020-07-01 10:00:00",
+            "numberOfPlaces": "5",
+        }
+    )
+    schedule.remove("Winter Open")
+    assert [c["name"] for c in schedule.upcoming(datetime(2020, 1, 1))] == [
+        "Spring Festival",
+        "Summer Cup",
+        "Fall Classic",
+    ]
+
+
+def test_schedule_remove_renamed_competition():
+    """
+    Test removing a name that no longer matches its scheduled competition.
+
+    Expected outcome: The search stops at the end of the date's
+    competitions instead of running past the list.
+    """
+
+    schedule = CompetitionSchedule(competitions_data[:1])
+    competition = dict(competitions_data[0], name="Summer Cup")
+    schedule.add(competition)
+    competition["name"] = "Renamed Cup"
+    schedule.remove("Summer Cup")
+    assert len(schedule.upcoming(datetime(2020, 1, 1))) == 2
+
+
+def test_welcome_page_archives_past_competitions():
+    """
+    Test that the welcome page only links upcoming competitions.
+
+    Expected outcome: Past competitions are listed without a booking link.
+    """
+
+    app.config["TESTING"] = True
+    set_test_data(
+        competitions_data,
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "10",
+            }
+        ],
+    )
+    with app.test_client() as client:
+        response = client.post(
+            "/showSummary", data={"email": "john@simplylift.co"}
+        )
+    assert response.status_code == 200
+    assert b"/book/Winter%20Open/Simply%20Lift" in response.data
+    assert b"/book/Spring%20Festival" not in response.data
+    assert b"Past competitions" in response.data
+
+
+def test_started_competition_can_not_be_booked():
+    """
+    Test posting the booking form of a competition that has started.
+
+    Expected outcome: The booking is refused with a 400 status code and
+    nothing is booked.
+    """
+
+    app.config["TESTING"] = True
+    clubs = [
+        {"name": "Simply Lift", "email": "john@simplylift.co", "points": "10"}
+    ]
+    set_test_data(competitions_data, clubs)
+    with app.test_client() as client:
+        response = client.post(
+            "/purchasePlaces",
+            data={
+                "competition": "Spring Festival",
+                "club": "Simply Lift",
+                "places": "1",
+            },
+        )
+    assert response.status_code == 400
+    assert clubs[0]["points"] == 10
+    assert competitions_data[0]["numberOfPlaces"] == 25
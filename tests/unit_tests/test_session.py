@@ -0,0 +1,179 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from server import app, set_test_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    competitions = [
+        {
+            "name": "Winter Open",
+            "date": "2999-01-15 09:00:00",
+            "numberOfPlaces": "25",
+        }
+    ]
+    clubs = [
+        {"name": "Simply Lift", "email": "john@simplylift.co", "points": "13"},
+        {"name": "She Lifts", "email": "kate@shelifts.co.uk", "points": "12"},
+    ]
+    app.config["TESTING"] = True
+    monkeypatch.setitem(app.config, "LOGIN_REQUIRED", True)
+    set_test_data(competitions, clubs)
+    with app.test_client() as client:
+        yield client, clubs
+
+
+def login(client, email="john@simplylift.co"):
+    return client.post("/showSummary", data={"email": email})
+
+
+def test_login_is_kept_in_session(client):
+    """
+    Test that the club logged in by email is kept in the session.
+
+    Expected outcome: The welcome page is served again without the
+    email, and a failed login ends the session.
+    """
+
+    client, clubs = client
+    assert client.get("/showSummary").status_code == 302
+    assert login(client).status_code == 200
+    with client.session_transaction() as session:
+        assert session["club"] == "Simply Lift"
+    response = client.get("/showSummary")
+    assert response.status_code == 200
+    assert b"john@simplylift.co" in response.data
+
+    assert login(client, "unknown@example.com").status_code == 401
+    assert client.get("/showSummary").status_code == 302
+
+
+def test_booking_requires_login(client):
+    """
+    Test the booking pages without a session.
+
+    Expected outcome: They are refused with a 401 status code, and
+    nothing is booked.
+    """
+
+    client, clubs = client
+    response = client.get("/book/Winter Open/Simply Lift")
+    assert response.status_code == 401
+    response = client.post(
+        "/purchasePlaces",
+        data={
+            "club": "Simply Lift",
+            "competition": "Winter Open",
+            "places": 2,
+        },
+    )
+    assert response.status_code == 401
+    assert clubs[0]["points"] == 13
+
+
+def test_booking_for_another_club_is_refused(client):
+    """
+    Test editing the hidden club field to book for another club.
+
+    Expected outcome: The booking is refused with a 403 status code and
+    only the logged in club can book.
+    """
+
+    client, clubs = client
+    login(client)
+    assert client.get("/book/Winter Open/She Lifts").status_code == 403
+    response = client.post(
+        "/purchasePlaces",
+        data={"club": "She Lifts", "competition": "Winter Open", "places": 2},
+    )
+    assert response.status_code == 403
+    assert clubs[1]["points"] == 12
+
+    assert client.get("/book/Winter Open/Simply Lift").status_code == 200
+    response = client.post(
+        "/purchasePlaces",
+        data={
+            "club": "Simply Lift",
+            "competition": "Winter Open",
+            "places": 2,
+        },
+    )
+    assert response.status_code == 200
+    assert clubs[0]["points"] == 11
+
+
+def test_logout_clears_session(client):
+    """
+    Test that /logout ends the session.
+
+    Expected outcome: The club is removed from the session and booking
+    requires a new login.
+    """
+
+    client, clubs = client
+    login(client)
+    assert client.get("/logout").status_code == 302
+    with client.session_transaction() as session:
+        assert "club" not in session
+    response = client.get("/book/Winter Open/Simply Lift")
+    assert response.status_code == 401
+
+
+def test_api_books_for_the_session_club(client):
+    """
+    Test the JSON booking routes with and without a session.
+
+    Expected outcome: Without a session they are refused with 401, a body
+    naming another club is refused with 403, and the logged in club books
+    without naming itself.
+    """
+
+    client, clubs = client
+    booking = {"competition": "Winter Open", "places": 1}
+    batch = {"bookings": [booking]}
+    response = client.post(
+        "/api/v1/bookings", json=dict(booking, club="Simply Lift")
+    )
+    assert response.status_code == 401
+    assert response.json["error"] == "login_required"
+
+    login(client)
+    for url, body in (
+        ("/api/v1/bookings", booking),
+        ("/api/v1/bookings/batch", batch),
+    ):
+        response = client.post(url, json=dict(body, club="She Lifts"))
+        assert response.status_code == 403
+        assert response.json["error"] == "forbidden"
+    assert clubs[1]["points"] == 12
+
+    assert client.post("/api/v1/bookings", json=booking).status_code == 201
+    response = client.post("/api/v1/bookings/batch", json=batch)
+    assert response.status_code == 201
+    assert clubs[0]["points"] == 11
+
+
+def test_server_refuses_to_start_without_secret_key(tmp_path):
+    """
+    Test starting the server with the default configuration and no key.
+
+    Expected outcome: The server refuses to start, since sessions signed
+    with a known key would prove nothing.
+    """
+
+    env = dict(os.environ, GUDLFT_CONFIG="config.Config", PYTHONPATH=ROOT)
+    env.pop("GUDLFT_SECRET_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-c", "import server"],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "GUDLFT_SECRET_KEY must be set" in result.stderr
@@ -0,0 +1,168 @@
+import os
+
+import pytest
+
+from journal import BookingJournal
+from ledger import ReservationLedger
+from records import Club, Competition
+from snapshot import load_binary_snapshot, write_binary_snapshot
+from storage import create_storage
+from utils import write_snapshot
+
+
+@pytest.fixture
+def files(tmp_path):
+    clubs_file = str(tmp_path / "clubs.json")
+    competitions_file = str(tmp_path / "competitions.json")
+    write_snapshot(
+        clubs_file,
+        "clubs",
+        [
+            {
+                "name": "Simply Lift",
+                "email": "john@simplylift.co",
+                "points": "13",
+            }
+        ],
+    )
+    write_snapshot(
+        competitions_file,
+        "competitions",
+        [
+            {
+                "name": "Spring Festival",
+                "date": "2999-03-27 10:00:00",
+                "numberOfPlaces": "25",
+            }
+        ],
+    )
+    return str(tmp_path / "state.msgpack"), competitions_file, clubs_file
+
+
+def write_state(files, points):
+    path, competitions_file, clubs_file = files
+    write_binary_snapshot(
+        path,
+        [Competition("Spring Festival", "2999-03-27 10:00:00", 20)],
+        [Club("Simply Lift", "john@simplylift.co", points)],
+        [["Simply Lift", "Spring Festival", 5]],
+        competitions_seq=4,
+        clubs_seq=3,
+        sources=(competitions_file, clubs_file),
+    )
+
+
+def test_binary_snapshot_round_trip(files):
+    """
+    Test that a binary snapshot loads back the state it was written with.
+
+    Expected outcome: Records, reservations and journal positions match.
+    """
+
+    write_state(files, 8)
+    state = load_binary_snapshot(files[0], files[1:])
+    assert state["clubs"] == [Club("Simply Lift", "john@simplylift.co", 8)]
+    assert state["competitions"][0]["numberOfPlaces"] == 20
+    assert state["reservations"] == (("Simply Lift", "Spring Festival", 5),)
+    assert (state["competitionsSeq"], state["clubsSeq"]) == (4, 3)
+
+
+def test_binary_snapshot_is_stale_when_json_changes(files):
+    """
+    Test that a binary snapshot older than the JSON snapshots is ignored.
+
+    Expected outcome: No state is loaded once clubs.json is modified.
+    """
+
+    write_state(files, 8)
+    stat = os.stat(files[2])
+    os.utime(files[2], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_binary_snapshot(files[0], files[1:]) is None
+
+
+def test_corrupted_binary_snapshot_is_ignored(files):
+    """
+    Test that a binary snapshot failing its checksum is ignored.
+
+    Expected outcome: No state is loaded from a corrupted or missing file.
+    """
+
+    assert load_binary_snapshot(files[0], files[1:]) is None
+    write_state(files, 8)
+    with open(files[0], "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+    assert load_binary_snapshot(files[0], files[1:]) is None
+
+
+def test_compaction_writes_binary_snapshot(files, tmp_path):
+    """
+    Test that journal compaction refreshes the binary snapshot.
+
+    Expected outcome: The binary snapshot holds the compacted state.
+    """
+
+    path, competitions_file, clubs_file = files
+    club = Club("Simply Lift", "john@simplylift.co", 13)
+    competition = Competition("Spring Festival", "2999-03-27 10:00:00", 25)
+    reserved = ReservationLedger()
+    journal = BookingJournal(
+        str(tmp_path / "bookings.journal"),
+        lambda: ([competition], [club], reserved),
+        clubs_file=clubs_file,
+        competitions_file=competitions_file,
+        binary_file=path,
+    )
+
+    def apply():
+        reserved.add("Simply Lift", "Spring Festival", 2)
+        competition["numberOfPlaces"] -= 2
+        club["points"] -= 2
+
+    journal.record("Simply Lift", "Spring Festival", 2, apply)
+    journal.compact()
+    journal.close()
+
+    state = load_binary_snapshot(path, (competitions_file, clubs_file))
+    assert state["clubs"][0]["points"] == 11
+    assert state["reservations"] == (("Simply Lift", "Spring Festival", 2),)
+    assert state["clubsSeq"] == 1
+
+
+def test_create_storage_prefers_binary_snapshot(files, monkeypatch):
+    """
+    Test that the memory backend starts from the binary snapshot when it
+    matches the JSON snapshots, and from the JSON snapshots otherwise.
+
+    Expected outcome: The binary state is used until clubs.json changes.
+    """
+
+    path, competitions_file, clubs_file = files
+    monkeypatch.setattr("storage.COMPETITIONS_FILE", competitions_file)
+    monkeypatch.setattr("storage.CLUBS_FILE", clubs_file)
+    config = {
+        "STORAGE_BACKEND": "memory",
+        "SNAPSHOT_PATH": path,
+        "JOURNAL_PATH": None,
+        "BOOKING_LOCK_STRIPES": 4,
+        "FLUSH_INTERVAL": 0,
+        "HOT_RELOAD_INTERVAL": 0,
+    }
+
+    write_state(files, 8)
+    storage = create_storage(config)
+    assert storage.club_by_name("Simply Lift")["points"] == 8
+    assert storage.ledger.held("Simply Lift", "Spring Festival") == 5
+
+    write_snapshot(
+        clubs_file,
+        "clubs",
+        [{"name": "Simply Lift", "email": "john@simplylift.co", "points": 9}],
+    )
+    storage = create_storage(config)
+    assert storage.club_by_name("Simply Lift")["points"] == 9
+    # The JSON snapshots were loaded, and the binary snapshot rebuilt.
+    state = load_binary_snapshot(path, (competitions_file, clubs_file))
+    assert state["clubs"][0]["points"] == 9
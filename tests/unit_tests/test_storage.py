@@ -0,0 +1,173 @@
+from datetime import datetime
+
+import pytest
+from booking import BookingError
+from storage import MemoryStorage, SQLiteStorage
+
+
+def make_records():
+    competitions = [
+        {
+            "name": "Spring Festival",
+            "date": "2020-03-27 10:00:00",
+            "numberOfPlaces": "25",
+        },
+        {
+            "name": "Fall Classic",
+            "date": "2020-10-22 13:30:00",
+            "numberOfPlaces": "3",
+        },
+    ]
+    clubs = [
+        {"name": "Simply Lift", "email": "john@simplylift.co", "points": "10"},
+        {
+            "name": "Iron Temple",
+            "email": "admin@irontemple.com",
+            "points": "4",
+        },
+    ]
+    return competitions, clubs
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    competitions, clubs = make_records()
+    if request.param == "memory":
+        backend = MemoryStorage(competitions, clubs)
+    else:
+        backend = SQLiteStorage(str(tmp_path / "gudlft.sqlite3"))
+        backend.import_records(competitions, clubs)
+    yield backend
+    backend.close()
+
+
+def test_lookups(storage):
+    """
+    Test that both backends resolve clubs and competitions the same way.
+
+    Expected outcome: Known keys return the records, unknown keys return None.
+    """
+
+    assert storage.club_by_email("john@simplylift.co")["name"] == "Simply Lift"
+    assert int(storage.club_by_name("Iron Temple")["points"]) == 4
+    assert storage.competition_by_name("Fall Classic")["date"] == (
+        "2020-10-22 13:30:00"
+    )
+    assert storage.club_by_name("Unknown") is None
+    assert [c["name"] for c in storage.competitions()] == [
+        "Spring Festival",
+        "Fall Classic",
+    ]
+
+
+def test_book_updates_points_and_places(storage):
+    """
+    Test that a booking deducts points and places.
+
+    Expected outcome: The returned and stored records are both updated.
+    """
+
+    club = storage.club_by_name("Simply Lift")
+    competition = storage.competition_by_name("Spring Festival")
+    club, competition = storage.book(club, competition, 3)
+    assert int(club["points"]) == 7
+    assert int(competition["numberOfPlaces"]) == 22
+    assert int(storage.club_by_name("Simply Lift")["points"]) == 7
+
+
+def test_rejected_booking_changes_nothing(storage):
+    """
+    Test that a rejected booking leaves the stored records untouched.
+
+    Expected outcome: A BookingError is raised and points and places are unchanged.
+    """
+
+    club = storage.club_by_name("Simply Lift")
+    competition = storage.competition_by_name("Fall Classic")
+    with pytest.raises(BookingError) as error:
+        storage.book(club, competition, 5)
+    assert error.value.reason == "sold_out"
+    assert int(storage.club_by_name("Simply Lift")["points"]) == 10
+    assert (
+        int(storage.competition_by_name("Fall Classic")["numberOfPlaces"]) == 3
+    )
+
+
+def test_sqlite_import_only_once(tmp_path):
+    """
+    Test that a second worker starting on a filled database does not import again.
+
+    Expected outcome: The second import is skipped and bookings are kept.
+    """
+
+    path = str(tmp_path / "gudlft.sqlite3")
+    first = SQLiteStorage(path)
+    assert first.import_records(*make_records())
+    first.book(
+        first.club_by_name("Simply Lift"),
+        first.competition_by_name("Spring Festival"),
+        2,
+    )
+    second = SQLiteStorage(path)
+    assert not second.import_records(*make_records())
+    assert second.club_by_name("Simply Lift")["points"] == 8
+    first.close()
+    second.close()
+
+
+def test_leaderboard_page(storage):
+    """
+    Test that both backends rank clubs by points and follow bookings.
+
+    Expected outcome: The club with the most points comes first, until it books.
+    """
+
+    assert [c["name"] for c in storage.leaderboard_page(0, 10)] == [
+        "Simply Lift",
+        "Iron Temple",
+    ]
+    storage.book(
+        storage.club_by_name("Simply Lift"),
+        storage.competition_by_name("Spring Festival"),
+        8,
+    )
+    assert [c["name"] for c in storage.leaderboard_page(0, 1)] == [
+        "Iron Temple"
+    ]
+    assert storage.club_count() == 2
+
+
+def test_upcoming_and_past_competitions(storage):
+    """
+    Test that both backends split competitions around a date the same way.
+
+    Expected outcome: The competitions are listed on the right side of the date.
+    """
+
+    now = datetime(2020, 6, 1)
+    assert [c["name"] for c in storage.upcoming_competitions(now)] == [
+        "Fall Classic"
+    ]
+    assert [c["name"] for c in storage.past_competitions(now)] == [
+        "Spring Festival"
+    ]
+    competition = storage.competition_by_name("Fall Classic")
+    assert storage.competition_date(competition) == datetime(
+        2020, 10, 22, 13, 30
+    )
+
+
+def test_version_changes_on_booking(storage):
+    """
+    Test that both backends bump their data version on a successful booking only.
+
+    Expected outcome: Rejected bookings keep the version, accepted ones change it.
+    """
+
+    version, _ = storage.version()
+    club = storage.club_by_name("Simply Lift")
+    with pytest.raises(BookingError):
+        storage.book(club, storage.competition_by_name("Fall Classic"), 5)
+    assert storage.version()[0] == version
+    storage.book(club, storage.competition_by_name("Spring Festival"), 1)
+    assert storage.version()[0] != version
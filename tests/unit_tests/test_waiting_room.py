@@ -0,0 +1,269 @@
+import re
+import threading
+
+import pytest
+import server
+from server import app, set_test_data
+from waiting_room import WaitingRoom, WaitingRoomFull
+
+
+@pytest.fixture
+def records(monkeypatch):
+    competitions = [
+        {
+            "name": "Winter Open",
+            "date": "2999-01-15 09:00:00",
+            "numberOfPlaces": "25",
+        }
+    ]
+    clubs = [
+        {
+            "name": f"Club {i}",
+            "email": f"club{i}@example.com",
+            "points": "13",
+        }
+        for i in range(20)
+    ]
+    app.config["TESTING"] = True
+    monkeypatch.setitem(
+        app.config, "WAITING_ROOM_COMPETITIONS", ["Winter Open"]
+    )
+    set_test_data(competitions, clubs)
+    yield competitions[0], clubs
+    server.close_waiting_rooms()
+
+
+def test_room_applies_bookings_in_order():
+    """
+    Test that a room applies its bookings one at a time, in order.
+
+    Expected outcome: The outcomes follow the submission order, and
+    positions count the bookings left before each ticket.
+    """
+
+    release = threading.Event()
+    applied = []
+
+    def apply(n):
+        release.wait()
+        applied.append(n)
+        return n
+
+    room = WaitingRoom("Winter Open", apply, maxsize=10)
+    tickets = [room.submit(n) for n in range(5)]
+    assert [room.position(t) for t in tickets] == [0, 1, 2, 3, 4]
+    release.set()
+    assert tickets[-1].wait(5)
+    assert applied == [0, 1, 2, 3, 4]
+    assert [t.outcome for t in tickets] == [0, 1, 2, 3, 4]
+    assert room.position(tickets[-1]) == 0
+    room.close()
+
+
+def test_room_is_bounded():
+    """
+    Test the bounds of a room.
+
+    Expected outcome: A full queue refuses bookings, and only the last
+    `keep` applied tickets can be polled.
+    """
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def apply(n):
+        started.set()
+        release.wait()
+
+    room = WaitingRoom("Winter Open", apply, maxsize=2, keep=2)
+    first = room.submit(0)
+    assert started.wait(5)
+    room.submit(1)
+    room.submit(2)
+    with pytest.raises(WaitingRoomFull):
+        room.submit(3)
+    release.set()
+    room.close()
+    assert room.ticket(first.id) is None
+
+
+def test_form_booking_through_waiting_room(records):
+    """
+    Test a purchasePlaces booking of a competition with a waiting room.
+
+    Expected outcome: The request is answered 202 with the waiting page,
+    whose poll shows the outcome once the booking is applied.
+    """
+
+    competition, clubs = records
+    client = app.test_client()
+    response = client.post(
+        "/purchasePlaces",
+        data={"club": "Club 0", "competition": "Winter Open", "places": 2},
+    )
+    assert response.status_code == 202
+    assert b"waiting room" in response.data
+
+    ticket = re.search(rb"/waitingRoom/[^/]+/(\w+)", response.data)[1]
+    ticket = ticket.decode()
+    assert server.waiting_rooms["Winter Open"].ticket(ticket).wait(5)
+    response = client.get(f"/waitingRoom/Winter Open/{ticket}")
+    assert response.status_code == 200
+    assert b"Great-booking complete!" in response.data
+    assert clubs[0]["points"] == 11
+    assert competition["numberOfPlaces"] == 23
+
+
+def test_waiting_page_refresh_polls_the_ticket(records):
+    """
+    Test following the automatic refresh of the waiting room page.
+
+    Expected outcome: The refresh points at the ticket status page, not
+    at purchasePlaces, and shows the outcome once the booking is applied.
+    """
+
+    competition, clubs = records
+    client = app.test_client()
+    response = client.post(
+        "/purchasePlaces",
+        data={"club": "Club 0", "competition": "Winter Open", "places": 2},
+    )
+    refresh = re.search(
+        rb'http-equiv="refresh" content="\d+; url=([^"]+)"', response.data
+    )
+    assert refresh is not None
+    url = refresh[1].decode()
+    ticket = url.rsplit("/", 1)[1]
+    assert server.waiting_rooms["Winter Open"].ticket(ticket).wait(5)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b"Great-booking complete!" in response.data
+    assert clubs[0]["points"] == 11
+
+
+def test_api_stampede_through_waiting_room(records):
+    """
+    Test many clubs booking the same competition through the API at once.
+
+    Steps:
+    1. 20 clubs ask for 2 places each in a competition of 25 places.
+    2. Every club polls its ticket until the booking is applied.
+
+    Expected outcome: The first 12 bookings in queue order get their
+    places, the others are rejected, and nothing is oversold.
+    """
+
+    competition, clubs = records
+    start = threading.Barrier(20)
+    tickets = {}
+
+    def worker(n):
+        client = app.test_client()
+        start.wait()
+        response = client.post(
+            "/api/v1/bookings",
+            json={
+                "club": f"Club {n}",
+                "competition": "Winter Open",
+                "places": 2,
+            },
+        )
+        assert response.status_code == 202
+        assert response.headers["Location"] == response.json["poll"]
+        tickets[n] = response.json
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(20)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    room = server.waiting_rooms["Winter Open"]
+    client = app.test_client()
+    outcomes = []
+    queue_order = sorted(
+        tickets.values(), key=lambda t: room.ticket(t["ticket"]).number
+    )
+    for queued in queue_order:
+        assert room.ticket(queued["ticket"]).wait(5)
+        response = client.get(queued["poll"])
+        assert response.json["status"] == "done"
+        outcomes.append(response.json["booked"])
+
+    assert outcomes == [True] * 12 + [False] * 8
+    assert competition["numberOfPlaces"] == 1
+    response = client.get("/api/v1/waitingRoom/Winter Open/unknown")
+    assert response.status_code == 404
+
+
+def test_api_refuses_started_competition_before_queuing(records):
+    """
+    Test an API booking of a waiting room competition that has started.
+
+    Expected outcome: The booking is refused at once with a 400 error,
+    as on the booking form, and nothing is queued.
+    """
+
+    competition, clubs = records
+    server.storage.registry.update_competition(
+        "Winter Open", date="2000-01-15 09:00:00"
+    )
+    server.storage.schedule.add(competition)
+    response = app.test_client().post(
+        "/api/v1/bookings",
+        json={"club": "Club 0", "competition": "Winter Open", "places": 2},
+    )
+    assert response.status_code == 400
+    assert response.json["error"] == "past"
+    assert "ticket" not in response.json
+    assert competition["numberOfPlaces"] == 25
+
+
+def test_batch_can_not_jump_the_queue(records):
+    """
+    Test a batch booking of a competition with a waiting room.
+
+    Expected outcome: The batch is refused with a 409 status code and
+    nothing is booked.
+    """
+
+    competition, clubs = records
+    response = app.test_client().post(
+        "/api/v1/bookings/batch",
+        json={
+            "club": "Club 0",
+            "bookings": [{"competition": "Winter Open", "places": 2}],
+        },
+    )
+    assert response.status_code == 409
+    assert response.json["error"] == "waiting_room"
+    assert response.json["competition"] == "Winter Open"
+    assert competition["numberOfPlaces"] == 25
+
+
+def test_poll_outcome_of_removed_club(records):
+    """
+    Test polling a ticket whose club was removed since the booking.
+
+    Expected outcome: The outcome is shown on the index page instead of
+    the welcome page, and unknown tickets answer a 404 page.
+    """
+
+    competition, clubs = records
+    client = app.test_client()
+    response = client.post(
+        "/purchasePlaces",
+        data={"club": "Club 0", "competition": "Winter Open", "places": 2},
+    )
+    ticket = re.search(rb"/waitingRoom/[^/]+/(\w+)", response.data)[1]
+    ticket = ticket.decode()
+    assert server.waiting_rooms["Winter Open"].ticket(ticket).wait(5)
+    server.storage.registry.remove_club("Club 0")
+
+    response = client.get(f"/waitingRoom/Winter Open/{ticket}")
+    assert response.status_code == 200
+    assert b"Great-booking complete!" in response.data
+    response = client.get("/waitingRoom/Winter Open/unknown")
+    assert response.status_code == 404
+    assert b"Unknown or expired booking ticket." in response.data
@@ -1,47 +1,111 @@
 import json
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from json_stream import iter_snapshot
+from metrics import timed
+
+CLUBS_FILE = "clubs.json"
+COMPETITIONS_FILE = "competitions.json"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text):
+    """
+    Parses a competition date, once per distinct value.
+
+    Parameters:
+    text (str): The date, formatted as in competitions.json.
+
+    Returns:
+    datetime: The parsed date.
+    """
+
+    return datetime.strptime(text, DATE_FORMAT)
+
+
+def load_snapshot(path, key):
+    """
+    Loads the records stored under `key` in a JSON snapshot file.
+
+    Parameters:
+    path (str): The path of the snapshot file.
+    key (str): The top-level key holding the records.
+
+    Returns:
+    tuple: The list of records and a dict of the other top-level entries.
+    """
+
+    with open(path) as f:
+        data = json.load(f)
+    records = data.pop(key)
+    return records, data
+
+
+def write_snapshot(path, key, records, **meta):
+    """
+    Atomically replaces a JSON snapshot file.
+
+    The snapshot is written to a temporary file in the same directory,
+    fsync'd and renamed over the target, so readers and a crash mid-write
+    only ever see the old or the new complete file.
+
+    Parameters:
+    path (str): The path of the snapshot file.
+    key (str): The top-level key holding the records.
+    records (list): The records to store.
+    **meta: Extra top-level entries to store next to the records.
+    """
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({key: records, **meta}, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
 
 def load_clubs():
-    with open("clubs.json") as c:
-        list_of_clubs = json.load(c)["clubs"]
-        return list_of_clubs
+    list_of_clubs = list(iter_snapshot(CLUBS_FILE, "clubs"))
+    return list_of_clubs
 
 
 def load_competitions():
-    with open("competitions.json") as comps:
-        list_of_competitions = json.load(comps)["competitions"]
-        return list_of_competitions
+    list_of_competitions = list(
+        iter_snapshot(COMPETITIONS_FILE, "competitions")
+    )
+    return list_of_competitions
 
 
 def search_competition(competition_name, competitions):
-    competition = [c for c in competitions if c["name"] == competition_name]
-    if len(competition) > 0:
-        return competition[0]
-    else:
-        return None
+    with timed("lookup"):
+        # Registries and storage backends answer from their own indexes.
+        if hasattr(competitions, "competition_by_name"):
+            return competitions.competition_by_name(competition_name)
+        return next(
+            (c for c in competitions if c["name"] == competition_name), None
+        )
 
 
 def search_club_email(email, clubs):
-    club = [club for club in clubs if club["email"] == email]
-    if len(club) > 0:
-        return club[0]
-    else:
-        return None
+    with timed("lookup"):
+        if hasattr(clubs, "club_by_email"):
+            return clubs.club_by_email(email)
+        return next((club for club in clubs if club["email"] == email), None)
 
 
 def search_club_name(name, clubs):
-    club = [club for club in clubs if club["name"] == name]
-    if len(club) > 0:
-        return club[0]
-    else:
-        return None
+    with timed("lookup"):
+        if hasattr(clubs, "club_by_name"):
+            return clubs.club_by_name(name)
+        return next((club for club in clubs if club["name"] == name), None)
 
 
 def save_clubs(clubs):
-    with open("clubs.json", "w") as c:
-        json.dump({"clubs": clubs}, c, indent=4)
+    write_snapshot(CLUBS_FILE, "clubs", clubs)
 
 
 def save_competitions(competitions):
-    with open("competitions.json", "w") as comps:
-        json.dump({"competitions": competitions}, comps, indent=4)
+    write_snapshot(COMPETITIONS_FILE, "competitions", competitions)
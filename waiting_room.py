@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+from metrics import WAITING_ROOM_WAIT
+
+
+class WaitingRoomFull(Exception):
+    """
+    Raised when a waiting room can not take more bookings.
+    """
+
+
+class Ticket:
+    """
+    A booking waiting in a waiting room.
+
+    Attributes:
+    id (str): The ticket id given to the client.
+    number (int): The rank of the ticket in the room, from 0.
+    job (tuple): The arguments of the booking.
+    outcome (dict): The outcome of the booking, None until it is applied.
+    """
+
+    __slots__ = ("id", "number", "job", "outcome", "submitted", "done")
+
+    def __init__(self, number, job):
+        self.id = uuid.uuid4().hex
+        self.number = number
+        self.job = job
+        self.outcome = None
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class WaitingRoom:
+    """
+    First in, first out queue of the bookings of one competition.
+
+    Bookings are applied one at a time, in arrival order, by a worker
+    thread dedicated to the room, so requests only enqueue their booking
+    and return at once instead of racing for the booking locks. Clients
+    poll their ticket, whose position is the difference of two counters.
+
+    The queue holds at most `maxsize` bookings, and the outcomes of the
+    last `keep` tickets are kept for polling.
+    """
+
+    def __init__(self, name, apply, maxsize=1000, keep=10000):
+        """
+        Creates the room; its worker starts with the first booking.
+
+        Parameters:
+        name (str): The name of the competition.
+        apply (callable): Applies the booking of a job, returns its outcome.
+        maxsize (int): Maximum number of waiting bookings.
+        keep (int): Number of applied tickets kept for polling.
+        """
+
+        self.name = name
+        self.apply = apply
+        self.keep = keep
+        self.served = 0
+        self._queue = queue.Queue(maxsize)
+        self._next_number = 0
+        self._tickets = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, *job):
+        """
+        Queues a booking.
+
+        Parameters:
+        *job: The arguments of `apply`.
+
+        Returns:
+        Ticket: The ticket of the booking.
+
+        Raises:
+        WaitingRoomFull: If the queue is full.
+        """
+
+        with self._lock:
+            ticket = Ticket(self._next_number, job)
+            try:
+                self._queue.put_nowait(ticket)
+            except queue.Full:
+                raise WaitingRoomFull(self.name) from None
+            self._next_number += 1
+            self._tickets[ticket.id] = ticket
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name=f"waiting-room-{self.name}",
+                    daemon=True,
+                )
+                self._worker.start()
+        return ticket
+
+    def ticket(self, ticket_id):
+        return self._tickets.get(ticket_id)
+
+    def position(self, ticket):
+        """
+        Returns the number of bookings to apply before a ticket.
+
+        Parameters:
+        ticket (Ticket): A ticket of this room.
+
+        Returns:
+        int: 0 once the ticket is next or applied.
+        """
+
+        return max(ticket.number - self.served, 0)
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def close(self):
+        """
+        Stops the worker once the queued bookings are applied.
+        """
+
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+
+    def _run(self):
+        while True:
+            ticket = self._queue.get()
+            if ticket is None:
+                return
+            try:
+                ticket.outcome = self.apply(*ticket.job)
+            except Exception:
+                ticket.outcome = {
+                    "booked": False,
+                    "reason": "error",
+                    "message": "Something went wrong-please try again",
+                    "statusCode": 500,
+                }
+            WAITING_ROOM_WAIT.observe(
+                time.perf_counter() - ticket.submitted, self.name
+            )
+            with self._lock:
+                self.served += 1
+                self._finished.append(ticket.id)
+                if len(self._finished) > self.keep:
+                    del self._tickets[self._finished.popleft()]
+            ticket.done.set()